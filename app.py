@@ -1,6 +1,16 @@
-from flask import Flask, render_template, request, jsonify
+import time
+_BOOT_START = time.perf_counter()
+
+from flask import Flask, Response, render_template, request, jsonify
 import os
 import logging
+import threading
+from costmodel import AdmissionController, AdmissionError, CostModel
+from lod import LODScene, SceneCache, encode as encode_lod, to_json as lod_json
+from metrics import REGISTRY, private_mb, startup_report
+from tsp_sessions import SessionError, SessionStore
+from uploads import InstanceStore, UploadError, PROBLEM_BY_EXTENSION, limits_from_config
+from serializers import NumpyJSONProvider, dumps_json, respond
 
 # Setup logging
 logging.basicConfig(level=logging.INFO)
@@ -8,6 +18,7 @@ logger = logging.getLogger(__name__)
 
 # Create Flask app instance
 app = Flask(__name__)
+app.json = NumpyJSONProvider(app)
 
 # Try to load configuration
 try:
@@ -21,16 +32,17 @@ except ImportError as e:
     app.secret_key = 'fallback-secret-key-2024'
     print("✅ Using fallback configuration")
 
-# Try to import optimizer
+# Try to import optimizer; the framework itself is built on first use (see get_framework)
 try:
     from optimizer import OptimizationFramework
-    framework = OptimizationFramework()
+    framework = None
     print("✅ Optimizer framework loaded")
 except ImportError as e:
     print(f"⚠️ Optimizer import warning: {e}")
     # Create a simple fallback optimizer
     class SimpleOptimizer:
-        def solve(self, problem_type, algorithm, filepath):
+        def solve(self, problem_type, algorithm, filepath, trace=None, track_memory=False,
+                  params=None):
             # Demo solutions for testing
             if problem_type == 'tsp':
                 return {
@@ -68,6 +80,119 @@ except ImportError as e:
     framework = SimpleOptimizer()
     print("✅ Using demo optimizer")
 
+_framework_lock = threading.Lock()
+
+def get_framework():
+    """Build the optimizer framework on first use; PRELOAD_PROBLEMS warms it at import."""
+    global framework
+    if framework is None:
+        with _framework_lock:
+            if framework is None:
+                framework = OptimizationFramework(preload=app.config.get('PRELOAD_PROBLEMS'),
+                                                  cost_model=load_cost_model(),
+                                                  admission=AdmissionController(
+                                                      app.config.get('MAX_PREDICTED_SECONDS'),
+                                                      app.config.get('MAX_PREDICTED_MEMORY_MB'),
+                                                      process_capacity(),
+                                                      app.config.get('ADMISSION_QUEUE_TIMEOUT', 0)))
+    return framework
+
+def process_capacity():
+    """This process's share of SOLVER_CAPACITY_SECONDS (the budget is for the whole server)."""
+    capacity = app.config.get('SOLVER_CAPACITY_SECONDS')
+    if not capacity:
+        return capacity
+    return capacity / max(1, app.config.get('SERVER_PROCESSES', 1))
+
+def load_cost_model():
+    """Calibrated model from COST_MODEL_PATH if present, else the built-in coefficients."""
+    path = app.config.get('COST_MODEL_PATH')
+    if path and os.path.exists(path):
+        try:
+            model = CostModel.load(path)
+            print(f"✅ Cost model loaded from {path}")
+            return model
+        except Exception as e:
+            logger.error(f"Ignoring cost model {path}: {e}")
+    return CostModel()
+
+if app.config.get('PRELOAD_PROBLEMS'):
+    # Prefork servers: import heavy solver dependencies once in the master
+    get_framework()
+
+def init_history():
+    """Run history is optional: the app keeps serving if the database is unavailable."""
+    global history_writer, history_store
+    try:
+        from history import create_history
+        history_writer, history_store = create_history(app.config)
+        print("✅ Run history enabled" if history_writer else "ℹ️ Run history disabled")
+    except Exception as e:
+        print(f"⚠️ Run history unavailable: {e}")
+        history_writer, history_store = None, None
+
+init_history()
+
+instance_store = InstanceStore(app.config.get('UPLOAD_FOLDER', 'uploads'),
+                               limits_from_config(app.config))
+
+# Label values app.py records besides the solver's own algorithms
+REGISTRY.allow('algorithm', ['multi', 'incremental'])
+
+tsp_sessions = SessionStore(app.config.get('MAX_TSP_SESSIONS', 100),
+                            app.config.get('TSP_SESSION_TTL', 3600),
+                            app.config.get('MAX_TSP_SESSION_CITIES', 5000),
+                            app.config.get('MAX_TSP_SESSION_CELLS'))
+
+lod_scenes = SceneCache(app.config.get('LOD_CACHE_SCENES', 32))
+
+# Bundled sample datasets by problem type (also the defaults of /api/solve)
+BUNDLED_DATASETS = {'tsp': os.path.join('data', 'tsp'),
+                    'knapsack': os.path.join('data', 'knapsack'),
+                    'matching': os.path.join('data', 'matching')}
+BUNDLED_EXTENSIONS = {'tsp': ('.tsp', '.gxi'), 'knapsack': ('.csv', '.gxi'),
+                      'matching': ('.json', '.gxi')}
+preloaded = {'datasets': 0, 'failed': [], 'seconds': 0.0}
+
+def preload_datasets(sources):
+    """Parse bundled and/or uploaded instances into the framework before workers fork."""
+    start = time.perf_counter()
+    paths = []
+    if 'bundled' in sources:
+        for problem_type, directory in BUNDLED_DATASETS.items():
+            if os.path.isdir(directory):
+                paths.extend((problem_type, os.path.join(directory, name))
+                             for name in sorted(os.listdir(directory))
+                             if name.endswith(BUNDLED_EXTENSIONS[problem_type]))
+    if 'uploads' in sources:
+        paths.extend((meta['problem_type'], meta['path']) for meta in instance_store.list())
+    solver = get_framework()
+    for problem_type, path in paths:
+        try:
+            solver.preload_dataset(problem_type, path)
+            preloaded['datasets'] += 1
+        except Exception as e:
+            preloaded['failed'].append({'path': path, 'error': str(e)})
+            logger.error(f"Could not preload {path}: {e}")
+    preloaded['seconds'] = time.perf_counter() - start
+    print(f"📦 Preloaded {preloaded['datasets']} datasets in {preloaded['seconds']:.2f}s")
+
+def after_fork():
+    """Rebuild per-process state in a forked worker; threads (history writer) don't survive fork."""
+    global worker_baseline_mb
+    init_history()
+    worker_baseline_mb = private_mb()
+
+if app.config.get('PRELOAD_DATASETS') and 'OptimizationFramework' in globals():
+    preload_datasets(app.config['PRELOAD_DATASETS'])
+
+# Private memory when this process started serving; after_fork() resets it per worker
+worker_baseline_mb = private_mb()
+
+_startup = startup_report(_BOOT_START)
+print(f"⏱️ Startup: {_startup['boot_seconds']:.3f}s, RSS {_startup['rss_mb']:.1f} MB, "
+      f"loaded: {', '.join(_startup['heavy_modules']) or 'none'}")
+
 @app.route('/')
 def index():
     return render_template('index.html')
@@ -76,6 +201,13 @@ def index():
 def problem_page(problem_type):
     return render_template('problem.html', problem_type=problem_type)
 
+def admission_error(e: AdmissionError):
+    response = jsonify({'success': False, 'error': str(e)})
+    response.status_code = e.status
+    if e.retry_after:
+        response.headers['Retry-After'] = str(int(e.retry_after + 0.999))
+    return response
+
 @app.route('/api/solve', methods=['POST'])
 def solve_problem():
     try:
@@ -85,9 +217,24 @@ def solve_problem():
             
         problem_type = data.get('problem_type', 'tsp')
         algorithms = data.get('algorithms', ['greedy'])
+        instance_id = data.get('instance_id')
+        # False disables step tracing; a dict sets 'every' / 'max_frames'
+        trace = data.get('trace')
+        track_memory = bool(data.get('track_memory', False))
+        params = data.get('params') or {}
+        # Seconds the 'auto' algorithm may plan for
+        budget = float(data.get('latency_budget') or app.config.get('AUTO_DEFAULT_BUDGET', 1.0))
         
+        if instance_id:
+            # Uploaded dataset; its problem type wins over the request's default
+            instance = instance_store.get(instance_id)
+            if 'problem_type' in data and data['problem_type'] != instance['problem_type']:
+                return jsonify({'success': False,
+                                'error': f"Instance {instance_id} is a {instance['problem_type']} problem"})
+            problem_type = instance['problem_type']
+            filepath = instance['path']
         # Map to bundled sample datasets
-        if problem_type == 'tsp':
+        elif problem_type == 'tsp':
             filepath = os.path.join('data', 'tsp', 'berlin52.tsp')
         elif problem_type == 'knapsack':
             filepath = os.path.join('data', 'knapsack', 'sample1.csv')
@@ -96,40 +243,275 @@ def solve_problem():
         
         results = []
         for algorithm in algorithms:
-            result = framework.solve(problem_type, algorithm, filepath)
+            result = get_framework().solve(problem_type, algorithm, filepath, trace=trace,
+                                           track_memory=track_memory, params=params,
+                                           budget=budget)
             results.append(result)
+            if history_writer:
+                history_writer.record(problem_type, result.get('algorithm', algorithm), filepath,
+                                      result, parameters=params or None)
         
-        return jsonify({
+        start = time.perf_counter()
+        response = respond({
             'success': True, 
             'results': results,
             'best_result': results[0]
-        })
+        }, request)
+        serialize_time = time.perf_counter() - start
+        REGISTRY.observe_phase(problem_type, algorithms[0] if len(algorithms) == 1 else 'multi',
+                               'serialize', serialize_time)
+        
+        # Phase totals across all algorithms, in milliseconds
+        totals = {}
+        for result in results:
+            for phase, seconds in result.get('phases', {}).items():
+                totals[phase] = totals.get(phase, 0.0) + seconds
+        totals['serialize'] = serialize_time
+        response.headers['Server-Timing'] = ', '.join(
+            f'{phase};dur={seconds * 1000:.3f}' for phase, seconds in totals.items())
+        return response
     
+    except AdmissionError as e:
+        return admission_error(e)
     except Exception as e:
         logger.error(f"Error solving problem: {e}")
         return jsonify({'success': False, 'error': str(e)})
 
+@app.route('/api/solve/batch', methods=['POST'])
+def solve_batch():
+    """Solve many small inline instances; streams one NDJSON line per instance.
+
+    Body: ``{"problem_type", "algorithm", "instances": [{"id", "data", ...}]}``.
+    Lines arrive in completion order and carry the instance ``index``; the
+    last line is a ``summary`` object.  Instances get the upload size limits,
+    the batch is admitted on its total predicted cost, and solved instances
+    are recorded in the run history with dataset path ``inline``.
+    """
+    data = request.get_json(silent=True)
+    if not data or not isinstance(data.get('instances'), list):
+        return jsonify({'success': False, 'error': "JSON body needs an 'instances' list"}), 400
+    instances = data['instances']
+    limit = app.config.get('MAX_BATCH_INSTANCES', 10000)
+    if len(instances) > limit:
+        return jsonify({'success': False,
+                        'error': f"Batch has {len(instances)} instances; the limit is {limit}"}), 413
+    solver = get_framework()
+    if not hasattr(solver, 'solve_batch'):
+        return jsonify({'success': False, 'error': 'Batch solving is unavailable'}), 503
+    
+    try:
+        results = solver.solve_batch(instances, data.get('problem_type'), data.get('algorithm'),
+                                     workers=app.config.get('BATCH_WORKERS'),
+                                     chunk_size=data.get('chunk_size') or app.config.get('BATCH_CHUNK_SIZE'),
+                                     limits=limits_from_config(app.config))
+    except AdmissionError as e:
+        return admission_error(e)
+    
+    def generate():
+        start = time.perf_counter()
+        solved = failed = 0
+        for result in results:
+            if result['success']:
+                solved += 1
+                if history_writer:
+                    params = instances[result['index']].get('params')
+                    history_writer.record(result['problem_type'], result['algorithm'], 'inline',
+                                          result, parameters=params or None)
+            else:
+                failed += 1
+            yield dumps_json(result) + b'\n'
+        yield dumps_json({'summary': {'instances': len(instances), 'solved': solved,
+                                      'failed': failed,
+                                      'elapsed': time.perf_counter() - start}}) + b'\n'
+    
+    return Response(generate(), mimetype='application/x-ndjson')
+
+@app.route('/api/tsp/sessions', methods=['POST'])
+def create_tsp_session():
+    """Start an incremental TSP session from ``coordinates`` (+ ``ids``) or an ``instance_id``."""
+    data = request.get_json(silent=True) or {}
+    try:
+        if not app.config.get('TSP_SESSIONS_ENABLED', True):
+            raise SessionError("TSP sessions are disabled on this server", 404)
+        coordinates, ids = data.get('coordinates'), data.get('ids')
+        if coordinates is None:
+            if data.get('instance_id'):
+                instance = instance_store.get(data['instance_id'])
+                if instance['problem_type'] != 'tsp':
+                    raise SessionError(f"Instance {data['instance_id']} is a "
+                                       f"{instance['problem_type']} problem")
+                filepath = instance['path']
+            else:
+                filepath = os.path.join('data', 'tsp', 'berlin52.tsp')
+            problem = type(get_framework().problems['tsp'])()
+            problem.load_data(filepath)
+            coordinates = problem.coordinates[:problem.n]
+        session_id, session = tsp_sessions.create(coordinates, ids)
+    except (SessionError, UploadError) as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    return jsonify({'success': True, 'session_id': session_id, **session.snapshot()})
+
+@app.route('/api/tsp/sessions/<session_id>', methods=['GET', 'DELETE'])
+def tsp_session(session_id):
+    try:
+        if request.method == 'DELETE':
+            tsp_sessions.delete(session_id)
+            return jsonify({'success': True})
+        return jsonify({'success': True, **tsp_sessions.get(session_id).snapshot()})
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+
+@app.route('/api/tsp/sessions/<session_id>/deltas', methods=['POST'])
+def apply_tsp_deltas(session_id):
+    """Apply insert/delete/move deltas and return the re-optimised tour (ids only)."""
+    data = request.get_json(silent=True) or {}
+    try:
+        session = tsp_sessions.get(session_id)
+        stats = session.apply(data.get('deltas'))
+    except SessionError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    REGISTRY.observe_run('tsp', 'incremental', {'solve': stats['repair_time'] + stats['improve_time']},
+                         {'improvement_moves': stats['improvement_moves']})
+    return jsonify({'success': True, **stats, **session.snapshot(coordinates=False)})
+
+def _lod_scene(source, source_id):
+    """Scene for a TSP session (its current tour) or an uploaded TSP instance.
+
+    Instances are drawn without a tour unless ``?algorithm=`` names a solver to run.
+    """
+    if source == 'sessions':
+        coordinates, version = tsp_sessions.get(source_id).ordered_coordinates()
+        return lod_scenes.get(('session', source_id, version),
+                              lambda: LODScene(coordinates, list(range(len(coordinates)))))
+    if source != 'instances':
+        raise SessionError(f"Unknown LOD source: {source}", 404)
+    instance = instance_store.get(source_id)
+    if instance['problem_type'] != 'tsp':
+        raise SessionError(f"Instance {source_id} is a {instance['problem_type']} problem")
+    algorithm = request.args.get('algorithm')
+
+    def build():
+        problem = type(get_framework().problems['tsp'])()
+        problem.load_data(instance['path'])
+        tour = None
+        if algorithm:
+            result = get_framework().solve('tsp', algorithm, instance['path'], trace=False)
+            tour = result['solution']['tour']
+        return LODScene(problem.coordinates[:problem.n], tour)
+
+    return lod_scenes.get(('instance', source_id, algorithm), build)
+
+def _lod_response(view):
+    if request.args.get('format') == 'json':
+        return jsonify({'success': True, **lod_json(view)})
+    return Response(encode_lod(view), mimetype='application/octet-stream')
+
+@app.route('/api/lod/<source>/<source_id>/view')
+def lod_view(source, source_id):
+    """Clustered cities and simplified tour for a viewport in normalised 0-100 units.
+
+    Query: ``x0, y0, x1, y1`` (default the whole instance), ``width``/``height``
+    in pixels, ``max_points`` and ``format=json`` (default: typed-array binary).
+    """
+    args = request.args
+    try:
+        scene = _lod_scene(source, source_id)
+        view = scene.view((args.get('x0', 0.0, type=float), args.get('y0', 0.0, type=float),
+                           args.get('x1', 100.0, type=float), args.get('y1', 100.0, type=float)),
+                          args.get('width', 800, type=int), args.get('height', 600, type=int),
+                          min(args.get('max_points', app.config.get('LOD_MAX_POINTS', 4000), type=int),
+                              app.config.get('LOD_MAX_POINTS', 4000)))
+    except (SessionError, UploadError, AdmissionError) as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return _lod_response(view)
+
+@app.route('/api/lod/<source>/<source_id>/tiles/<int:z>/<int:x>/<int:y>')
+def lod_tile(source, source_id, z, x, y):
+    """One 256px tile of the normalised 0-100 square; ``z`` splits it into 2^z x 2^z tiles."""
+    try:
+        view = _lod_scene(source, source_id).tile(z, x, y,
+                                                  max_points=app.config.get('LOD_MAX_POINTS', 4000))
+    except (SessionError, UploadError, AdmissionError) as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    except ValueError as e:
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return _lod_response(view)
+
+@app.route('/api/upload', methods=['POST'])
+def upload_dataset():
+    """Stream a raw dataset body (not multipart) into the instance store.
+
+    ``?problem_type=`` or the ``filename`` extension selects the parser;
+    knapsack CSVs without a capacity column take ``?capacity=``.
+    """
+    filename = request.args.get('filename') or request.headers.get('X-Filename')
+    problem_type = request.args.get('problem_type')
+    if not problem_type and filename:
+        problem_type = PROBLEM_BY_EXTENSION.get(os.path.splitext(filename)[1].lower())
+    try:
+        capacity = request.args.get('capacity', type=int)
+        meta = instance_store.ingest(request.stream, problem_type, filename=filename,
+                                     capacity=capacity, content_length=request.content_length)
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    logger.info(f"Stored {meta['problem_type']} upload {meta['instance_id']} ({meta['bytes']} bytes)")
+    return jsonify({'success': True, **{k: v for k, v in meta.items() if k != 'path'}})
+
+@app.route('/api/instances/<instance_id>')
+def get_instance(instance_id):
+    try:
+        meta = instance_store.get(instance_id)
+    except UploadError as e:
+        return jsonify({'success': False, 'error': str(e)}), e.status
+    return jsonify({'success': True, **{k: v for k, v in meta.items() if k != 'path'}})
+
 @app.route('/api/history')
 def get_history():
-    sample_history = [
-        {
-            'id': 1,
-            'algorithm_name': 'greedy',
-            'problem_type': 'tsp',
-            'objective_value': 7544.37,
-            'execution_time': 0.15,
-            'created_at': '2024-01-15 10:30:00'
-        },
-        {
-            'id': 2,
-            'algorithm_name': 'dp', 
-            'problem_type': 'knapsack',
-            'objective_value': 15,
-            'execution_time': 0.08,
-            'created_at': '2024-01-15 10:32:00'
-        }
-    ]
-    return jsonify(sample_history)
+    if not history_store:
+        return jsonify([])
+    try:
+        limit = max(1, min(int(request.args.get('limit', 50)), 500))
+    except ValueError:
+        return jsonify({'success': False, 'error': "'limit' must be an integer"}), 400
+    try:
+        rows, next_cursor = history_store.runs(
+            problem_type=request.args.get('problem_type'),
+            algorithm=request.args.get('algorithm'),
+            since=request.args.get('since'),
+            until=request.args.get('until'),
+            limit=limit,
+            cursor=request.args.get('cursor'))
+    except Exception as e:
+        logger.error(f"Error reading history: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+    
+    # Body stays a plain list for the dashboard; the next page is in a header
+    response = jsonify(rows)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response
+
+@app.route('/api/history/stats')
+def get_history_stats():
+    if not history_store:
+        return jsonify([])
+    try:
+        stats = history_store.stats(
+            problem_type=request.args.get('problem_type'),
+            algorithm=request.args.get('algorithm'),
+            since=request.args.get('since'),
+            until=request.args.get('until'))
+    except Exception as e:
+        logger.error(f"Error reading history stats: {e}")
+        return jsonify({'success': False, 'error': str(e)}), 400
+    return jsonify(stats)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Counters of the process answering the scrape; with several workers each has its own."""
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/health')
 def health_check():
@@ -139,6 +521,33 @@ def health_check():
         'config_loaded': 'Config' in globals()
     })
 
+@app.route('/ready')
+def readiness_check():
+    """Readiness probe: 503 until this worker can solve, with the failing checks named."""
+    checks = {}
+    try:
+        solver = get_framework()
+        checks['solver'] = hasattr(solver, 'problems')
+    except Exception as e:
+        logger.error(f"Solver unavailable: {e}")
+        checks['solver'] = False
+    checks['datasets'] = not preloaded['failed']
+    checks['uploads'] = os.access(instance_store.directory, os.W_OK)
+    checks['history'] = history_writer is None or history_writer.is_alive()
+    limit = app.config.get('WORKER_MAX_MEMORY_GROWTH_MB')
+    memory = private_mb()
+    # A worker past its memory limit is about to be recycled; send traffic elsewhere
+    checks['memory'] = not limit or memory - worker_baseline_mb <= limit
+    ready = all(checks.values())
+    return jsonify({
+        'ready': ready,
+        'checks': checks,
+        'pid': os.getpid(),
+        'preloaded_datasets': preloaded['datasets'],
+        'failed_datasets': preloaded['failed'],
+        'private_mb': memory,
+    }), 200 if ready else 503
+
 @app.route('/test')
 def test_page():
     return '''
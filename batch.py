@@ -0,0 +1,284 @@
+"""Batch solving of many small inline instances.
+
+Instances are grouped by ``(problem_type, algorithm)``, split into chunks and
+solved in a process pool so one request replaces thousands of HTTP round
+trips.  Each chunk reuses one problem object and skips per-call file I/O and
+step tracing.  Knapsack ``dp`` chunks are solved as one stacked DP: every
+instance is a row of a ``(batch, capacity)`` table updated item by item with
+NumPy, so the Python loop runs over items instead of items x capacity x
+instances.  Results are yielded as chunks complete, in completion order.
+
+Inline instances are held to the same size limits as uploads.  Multi-start
+metaheuristics are refused: they run their restarts on the same pool, and a
+pool worker must not start another pool.
+"""
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from loaders import validate_knapsack
+import process_pool
+from metrics import REGISTRY
+from optimizer import METAHEURISTICS
+
+DEFAULT_CHUNK_SIZE = 64
+# Stacked knapsack DP keeps one keep-bit per (item, instance, capacity) for backtracking
+STACK_MAX_CELLS = 16 * 1024 * 1024
+# Inline fields bounded by the upload limits (see uploads.DEFAULT_LIMITS)
+INLINE_LIMITS = {
+    'tsp': [('coordinates', 'MAX_TSP_DIMENSION', 'cities')],
+    'knapsack': [('weights', 'MAX_KNAPSACK_ITEMS', 'items')],
+    'matching': [('edges', 'MAX_MATCHING_EDGES', 'edges')],
+}
+
+
+def limit_error(problem_type: str, data: dict, params: dict, limits: dict = None):
+    """Why an inline instance is over the upload ``limits``, or None."""
+    if not limits:
+        return None
+    for field, key, what in INLINE_LIMITS.get(problem_type, ()):
+        value = data.get(field)
+        if isinstance(value, list) and key in limits and len(value) > limits[key]:
+            return f"{len(value)} {what} exceed the limit of {limits[key]}"
+    if problem_type == 'knapsack' and 'MAX_KNAPSACK_CAPACITY' in limits:
+        capacity = params.get('capacity', data.get('capacity'))
+        if isinstance(capacity, (int, float)) and capacity > limits['MAX_KNAPSACK_CAPACITY']:
+            return f"Capacity {capacity} exceeds the limit of {limits['MAX_KNAPSACK_CAPACITY']}"
+    return None
+
+
+def group_instances(instances, problem_type: str = None, algorithm: str = None,
+                    limits: dict = None):
+    """Split request instances into ``{(problem, algorithm): [(index, id, data, params)]}``.
+
+    Each instance is ``{"data": {...}}`` plus optional ``id``, ``problem_type``,
+    ``algorithm`` and ``params``; the last three default to the batch-level
+    values.  Instances over ``limits`` are not grouped.  Returns
+    ``(groups, errors)`` where errors are ready-made results.
+    """
+    groups, errors = {}, []
+    for index, instance in enumerate(instances):
+        if not isinstance(instance, dict) or not isinstance(instance.get('data'), dict):
+            errors.append(_error(index, None, problem_type, algorithm,
+                                 "instance must be an object with a 'data' object"))
+            continue
+        key = (instance.get('problem_type', problem_type), instance.get('algorithm', algorithm))
+        if None in key:
+            errors.append(_error(index, instance.get('id'), *key,
+                                 "problem_type and algorithm are required"))
+            continue
+        params = instance.get('params') or {}
+        message = limit_error(key[0], instance['data'], params, limits)
+        if message:
+            errors.append(_error(index, instance.get('id'), *key, message))
+            continue
+        groups.setdefault(key, []).append((index, instance.get('id'), instance['data'], params))
+    return groups, errors
+
+
+def _error(index, instance_id, problem_type, algorithm, message):
+    return {'index': index, 'id': instance_id, 'problem_type': problem_type,
+            'algorithm': algorithm, 'success': False, 'error': message}
+
+
+def _result(index, instance_id, problem_type, algorithm, solution, seconds, counters):
+    return {'index': index, 'id': instance_id, 'problem_type': problem_type,
+            'algorithm': algorithm, 'success': True, 'solution': solution,
+            'execution_time': seconds, 'counters': counters}
+
+
+def stacked_knapsack_dp(instances):
+    """Exact 0/1 knapsack for several ``(weights, values, capacity)`` instances at once.
+
+    Shorter instances are padded with zero-weight, zero-value items, which
+    never change a row.  Returns one solution dict per instance, matching
+    ``KnapsackProblem.dynamic_programming_solution``.
+    """
+    count = len(instances)
+    n = max(len(w) for w, _, _ in instances)
+    top = max(c for _, _, c in instances)
+    floats = any(v.dtype.kind == 'f' for _, v, _ in instances)
+    weights = np.zeros((n, count), dtype=np.int64)
+    values = np.zeros((n, count), dtype=np.float64 if floats else np.int64)
+    for b, (w, v, _) in enumerate(instances):
+        weights[:len(w), b] = w
+        values[:len(v), b] = v
+
+    dp = np.zeros((count, top + 1), dtype=values.dtype)
+    keep = np.zeros((n, count, top + 1), dtype=bool)
+    columns = np.arange(top + 1)
+    rows = np.arange(count)[:, None]
+    for i in range(n):
+        source = columns - weights[i][:, None]
+        candidate = dp[rows, np.maximum(source, 0)] + values[i][:, None]
+        take = (source >= 0) & (candidate > dp)
+        keep[i] = take
+        dp = np.where(take, candidate, dp)
+
+    solutions = []
+    for b, (w, v, capacity) in enumerate(instances):
+        selected = []
+        c = capacity
+        for i in range(len(w) - 1, -1, -1):
+            if keep[i, b, c]:
+                selected.append(i)
+                c -= int(w[i])
+        selected.reverse()
+        solutions.append({
+            'selected_items': selected,
+            'total_value': dp[b, capacity].item(),
+            'total_weight': int(w[selected].sum()) if selected else 0,
+            'optimal': True
+        })
+    return solutions
+
+
+def _solve_knapsack_stack(items, problem_class):
+    """Validate a knapsack dp chunk and solve it in stacks of at most ``STACK_MAX_CELLS``."""
+    results, stack = [], []
+
+    def flush():
+        if not stack:
+            return
+        start = time.perf_counter()
+        solutions = stacked_knapsack_dp([instance for _, _, instance in stack])
+        share = (time.perf_counter() - start) / len(stack)
+        for (index, instance_id, (w, _, capacity)), solution in zip(stack, solutions):
+            results.append(_result(index, instance_id, 'knapsack', 'dp', solution, share,
+                                   {'dp_cells': len(w) * (capacity + 1)}))
+        stack.clear()
+
+    for index, instance_id, data, params in items:
+        try:
+            capacity = params.get('capacity', data.get('capacity'))
+            if capacity is None:
+                raise ValueError("inline knapsack: no capacity given")
+            instance = validate_knapsack(data['weights'], data['values'], capacity)
+        except Exception as e:
+            results.append(_error(index, instance_id, 'knapsack', 'dp', str(e)))
+            continue
+        size = len(instance[0]) * (instance[2] + 1)
+        if size > STACK_MAX_CELLS:
+            results.extend(_solve_each([(index, instance_id, data, params)], problem_class,
+                                       'knapsack', 'dp'))
+            continue
+        n = max([len(instance[0])] + [len(w) for _, _, (w, _, _) in stack])
+        top = max([instance[2]] + [c for _, _, (_, _, c) in stack])
+        if stack and n * (len(stack) + 1) * (top + 1) > STACK_MAX_CELLS:
+            flush()
+        stack.append((index, instance_id, instance))
+    flush()
+    return results
+
+
+def _capacity_key(data, params):
+    capacity = params.get('capacity', data.get('capacity'))
+    return capacity if isinstance(capacity, (int, float)) else 0
+
+
+def _solve_each(items, problem_class, problem_type, algorithm):
+    problem = problem_class()
+    problem.trace_options = False
+    results = []
+    for index, instance_id, data, params in items:
+        problem.counters = {}
+        problem.params = params
+        try:
+            problem.load_inline(data)
+            problem.preprocess()
+            start = time.perf_counter()
+            solution = problem.run(algorithm)
+            seconds = time.perf_counter() - start
+        except Exception as e:
+            results.append(_error(index, instance_id, problem_type, algorithm,
+                                  str(e) or type(e).__name__))
+            continue
+        results.append(_result(index, instance_id, problem_type, algorithm, solution, seconds,
+                               problem.counters))
+    return results
+
+
+def solve_chunk(problem_class, problem_type: str, algorithm: str, items):
+    """Solve one chunk of ``(index, id, data, params)`` items; runs inside pool workers."""
+    if problem_type == 'knapsack' and algorithm == 'dp':
+        return _solve_knapsack_stack(items, problem_class)
+    return _solve_each(items, problem_class, problem_type, algorithm)
+
+
+class BatchRunner:
+    """Runs batch requests on the shared process pool (see process_pool.py).
+
+    ``workers`` <= 1 solves everything in the calling process; batches that
+    fit in a single chunk are solved in-process too, since shipping them to
+    a worker costs more than solving them.
+    """
+
+    def __init__(self, workers: int = None, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.workers = (os.cpu_count() or 1) if workers is None else workers
+        self.chunk_size = max(1, chunk_size)
+
+    def pool(self) -> ProcessPoolExecutor:
+        return process_pool.get_pool(self.workers)
+
+    def close(self):
+        process_pool.shutdown()
+
+    def run(self, problem_classes: dict, instances, problem_type: str = None,
+            algorithm: str = None, chunk_size: int = None, limits: dict = None):
+        """Yield one result dict per instance as its chunk completes.
+
+        ``problem_classes`` maps problem types to Problem classes; instances
+        of other types, over ``limits`` or asking for a metaheuristic are
+        reported as errors.
+        """
+        size = max(1, chunk_size or self.chunk_size)
+        groups, errors = group_instances(instances, problem_type, algorithm, limits)
+        yield from errors
+
+        chunks = []
+        for (group_problem, group_algorithm), items in groups.items():
+            if group_problem not in problem_classes:
+                message = f"Unknown problem type: {group_problem}"
+            elif group_algorithm in METAHEURISTICS:
+                message = f"{group_algorithm} is not available in batches; use /api/solve"
+            else:
+                message = None
+            if message:
+                for index, instance_id, _, _ in items:
+                    yield _error(index, instance_id, group_problem, group_algorithm, message)
+                continue
+            if group_problem == 'knapsack' and group_algorithm == 'dp':
+                # Similar capacities share a stack, so less of the DP table is padding
+                items = sorted(items, key=lambda item: _capacity_key(item[2], item[3]))
+            for start in range(0, len(items), size):
+                chunks.append((problem_classes[group_problem], group_problem, group_algorithm,
+                               items[start:start + size]))
+
+        if self.workers <= 1 or len(chunks) <= 1:
+            for chunk in chunks:
+                yield from self._observe(solve_chunk(*chunk))
+            return
+
+        futures = {self.pool().submit(solve_chunk, *chunk): chunk for chunk in chunks}
+        for future in as_completed(futures):
+            _, chunk_problem, chunk_algorithm, items = futures[future]
+            try:
+                results = future.result()
+            except Exception as e:
+                # A worker died (e.g. killed for memory); fail just this chunk
+                results = [_error(index, instance_id, chunk_problem, chunk_algorithm,
+                                  f"worker failed: {e!r}")
+                           for index, instance_id, _, _ in items]
+            yield from self._observe(results)
+
+    @staticmethod
+    def _observe(results):
+        for result in results:
+            if result['success']:
+                REGISTRY.observe_run(result['problem_type'], result['algorithm'],
+                                     {'solve': result['execution_time']}, result['counters'])
+            else:
+                REGISTRY.observe_run(result['problem_type'], result['algorithm'], status='error')
+            yield result
@@ -0,0 +1,333 @@
+#!/usr/bin/env python3
+"""
+Offline benchmark runner for every problem x algorithm pair.
+
+Runs ``OptimizationFramework.solve`` directly (no server) over the bundled
+datasets and generated instances of increasing size, with warmup and repeats,
+and records wall time, solver time, peak traced memory and solution quality
+against the exact optimum where one can be computed.
+
+    python benchmark.py --output bench.json
+    python benchmark.py --baseline bench_baseline.json      # exit 1 on regression
+    python benchmark.py --problems tsp --sizes 6 8 10 12 --save-baseline bench_baseline.json
+    python benchmark.py --problems knapsack --knapsack-families uncorrelated strongly_correlated
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+import generators
+from optimizer import OptimizationFramework
+
+ALGORITHMS = ['greedy', 'dp', 'backtracking', 'branchbound', 'divideconquer',
+              'grouped', 'subsetsum', 'annealing', 'genetic']
+
+# Solvers only some problems have; every other pair is skipped
+SPECIFIC_ALGORITHMS = {
+    'grouped': ('knapsack',),
+    'subsetsum': ('knapsack',),
+    'annealing': ('tsp',),
+    'genetic': ('tsp', 'knapsack'),
+}
+
+# Metaheuristics run to their time limit; short single-worker runs keep the sweep reproducible
+ALGORITHM_PARAMS = {
+    'annealing': {'time_limit': 1.0, 'restarts': 2, 'workers': 1, 'seed': 0},
+    'genetic': {'time_limit': 1.0, 'restarts': 2, 'workers': 1, 'seed': 0},
+}
+
+# These optimise something other than the value, so no quality ratio is recorded
+UNRANKED = {('knapsack', 'grouped'), ('knapsack', 'subsetsum')}
+
+# Generated knapsack items are dealt round-robin into this many categories for 'grouped'
+KNAPSACK_CATEGORIES = 4
+
+# Bundled datasets the loaders understand, with known optima where published
+DATASETS = {
+    'tsp': [
+        ('data/tsp/berlin52.tsp', 7542.0),
+        ('sample_datasets/tsp_cities.tsp', None),
+        ('sample_datasets/large_tsp.tsp', None),
+    ],
+    'knapsack': [
+        ('data/knapsack/sample1.csv', None),
+    ],
+    'matching': [],
+}
+
+DEFAULT_SIZES = {
+    'tsp': [5, 8, 10, 12, 16, 24],
+    'knapsack': [10, 20, 25, 30, 100],
+    'matching': [10, 20, 50, 200],
+}
+
+DEFAULT_FAMILIES = {'tsp': 'uniform', 'knapsack': 'weakly_correlated', 'matching': 'random'}
+
+# Largest generated size for which the exact optimum is computed as reference
+EXACT_REFERENCE_LIMIT = {'tsp': 12, 'knapsack': 100000, 'matching': 100000}
+
+MAXIMIZE = {'tsp': False, 'knapsack': True, 'matching': True}
+
+
+def write_instance(problem_type, n, seed, directory, family=None):
+    """Write a generated instance of size ``n`` in the loader's format; returns the path."""
+    family = family or DEFAULT_FAMILIES[problem_type]
+    options = {'value_range': 100} if problem_type == 'knapsack' else {}
+    path = generators.generate_file(problem_type, family, n, seed, directory, **options)
+    if problem_type == 'knapsack':
+        add_categories(path, KNAPSACK_CATEGORIES)
+    return path
+
+
+def add_categories(path, count):
+    """Append a ``category`` column to a knapsack CSV, dealing items round-robin."""
+    with open(path) as f:
+        header, *rows = f.read().splitlines()
+    with open(path, 'w') as f:
+        f.write(f'{header},category\n')
+        f.writelines(f'{row},c{i % count}\n' for i, row in enumerate(rows))
+
+
+def objective(problem_type, solution):
+    if problem_type == 'tsp':
+        return solution.get('distance')
+    if problem_type == 'knapsack':
+        return solution.get('total_value')
+    return solution.get('matching_size')
+
+
+def exact_optimum(framework, problem_type, path):
+    # 'dp' is exact for knapsack and matching, and Held-Karp for small TSP
+    try:
+        result = framework.solve(problem_type, 'dp', path, trace=False)
+    except Exception as e:
+        print(f"⚠️ No reference optimum for {path}: {e!r}")
+        return None
+    if not result['solution'].get('optimal'):
+        return None
+    return float(objective(problem_type, result['solution']))
+
+
+def quality(problem_type, value, optimum):
+    """Ratio to the optimum, >= 1.0 for both minimisation and maximisation."""
+    if value is None or not optimum:
+        return None
+    return float(value) / optimum if not MAXIMIZE[problem_type] else optimum / max(float(value), 1e-12)
+
+
+def measure(framework, problem_type, algorithm, path, repeats, warmup):
+    params = ALGORITHM_PARAMS.get(algorithm)
+    for _ in range(warmup):
+        framework.solve(problem_type, algorithm, path, trace=False, params=params)
+
+    wall, solver = [], []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = framework.solve(problem_type, algorithm, path, trace=False, params=params)
+        wall.append(time.perf_counter() - start)
+        solver.append(result['execution_time'])
+
+    # Peak memory is measured in a separate run so tracing overhead stays out of the timings
+    tracemalloc.start()
+    framework.solve(problem_type, algorithm, path, trace=False, params=params)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    solution = result['solution']
+    return {
+        'wall_median': statistics.median(wall),
+        'wall_min': min(wall),
+        'solver_median': statistics.median(solver),
+        'peak_memory_bytes': peak,
+        'objective': None if objective(problem_type, solution) is None
+                     else float(objective(problem_type, solution)),
+        'optimal_flag': bool(solution.get('optimal')),
+        'note': solution.get('note'),
+        'features': framework.problems[problem_type].features(),
+    }
+
+
+def _measure_child(conn, *args):
+    try:
+        conn.send(('ok', measure(*args)))
+    except Exception as e:
+        conn.send(('error', repr(e)))
+    finally:
+        conn.close()
+
+
+def measure_with_timeout(framework, problem_type, algorithm, path, repeats, warmup, timeout):
+    """Run ``measure`` in a child process so a runaway search can be killed."""
+    ctx = multiprocessing.get_context('fork' if 'fork' in multiprocessing.get_all_start_methods()
+                                      else 'spawn')
+    parent, child = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_measure_child,
+                          args=(child, framework, problem_type, algorithm, path, repeats, warmup))
+    process.start()
+    child.close()
+    status, payload = 'timeout', None
+    if parent.poll(timeout):
+        status, payload = parent.recv()
+    process.join(0 if status == 'timeout' else None)
+    if process.is_alive():
+        process.kill()
+        process.join()
+    if status == 'ok':
+        payload['status'] = 'ok'
+        return payload
+    return {'status': status, 'error': payload, 'wall_median': None, 'wall_min': None,
+            'solver_median': None, 'peak_memory_bytes': None, 'objective': None,
+            'optimal_flag': None, 'note': None, 'features': None}
+
+
+def instances(problem_type, sizes, seed, directory, families=None):
+    for path, optimum in DATASETS[problem_type]:
+        if os.path.exists(path):
+            yield os.path.basename(path), path, None, optimum
+    for family in families or [DEFAULT_FAMILIES[problem_type]]:
+        for n in sizes:
+            yield f'{family}_{n}', write_instance(problem_type, n, seed, directory, family), n, None
+
+
+def run(problems, algorithms, sizes, repeats, warmup, seed, max_seconds, timeout, families=None):
+    framework = OptimizationFramework()
+    records = []
+    with tempfile.TemporaryDirectory() as directory:
+        for problem_type in problems:
+            skipped = set()
+            for name, path, n, optimum in instances(problem_type, sizes.get(problem_type, []),
+                                                    seed, directory,
+                                                    (families or {}).get(problem_type)):
+                if optimum is None and (n is None or n <= EXACT_REFERENCE_LIMIT[problem_type]):
+                    optimum = exact_optimum(framework, problem_type, path)
+                for algorithm in algorithms:
+                    if problem_type not in SPECIFIC_ALGORITHMS.get(algorithm, [problem_type]):
+                        continue
+                    # Only the generated instances carry a category column
+                    if algorithm == 'grouped' and n is None:
+                        continue
+                    if n is not None and (name.rsplit('_', 1)[0], algorithm) in skipped:
+                        continue
+                    stats = measure_with_timeout(framework, problem_type, algorithm, path,
+                                                 repeats, warmup, timeout)
+                    stats.update({
+                        'problem_type': problem_type,
+                        'algorithm': algorithm,
+                        'instance': name,
+                        'n': n if n is not None else (stats['features'] or {}).get('n'),
+                        'optimum': optimum,
+                        'quality': None if (problem_type, algorithm) in UNRANKED
+                                   else quality(problem_type, stats['objective'], optimum),
+                    })
+                    records.append(stats)
+                    if stats['status'] != 'ok':
+                        print(f"{problem_type:9s} {algorithm:14s} {name:24s} {stats['status'].upper()}")
+                    else:
+                        print(f"{problem_type:9s} {algorithm:14s} {name:24s} "
+                              f"{stats['wall_median'] * 1000:10.2f} ms  "
+                              f"{stats['peak_memory_bytes'] / 1024:9.1f} KiB  "
+                              f"quality={stats['quality'] if stats['quality'] is not None else '-'}")
+                    # Larger generated sizes only get slower; stop sweeping this algorithm
+                    if n is not None and (stats['status'] != 'ok' or stats['wall_median'] > max_seconds):
+                        skipped.add((name.rsplit('_', 1)[0], algorithm))
+    return records
+
+
+def key(record):
+    return f"{record['problem_type']}/{record['algorithm']}/{record['instance']}"
+
+
+def compare(records, baseline, time_tolerance, quality_tolerance):
+    """Return regressions of ``records`` against ``baseline`` results."""
+    previous = {key(r): r for r in baseline['results']}
+    regressions = []
+    for record in records:
+        old = previous.get(key(record))
+        if not old or old.get('status', 'ok') != 'ok':
+            continue
+        if record['status'] != 'ok':
+            regressions.append({'benchmark': key(record), 'metric': 'status',
+                                'baseline': old['wall_median'], 'current': float('inf')})
+            continue
+        if record['wall_median'] > old['wall_median'] * (1 + time_tolerance) \
+                and record['wall_median'] - old['wall_median'] > 1e-3:
+            regressions.append({'benchmark': key(record), 'metric': 'wall_median',
+                                'baseline': old['wall_median'], 'current': record['wall_median']})
+        if record['quality'] is not None and old.get('quality') is not None \
+                and record['quality'] > old['quality'] * (1 + quality_tolerance):
+            regressions.append({'benchmark': key(record), 'metric': 'quality',
+                                'baseline': old['quality'], 'current': record['quality']})
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark every problem x algorithm pair')
+    parser.add_argument('--problems', nargs='+', default=list(DEFAULT_SIZES),
+                        choices=list(DEFAULT_SIZES))
+    parser.add_argument('--algorithms', nargs='+', default=ALGORITHMS)
+    parser.add_argument('--sizes', nargs='+', type=int,
+                        help='generated instance sizes (default: per-problem sweep)')
+    parser.add_argument('--repeats', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    for problem_type, families in generators.FAMILIES.items():
+        parser.add_argument(f'--{problem_type}-families', nargs='+', choices=families,
+                            help=f'generated {problem_type} families '
+                                 f'(default: {DEFAULT_FAMILIES[problem_type]})')
+    parser.add_argument('--max-seconds', type=float, default=5.0,
+                        help='stop sweeping larger sizes once a run takes longer than this')
+    parser.add_argument('--timeout', type=float, default=30.0,
+                        help='kill a single benchmark (all repeats) after this many seconds')
+    parser.add_argument('--output', default='bench_results.json')
+    parser.add_argument('--baseline', help='compare against a saved results file')
+    parser.add_argument('--save-baseline', help='also write the results to this baseline file')
+    parser.add_argument('--time-tolerance', type=float, default=0.25)
+    parser.add_argument('--quality-tolerance', type=float, default=0.0)
+    args = parser.parse_args(argv)
+
+    sizes = {p: args.sizes for p in args.problems} if args.sizes else DEFAULT_SIZES
+    families = {p: getattr(args, f'{p}_families') for p in generators.FAMILIES}
+    records = run(args.problems, args.algorithms, sizes, args.repeats, args.warmup,
+                  args.seed, args.max_seconds, args.timeout, families)
+    report = {
+        'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'repeats': args.repeats,
+        'seed': args.seed,
+        'results': records,
+    }
+
+    status = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(records, json.load(f), args.time_tolerance,
+                                  args.quality_tolerance)
+        report['regressions'] = regressions
+        for r in regressions:
+            print(f"❌ REGRESSION {r['benchmark']} {r['metric']}: "
+                  f"{r['baseline']:.6g} -> {r['current']:.6g}")
+        if regressions:
+            status = 1
+        else:
+            print("✅ No regressions against baseline")
+
+    for path in filter(None, [args.output, args.save_baseline]):
+        with open(path, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"📄 Results written to {path}")
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
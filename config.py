@@ -7,6 +7,57 @@ class Config:
     MYSQL_PASSWORD = os.getenv('MYSQL_PASSWORD', 'root')
     MYSQL_DB = os.getenv('MYSQL_DB', 'optimization_db')
     SECRET_KEY = os.getenv('SECRET_KEY', 'optimization-galaxy-secret-key-2024')
+    # Run history: 'sqlite' (local file), 'mysql' or 'none'
+    HISTORY_BACKEND = os.getenv('HISTORY_BACKEND', 'sqlite')
+    HISTORY_SQLITE_PATH = os.getenv('HISTORY_SQLITE_PATH', 'history.db')
+    HISTORY_POOL_SIZE = int(os.getenv('HISTORY_POOL_SIZE', 4))
+    HISTORY_BATCH_SIZE = int(os.getenv('HISTORY_BATCH_SIZE', 100))
+    HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', 1.0))
+    # Dataset uploads: bodies above UPLOAD_SPOOL_BYTES are spooled to UPLOAD_FOLDER
+    UPLOAD_FOLDER = os.getenv('UPLOAD_FOLDER', 'uploads')
+    MAX_UPLOAD_BYTES = int(os.getenv('MAX_UPLOAD_BYTES', 256 * 1024 * 1024))
+    UPLOAD_SPOOL_BYTES = int(os.getenv('UPLOAD_SPOOL_BYTES', 4 * 1024 * 1024))
+    MAX_JSON_UPLOAD_BYTES = int(os.getenv('MAX_JSON_UPLOAD_BYTES', 64 * 1024 * 1024))
+    MAX_TSP_DIMENSION = int(os.getenv('MAX_TSP_DIMENSION', 10000))
+    MAX_KNAPSACK_ITEMS = int(os.getenv('MAX_KNAPSACK_ITEMS', 1000000))
+    MAX_KNAPSACK_CAPACITY = int(os.getenv('MAX_KNAPSACK_CAPACITY', 50000000))
+    MAX_MATCHING_EDGES = int(os.getenv('MAX_MATCHING_EDGES', 2000000))
+    # Batch solving: worker processes (0 = solve in the request thread), instances per chunk
+    BATCH_WORKERS = int(os.getenv('BATCH_WORKERS', os.cpu_count() or 1))
+    BATCH_CHUNK_SIZE = int(os.getenv('BATCH_CHUNK_SIZE', 64))
+    MAX_BATCH_INSTANCES = int(os.getenv('MAX_BATCH_INSTANCES', 10000))
+    # 'auto' algorithm and admission control; see costmodel.py
+    COST_MODEL_PATH = os.getenv('COST_MODEL_PATH', 'cost_model.json')
+    AUTO_DEFAULT_BUDGET = float(os.getenv('AUTO_DEFAULT_BUDGET', 1.0))
+    MAX_PREDICTED_SECONDS = float(os.getenv('MAX_PREDICTED_SECONDS', 60))
+    MAX_PREDICTED_MEMORY_MB = float(os.getenv('MAX_PREDICTED_MEMORY_MB', 1024))
+    SOLVER_CAPACITY_SECONDS = float(os.getenv('SOLVER_CAPACITY_SECONDS', 30))
+    ADMISSION_QUEUE_TIMEOUT = float(os.getenv('ADMISSION_QUEUE_TIMEOUT', 10))
+    # Incremental TSP sessions, kept in the memory of the process that created them (0 disables)
+    TSP_SESSIONS_ENABLED = os.getenv('TSP_SESSIONS_ENABLED', '1') != '0'
+    MAX_TSP_SESSIONS = int(os.getenv('MAX_TSP_SESSIONS', 100))
+    TSP_SESSION_TTL = float(os.getenv('TSP_SESSION_TTL', 3600))
+    # Cities per session, and distance-matrix cells (8 bytes each) across all sessions
+    MAX_TSP_SESSION_CITIES = int(os.getenv('MAX_TSP_SESSION_CITIES', 5000))
+    MAX_TSP_SESSION_CELLS = int(os.getenv('MAX_TSP_SESSION_CELLS', 64_000_000))
+    # Level-of-detail drawings: built scenes kept in memory, points per view/tile
+    LOD_CACHE_SCENES = int(os.getenv('LOD_CACHE_SCENES', 32))
+    LOD_MAX_POINTS = int(os.getenv('LOD_MAX_POINTS', 4000))
+    # Problems to build and import up front (comma separated), e.g. 'tsp,knapsack,matching'
+    PRELOAD_PROBLEMS = [p.strip() for p in os.getenv('PRELOAD_PROBLEMS', '').split(',') if p.strip()]
+    # Datasets parsed before the server forks: 'bundled' (data/), 'uploads' or both
+    PRELOAD_DATASETS = [p.strip() for p in os.getenv('PRELOAD_DATASETS', '').split(',') if p.strip()]
+    # Prefork server (serve.py / gunicorn.conf.py).  TSP sessions live in one worker's memory,
+    # so while they are enabled the default is a single worker serving with threads
+    BIND = os.getenv('BIND', '0.0.0.0:5000')
+    WEB_WORKERS = int(os.getenv('WEB_WORKERS', 1 if TSP_SESSIONS_ENABLED else os.cpu_count() or 1))
+    WEB_THREADS = int(os.getenv('WEB_THREADS', 4))
+    # Processes splitting SOLVER_CAPACITY_SECONDS between them; gunicorn.conf.py sets the worker count
+    SERVER_PROCESSES = int(os.getenv('SERVER_PROCESSES', 1))
+    WEB_TIMEOUT = int(os.getenv('WEB_TIMEOUT', 120))
+    # Recycle a worker after this many requests (0 = never) or once its private memory grows this much
+    WORKER_MAX_REQUESTS = int(os.getenv('WORKER_MAX_REQUESTS', 0))
+    WORKER_MAX_MEMORY_GROWTH_MB = float(os.getenv('WORKER_MAX_MEMORY_GROWTH_MB', 512))
 
 # Test if the class is properly defined
 if __name__ == '__main__':
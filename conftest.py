@@ -0,0 +1,10 @@
+"""Keep test runs out of the real run history database and upload folder."""
+import os
+import tempfile
+
+_scratch = tempfile.mkdtemp(prefix='galaxy-test-')
+os.environ.setdefault('HISTORY_SQLITE_PATH', os.path.join(_scratch, 'history.db'))
+os.environ.setdefault('UPLOAD_FOLDER', os.path.join(_scratch, 'uploads'))
+
+# Manual scripts: test_api.py needs a running server, the others only print checks
+collect_ignore = ['test_api.py', 'test_fix.py', 'test_simple.py']
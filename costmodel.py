@@ -0,0 +1,329 @@
+#!/usr/bin/env python3
+"""
+Runtime/memory cost model behind the ``auto`` algorithm, plus admission control.
+
+Each problem x algorithm pair has a complexity term over the instance
+features (``n``, ``capacity``, ``edges``, ...), e.g. ``n^2 2^n`` for
+Held-Karp or ``n * capacity`` for the knapsack DP.  Predicted seconds are
+``base + per_unit * term``; ``base`` and ``per_unit`` are fitted to benchmark
+results by least squares on relative error, so the model extrapolates the
+way the algorithm scales.  Memory is modelled the same way from the traced
+peak.
+
+``choose`` picks the strongest algorithm that fits a latency budget: the
+cheapest exact algorithm that accepts the instance size, otherwise the
+heuristic with the best benchmarked quality, otherwise the cheapest one.
+``AdmissionController`` rejects runs predicted above the server limits and
+queues the rest while too much predicted work is in flight.
+
+    python benchmark.py --output bench_results.json
+    python costmodel.py fit bench_results.json -o cost_model.json
+    python costmodel.py predict knapsack n=200 capacity=5000 --budget 0.5
+"""
+import argparse
+import json
+import math
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+import numpy as np
+
+# Complexity terms: (runtime term, memory term) as functions of the features
+TERMS = {
+    ('tsp', 'greedy'): (lambda f: f['n'] ** 2, lambda f: f['n'] ** 2),
+    ('tsp', 'divideconquer'): (lambda f: f['n'] ** 2, lambda f: f['n'] ** 2),
+    ('tsp', 'dp'): (lambda f: f['n'] ** 2 * 2.0 ** f['n'], lambda f: f['n'] * 2.0 ** f['n']),
+    ('tsp', 'backtracking'): (lambda f: math.gamma(max(f['n'], 1)), lambda f: f['n'] ** 2),
+    ('tsp', 'branchbound'): (lambda f: f['n'] * math.gamma(max(f['n'], 1)), lambda f: f['n'] ** 2),
+    ('knapsack', 'greedy'): (lambda f: f['n'] * math.log2(f['n'] + 2), lambda f: f['n']),
+    ('knapsack', 'dp'): (lambda f: f['n'] * (f['capacity'] + 1),
+                         lambda f: f['n'] * (f['capacity'] + 1)),
+    ('knapsack', 'backtracking'): (lambda f: 2.0 ** f['n'], lambda f: f['n']),
+    ('knapsack', 'branchbound'): (lambda f: 2.0 ** f['n'], lambda f: f['n']),
+    ('knapsack', 'divideconquer'): (lambda f: f['n'] * (f['capacity'] + 1),
+                                    lambda f: f['n'] * (f['capacity'] + 1)),
+    ('knapsack', 'grouped'): (lambda f: f['n'] * (f['capacity'] + 1),
+                              lambda f: f['n'] * (f['capacity'] + 1)),
+    ('knapsack', 'subsetsum'): (lambda f: f['n'] * (f['capacity'] + 1) / 64,
+                                lambda f: (f['capacity'] + 1) * math.sqrt(f['n']) / 8),
+    ('matching', 'greedy'): (lambda f: f['edges'] + f['n'], lambda f: f['edges'] + f['n']),
+    ('matching', 'dp'): (lambda f: (f['edges'] + f['n']) * math.sqrt(f['n'] + 1),
+                         lambda f: f['edges'] + f['n']),
+}
+
+# Candidates for 'auto'; aliases that only redirect to another solver are left out
+EXACT = {'tsp': ['dp', 'branchbound', 'backtracking'], 'knapsack': ['dp', 'backtracking'],
+         'matching': ['dp']}
+HEURISTICS = {'tsp': ['greedy', 'divideconquer'], 'knapsack': ['greedy'], 'matching': ['greedy']}
+
+# Latency budget for 'auto' when the request gives none
+DEFAULT_BUDGET_SECONDS = 1.0
+
+# Fitted on the development machine with benchmark.py defaults; refit per host with `fit`
+DEFAULT_COEFFICIENTS = {
+    'tsp/greedy': {'base': 8.8e-5, 'per_unit': 2.0e-7, 'memory_base': 1.2e4, 'memory_per_unit': 33.0, 'quality': 1.14},
+    'tsp/divideconquer': {'base': 1.6e-4, 'per_unit': 5.7e-7, 'memory_base': 1.2e4, 'memory_per_unit': 33.0, 'quality': 2.1},
+    'tsp/dp': {'base': 5.8e-5, 'per_unit': 9.5e-8, 'memory_base': 5.9e3, 'memory_per_unit': 60.0, 'quality': 1.0},
+    'tsp/backtracking': {'base': 1.1e-4, 'per_unit': 4.2e-7, 'memory_base': 1.5e4, 'memory_per_unit': 5.3, 'quality': 1.0},
+    'tsp/branchbound': {'base': 2.6e-4, 'per_unit': 3.6e-8, 'memory_base': 0.0, 'memory_per_unit': 4.6e3, 'quality': 1.0},
+    'knapsack/greedy': {'base': 2.2e-4, 'per_unit': 1.7e-7, 'memory_base': 3.5e4, 'memory_per_unit': 28.0, 'quality': 1.03},
+    'knapsack/dp': {'base': 2.0e-4, 'per_unit': 2.4e-7, 'memory_base': 2.3e4, 'memory_per_unit': 17.0, 'quality': 1.0},
+    'knapsack/backtracking': {'base': 2.6e-4, 'per_unit': 4.7e-11, 'memory_base': 3.6e4, 'memory_per_unit': 0.0, 'quality': 1.0},
+    'knapsack/branchbound': {'base': 2.6e-4, 'per_unit': 4.7e-11, 'memory_base': 3.6e4, 'memory_per_unit': 0.0, 'quality': 1.0},
+    'knapsack/divideconquer': {'base': 2.1e-4, 'per_unit': 1.8e-7, 'memory_base': 2.8e4, 'memory_per_unit': 12.0, 'quality': 1.0},
+    # Uncalibrated estimates scaled from knapsack/dp until refit from a benchmark run
+    'knapsack/grouped': {'base': 2.0e-4, 'per_unit': 3.0e-9, 'memory_base': 2.3e4, 'memory_per_unit': 3.0, 'quality': 1.0},
+    'knapsack/subsetsum': {'base': 2.0e-4, 'per_unit': 2.2e-8, 'memory_base': 2.3e4, 'memory_per_unit': 2.0, 'quality': 1.0},
+    'matching/greedy': {'base': 1.8e-5, 'per_unit': 1.5e-6, 'memory_base': 0.0, 'memory_per_unit': 340.0, 'quality': 1.16},
+    'matching/dp': {'base': 1.1e-4, 'per_unit': 5.7e-8, 'memory_base': 710.0, 'memory_per_unit': 360.0, 'quality': 1.0},
+}
+
+
+class AdmissionError(Exception):
+    """Run refused by admission control; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 503, retry_after: float = None):
+        super().__init__(message)
+        self.status = status
+        self.retry_after = retry_after
+
+
+def _fit_linear(terms, values):
+    """Fit ``value = base + per_unit * term`` minimising relative error; both clamped >= 0."""
+    terms = np.asarray(terms, dtype=np.float64)
+    values = np.maximum(np.asarray(values, dtype=np.float64), 1e-9)
+    if len(values) == 1 or np.ptp(terms) == 0:
+        return 0.0, float(np.median(values / np.maximum(terms, 1e-12)))
+    design = np.column_stack((np.ones_like(terms), terms)) / values[:, None]
+    (base, per_unit), *_ = np.linalg.lstsq(design, np.ones_like(values), rcond=None)
+    if per_unit <= 0:
+        return float(np.median(values)), 0.0
+    if base < 0:
+        return 0.0, float(np.median(values / np.maximum(terms, 1e-12)))
+    return float(base), float(per_unit)
+
+
+class CostModel:
+    def __init__(self, coefficients: dict = None):
+        self.coefficients = dict(DEFAULT_COEFFICIENTS)
+        self.coefficients.update(coefficients or {})
+
+    @classmethod
+    def load(cls, path: str) -> 'CostModel':
+        with open(path) as f:
+            return cls(json.load(f)['coefficients'])
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump({'created_at': time.strftime('%Y-%m-%d %H:%M:%S'),
+                       'coefficients': self.coefficients}, f, indent=2)
+
+    @classmethod
+    def fit(cls, records, exact_limits: dict = None) -> 'CostModel':
+        """Calibrate from ``benchmark.py`` result records (those with features and status ok).
+
+        ``exact_limits`` maps problem types to their ``EXACT_LIMITS``; runs
+        above a limit are skipped, since their timing belongs to the greedy
+        fallback.
+        """
+        exact_limits = exact_limits or {}
+        samples = {}
+        for record in records:
+            pair = (record['problem_type'], record['algorithm'])
+            if record.get('status', 'ok') != 'ok' or not record.get('features') \
+                    or pair not in TERMS:
+                continue
+            limit = exact_limits.get(pair[0], {}).get(pair[1])
+            if limit is not None and record['features']['n'] > limit:
+                continue
+            samples.setdefault(pair, []).append(record)
+
+        coefficients = {}
+        for pair, rows in samples.items():
+            time_term, memory_term = TERMS[pair]
+            base, per_unit = _fit_linear([time_term(r['features']) for r in rows],
+                                         [r['wall_median'] for r in rows])
+            memory_base, memory_per_unit = _fit_linear([memory_term(r['features']) for r in rows],
+                                                       [r['peak_memory_bytes'] for r in rows])
+            qualities = [r['quality'] for r in rows if r.get('quality')]
+            default = DEFAULT_COEFFICIENTS.get('/'.join(pair), {})
+            coefficients['/'.join(pair)] = {
+                'base': base, 'per_unit': per_unit,
+                'memory_base': memory_base, 'memory_per_unit': memory_per_unit,
+                'quality': float(np.mean(qualities)) if qualities else default.get('quality', 1.0),
+                'samples': len(rows),
+            }
+        return cls(coefficients)
+
+    def covers(self, problem_type: str, algorithm: str) -> bool:
+        """True when ``estimate`` can price ``algorithm`` for ``problem_type``."""
+        return (problem_type, algorithm) in TERMS and f'{problem_type}/{algorithm}' in self.coefficients
+
+    def estimate(self, problem_type: str, algorithm: str, features: dict) -> dict:
+        """Predicted ``seconds`` and ``memory_mb`` for running ``algorithm`` on an instance."""
+        key = f'{problem_type}/{algorithm}'
+        if not self.covers(problem_type, algorithm):
+            raise ValueError(f"No cost model for {key}")
+        c = self.coefficients[key]
+        time_term, memory_term = TERMS[(problem_type, algorithm)]
+        try:
+            seconds = c['base'] + c['per_unit'] * time_term(features)
+            memory = c['memory_base'] + c['memory_per_unit'] * memory_term(features)
+        except OverflowError:
+            seconds = memory = math.inf
+        return {'seconds': seconds, 'memory_mb': memory / (1024 * 1024)}
+
+    def choose(self, problem_type: str, features: dict, budget: float = None,
+               memory_limit_mb: float = None, exact_limits: dict = None) -> dict:
+        """Pick an algorithm for ``auto`` and explain the choice.
+
+        ``budget`` defaults to ``DEFAULT_BUDGET_SECONDS``.  ``exact_limits``
+        are the problem's ``EXACT_LIMITS``: exact algorithms whose size limit
+        ``n`` exceeds are not candidates, since they would silently run greedy.
+        """
+        if problem_type not in EXACT:
+            raise ValueError(f"No cost model for problem type: {problem_type}")
+        budget = DEFAULT_BUDGET_SECONDS if budget is None else budget
+        memory_limit_mb = math.inf if memory_limit_mb is None else memory_limit_mb
+        limits = exact_limits or {}
+
+        candidates = []
+        for kind, names in (('exact', EXACT[problem_type]), ('heuristic', HEURISTICS[problem_type])):
+            for algorithm in names:
+                estimate = self.estimate(problem_type, algorithm, features)
+                entry = {'algorithm': algorithm, 'kind': kind,
+                         'predicted_seconds': estimate['seconds'],
+                         'predicted_memory_mb': estimate['memory_mb'],
+                         'quality': self.coefficients[f'{problem_type}/{algorithm}'].get('quality')}
+                if algorithm in limits and features.get('n', 0) > limits[algorithm]:
+                    entry['rejected'] = f"n={features['n']} exceeds its limit of {limits[algorithm]}"
+                elif estimate['seconds'] > budget:
+                    entry['rejected'] = f"predicted {estimate['seconds']:.3g}s exceeds the {budget:g}s budget"
+                elif estimate['memory_mb'] > memory_limit_mb:
+                    entry['rejected'] = (f"predicted {estimate['memory_mb']:.1f} MB exceeds "
+                                         f"the {memory_limit_mb:g} MB limit")
+                candidates.append(entry)
+
+        fitting = [c for c in candidates if 'rejected' not in c]
+        exact = sorted((c for c in fitting if c['kind'] == 'exact'),
+                       key=lambda c: c['predicted_seconds'])
+        heuristics = sorted((c for c in fitting if c['kind'] == 'heuristic'),
+                            key=lambda c: (c['quality'] or math.inf, c['predicted_seconds']))
+        if exact:
+            chosen = exact[0]
+            reason = f"fastest exact algorithm within the budget ({chosen['predicted_seconds']:.3g}s predicted)"
+        elif heuristics:
+            chosen = heuristics[0]
+            reason = (f"no exact algorithm fits; best benchmarked heuristic "
+                      f"(quality {chosen['quality']:.3g}, {chosen['predicted_seconds']:.3g}s predicted)")
+        else:
+            chosen = min((c for c in candidates if c['kind'] == 'heuristic'),
+                         key=lambda c: c['predicted_seconds'])
+            reason = (f"nothing fits the budget; cheapest algorithm "
+                      f"({chosen['predicted_seconds']:.3g}s predicted)")
+        return {
+            'algorithm': chosen['algorithm'],
+            'reason': reason,
+            'predicted_seconds': chosen['predicted_seconds'],
+            'predicted_memory_mb': chosen['predicted_memory_mb'],
+            'budget_seconds': budget,
+            'features': features,
+            'candidates': candidates,
+        }
+
+
+class AdmissionController:
+    """Gate solver runs on predicted cost.
+
+    Runs predicted above ``max_seconds`` or ``max_memory_mb`` are rejected
+    outright (413).  Otherwise a run waits, up to ``queue_timeout`` seconds,
+    until the predicted seconds of runs in flight plus its own fit within
+    ``capacity_seconds``; a run is always admitted when nothing else is in
+    flight.  Waiting too long is a 503 with a ``retry_after`` hint.
+    """
+
+    def __init__(self, max_seconds: float = None, max_memory_mb: float = None,
+                 capacity_seconds: float = None, queue_timeout: float = 0.0):
+        self.max_seconds = max_seconds
+        self.max_memory_mb = max_memory_mb
+        self.capacity_seconds = capacity_seconds
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0.0
+        self.running = 0
+        self._condition = threading.Condition()
+
+    def check(self, seconds: float, memory_mb: float = 0.0):
+        if self.max_seconds is not None and seconds > self.max_seconds:
+            raise AdmissionError(f"Predicted runtime {seconds:.3g}s exceeds the server limit of "
+                                 f"{self.max_seconds:g}s; use a faster algorithm or a smaller instance",
+                                 413)
+        if self.max_memory_mb is not None and memory_mb > self.max_memory_mb:
+            raise AdmissionError(f"Predicted memory {memory_mb:.1f} MB exceeds the server limit of "
+                                 f"{self.max_memory_mb:g} MB", 413)
+
+    @contextmanager
+    def admit(self, seconds: float, memory_mb: float = 0.0):
+        self.check(seconds, memory_mb)
+        cost = min(seconds, self.capacity_seconds or seconds)
+        with self._condition:
+            if self.capacity_seconds is not None:
+                deadline = time.monotonic() + self.queue_timeout
+                while self.running and self.in_flight + cost > self.capacity_seconds:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        raise AdmissionError("Server busy; try again later", 503,
+                                             retry_after=max(1.0, self.in_flight))
+                    self._condition.wait(remaining)
+            self.in_flight += cost
+            self.running += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= cost
+                self.running -= 1
+                self._condition.notify_all()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Fit or query the solver cost model')
+    sub = parser.add_subparsers(dest='command', required=True)
+    fit = sub.add_parser('fit', help='calibrate from benchmark.py result files')
+    fit.add_argument('results', nargs='+')
+    fit.add_argument('-o', '--output', default='cost_model.json')
+    predict = sub.add_parser('predict', help='show the auto choice for given features')
+    predict.add_argument('problem', choices=list(EXACT))
+    predict.add_argument('features', nargs='+', help='key=value, e.g. n=20 capacity=500')
+    predict.add_argument('--model', help='fitted model file (default: built-in coefficients)')
+    predict.add_argument('--budget', type=float)
+    args = parser.parse_args(argv)
+
+    if args.command == 'fit':
+        records = []
+        for path in args.results:
+            with open(path) as f:
+                records.extend(json.load(f)['results'])
+        from optimizer import OptimizationFramework
+        framework = OptimizationFramework()
+        limits = {name: framework.problems[name].EXACT_LIMITS
+                  for name in OptimizationFramework.PROBLEM_FACTORIES}
+        model = CostModel.fit(records, limits)
+        model.save(args.output)
+        print(f"✅ Fitted {sum(1 for c in model.coefficients.values() if 'samples' in c)} "
+              f"problem/algorithm pairs from {len(records)} records -> {args.output}")
+    else:
+        from optimizer import OptimizationFramework
+        model = CostModel.load(args.model) if args.model else CostModel()
+        features = {k: float(v) for k, v in (item.split('=', 1) for item in args.features)}
+        if args.problem == 'matching':
+            features.setdefault('edges', 0.0)
+        limits = OptimizationFramework().problems[args.problem].EXACT_LIMITS
+        print(json.dumps(model.choose(args.problem, features, args.budget, exact_limits=limits),
+                         indent=2, default=str))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
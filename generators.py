@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+Seeded, vectorized synthetic instance generators.
+
+Every family is a pure function of ``(n, seed, options)`` built from NumPy
+array operations, so a million-city or ten-million-edge instance takes
+seconds.  Instances are written in the formats the loaders read: TSPLIB
+``.tsp``, knapsack ``.csv``, matching ``.json``, or the binary ``.gxi``
+format for any of them (much faster to write and to load at large sizes).
+
+Families:
+
+    tsp        uniform, clustered, grid
+    knapsack   uncorrelated, weakly_correlated, strongly_correlated, subset_sum
+               (Pisinger's classic classes)
+    matching   random, powerlaw (bipartite)
+
+    python generators.py tsp clustered 1000000 -o cities.gxi --seed 1
+    python generators.py knapsack strongly_correlated 10000 -o items.csv --range 1000
+    python generators.py matching powerlaw 100000 --edges 10000000 -o graph.gxi
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from instance_format import EXTENSION as BINARY_EXTENSION, write_instance as write_binary
+
+TSP_LAYOUTS = ('uniform', 'clustered', 'grid')
+KNAPSACK_CLASSES = ('uncorrelated', 'weakly_correlated', 'strongly_correlated', 'subset_sum')
+MATCHING_GRAPHS = ('random', 'powerlaw')
+FAMILIES = {'tsp': TSP_LAYOUTS, 'knapsack': KNAPSACK_CLASSES, 'matching': MATCHING_GRAPHS}
+EXTENSIONS = {'tsp': '.tsp', 'knapsack': '.csv', 'matching': '.json'}
+
+
+def tsp_coordinates(n: int, layout: str = 'uniform', seed: int = 0, scale: float = 1000.0,
+                    clusters: int = None, spread: float = 0.05, jitter: float = 0.0) -> np.ndarray:
+    """``(n, 2)`` float64 city coordinates in ``[0, scale]``.
+
+    ``clustered`` draws Gaussian blobs (standard deviation ``spread * scale``)
+    around ``clusters`` uniform centres, default ``sqrt(n) / 2``; ``grid``
+    fills a square lattice row by row, optionally perturbed by ``jitter``
+    grid spacings.
+    """
+    rng = np.random.default_rng(seed)
+    if layout == 'uniform':
+        return rng.uniform(0, scale, size=(n, 2))
+    if layout == 'clustered':
+        k = clusters or max(1, int(np.sqrt(n) / 2))
+        centres = rng.uniform(0, scale, size=(k, 2))
+        coords = centres[rng.integers(0, k, size=n)] + rng.normal(0, spread * scale, size=(n, 2))
+        return np.clip(coords, 0, scale)
+    if layout == 'grid':
+        side = max(1, int(np.ceil(np.sqrt(n))))
+        spacing = scale / max(side - 1, 1)
+        index = np.arange(n)
+        coords = np.column_stack((index % side, index // side)).astype(np.float64) * spacing
+        if jitter:
+            coords += rng.uniform(-jitter, jitter, size=(n, 2)) * spacing
+        return coords
+    raise ValueError(f"Unknown TSP layout: {layout} (choose from {', '.join(TSP_LAYOUTS)})")
+
+
+def knapsack_items(n: int, kind: str = 'uncorrelated', seed: int = 0, value_range: int = 1000,
+                   capacity_ratio: float = 0.5):
+    """Pisinger-style items: ``(weights, values, capacity)`` with int64 arrays.
+
+    Weights are uniform in ``[1, R]``.  Values are uniform in ``[1, R]``
+    (uncorrelated), ``w + U[-R/10, R/10]`` floored at 1 (weakly correlated),
+    ``w + R/10`` (strongly correlated) or ``w`` (subset sum).  The capacity
+    is ``capacity_ratio`` of the total weight.
+    """
+    rng = np.random.default_rng(seed)
+    r = int(value_range)
+    weights = rng.integers(1, r + 1, size=n, dtype=np.int64)
+    if kind == 'uncorrelated':
+        values = rng.integers(1, r + 1, size=n, dtype=np.int64)
+    elif kind == 'weakly_correlated':
+        values = np.maximum(weights + rng.integers(-(r // 10), r // 10 + 1, size=n), 1)
+    elif kind == 'strongly_correlated':
+        values = weights + r // 10
+    elif kind == 'subset_sum':
+        values = weights.copy()
+    else:
+        raise ValueError(f"Unknown knapsack class: {kind} (choose from {', '.join(KNAPSACK_CLASSES)})")
+    capacity = int(weights.sum() * capacity_ratio)
+    return weights, values.astype(np.int64), capacity
+
+
+def matching_edges(n_left: int, kind: str = 'random', seed: int = 0, edges: int = None,
+                   n_right: int = None, exponent: float = 2.5):
+    """Bipartite edges as ``(rows, cols)`` int64 arrays of left/right indices.
+
+    ``edges`` defaults to ``3 * n_left`` draws.  ``random`` picks both ends
+    uniformly; ``powerlaw`` picks them with Zipf-like probabilities
+    ``rank ** (-1 / (exponent - 1))`` so degrees follow a power law with the
+    given exponent.  Duplicate draws are dropped, so the result can have
+    slightly fewer edges than requested; it is sorted by ``(row, col)``.
+    """
+    rng = np.random.default_rng(seed)
+    n_right = n_right or n_left
+    m = 3 * n_left if edges is None else edges
+    if kind == 'random':
+        rows = rng.integers(0, n_left, size=m, dtype=np.int64)
+        cols = rng.integers(0, n_right, size=m, dtype=np.int64)
+    elif kind == 'powerlaw':
+        if exponent <= 1:
+            raise ValueError("Power-law exponent must be greater than 1")
+        rows = _zipf_choice(rng, n_left, m, exponent)
+        cols = _zipf_choice(rng, n_right, m, exponent)
+    else:
+        raise ValueError(f"Unknown matching graph: {kind} (choose from {', '.join(MATCHING_GRAPHS)})")
+    keys = rows * n_right + cols
+    keys.sort()
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))]
+    return keys // n_right, keys % n_right
+
+
+def _zipf_choice(rng, size: int, count: int, exponent: float) -> np.ndarray:
+    """Draw ``count`` indices with ``P(i) ~ (i + 1) ** (-1 / (exponent - 1))``, shuffled labels.
+
+    Uses the closed-form inverse CDF of the continuous power law rather than a
+    search over a cumulative table, which is several times faster at 10M draws.
+    """
+    b = 1.0 / (exponent - 1)
+    u = rng.random(count)
+    if abs(b - 1.0) < 1e-9:
+        x = np.power(float(size + 1), u)
+    else:
+        x = np.power(1.0 + u * ((size + 1) ** (1 - b) - 1.0), 1.0 / (1 - b))
+    draws = np.minimum(x.astype(np.int64) - 1, size - 1)
+    # Hubs get random ids instead of always being the lowest numbers
+    return rng.permutation(size)[draws]
+
+
+def generate(problem_type: str, kind: str, n: int, seed: int = 0, **options):
+    """Generate one instance as ``(arrays, meta)`` in the binary format's layout."""
+    meta = {'n': n, 'generator': {'family': kind, 'seed': seed, **options}}
+    if problem_type == 'tsp':
+        return {'coordinates': tsp_coordinates(n, kind, seed, **options)}, meta
+    if problem_type == 'knapsack':
+        weights, values, capacity = knapsack_items(n, kind, seed, **options)
+        meta['capacity'] = capacity
+        return {'weights': weights, 'values': values}, meta
+    if problem_type == 'matching':
+        n_right = options.get('n_right') or n
+        rows, cols = matching_edges(n, kind, seed, **options)
+        indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=n), out=indptr[1:])
+        meta.update({'n_left': n, 'n_right': n_right})
+        arrays = {'indptr': indptr, 'indices': cols,
+                  'left_ids': np.arange(n, dtype=np.int64),
+                  'right_ids': np.arange(n, n + n_right, dtype=np.int64)}
+        return arrays, meta
+    raise ValueError(f"Unknown problem type: {problem_type}")
+
+
+def _write_tsp(path: str, coords: np.ndarray, name: str):
+    with open(path, 'w') as f:
+        f.write(f"NAME: {name}\nTYPE: TSP\nDIMENSION: {len(coords)}\nEDGE_WEIGHT_TYPE: EUC_2D\n")
+        f.write("NODE_COORD_SECTION\n")
+        ids = np.arange(1, len(coords) + 1)
+        np.savetxt(f, np.column_stack((ids, coords)), fmt=('%d', '%.3f', '%.3f'))
+        f.write("EOF\n")
+
+
+def _write_knapsack(path: str, weights: np.ndarray, values: np.ndarray, capacity: int):
+    with open(path, 'w') as f:
+        f.write("item_id,weight,value,capacity\n")
+        rows = np.column_stack((np.arange(len(weights)), weights, values,
+                                np.full(len(weights), capacity)))
+        np.savetxt(f, rows, fmt='%d', delimiter=',')
+
+
+def _write_matching(path: str, arrays: dict, meta: dict):
+    rows = np.repeat(np.arange(meta['n_left']), np.diff(arrays['indptr']))
+    edges = np.column_stack((arrays['left_ids'][rows], arrays['right_ids'][arrays['indices']]))
+    with open(path, 'w') as f:
+        f.write('{"left_nodes": ')
+        json.dump(arrays['left_ids'].tolist(), f)
+        f.write(', "right_nodes": ')
+        json.dump(arrays['right_ids'].tolist(), f)
+        f.write(', "edges": [')
+        if len(edges):
+            # One savetxt pass instead of json.dump over millions of small lists
+            np.savetxt(f, edges[:-1], fmt='[%d, %d]', newline=', ')
+            f.write('[%d, %d]' % tuple(edges[-1]))
+        f.write(']}\n')
+
+
+def write(path: str, problem_type: str, arrays: dict, meta: dict) -> str:
+    """Write a generated instance; ``.gxi`` paths get the binary format, others the text format."""
+    if path.endswith(BINARY_EXTENSION):
+        write_binary(path, problem_type, arrays, meta)
+    elif problem_type == 'tsp':
+        _write_tsp(path, arrays['coordinates'], f"{meta['generator']['family']}{meta['n']}")
+    elif problem_type == 'knapsack':
+        _write_knapsack(path, arrays['weights'], arrays['values'], meta['capacity'])
+    elif problem_type == 'matching':
+        _write_matching(path, arrays, meta)
+    else:
+        raise ValueError(f"Unknown problem type: {problem_type}")
+    return path
+
+
+def generate_file(problem_type: str, kind: str, n: int, seed: int = 0, directory: str = '.',
+                  binary: bool = False, **options) -> str:
+    """Generate an instance into ``directory`` under a descriptive name; returns the path."""
+    extension = BINARY_EXTENSION if binary else EXTENSIONS[problem_type]
+    path = os.path.join(directory, f'{problem_type}_{kind}_{n}_{seed}{extension}')
+    return write(path, problem_type, *generate(problem_type, kind, n, seed, **options))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Generate synthetic benchmark instances')
+    parser.add_argument('problem', choices=list(FAMILIES))
+    parser.add_argument('family', help='; '.join(f"{p}: {', '.join(f)}" for p, f in FAMILIES.items()))
+    parser.add_argument('n', type=int, help='cities, items or left-side nodes')
+    parser.add_argument('-o', '--output', help='output path (.gxi for binary); '
+                                               'default: descriptive name in the current directory')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--scale', type=float, help='tsp: coordinate range [0, scale]')
+    parser.add_argument('--clusters', type=int, help='tsp clustered: number of clusters')
+    parser.add_argument('--jitter', type=float, help='tsp grid: perturbation in grid spacings')
+    parser.add_argument('--range', type=int, dest='value_range', help='knapsack: R, the weight/value range')
+    parser.add_argument('--capacity-ratio', type=float, help='knapsack: capacity / total weight')
+    parser.add_argument('--edges', type=int, help='matching: edges to draw (default 3n)')
+    parser.add_argument('--right', type=int, dest='n_right', help='matching: right-side nodes (default n)')
+    parser.add_argument('--exponent', type=float, help='matching powerlaw: degree exponent')
+    args = parser.parse_args(argv)
+
+    if args.family not in FAMILIES[args.problem]:
+        parser.error(f"{args.problem} families: {', '.join(FAMILIES[args.problem])}")
+    allowed = {'tsp': ('scale', 'clusters', 'jitter'),
+               'knapsack': ('value_range', 'capacity_ratio'),
+               'matching': ('edges', 'n_right', 'exponent')}[args.problem]
+    options = {k: getattr(args, k) for k in allowed if getattr(args, k) is not None}
+
+    start = time.perf_counter()
+    arrays, meta = generate(args.problem, args.family, args.n, args.seed, **options)
+    generated = time.perf_counter() - start
+    path = args.output or f'{args.problem}_{args.family}_{args.n}_{args.seed}{EXTENSIONS[args.problem]}'
+    write(path, args.problem, arrays, meta)
+    print(f"✅ Wrote {path} ({os.path.getsize(path)} bytes; generated in {generated:.2f}s, "
+          f"total {time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,206 @@
+"""Grouped (multiple-choice) knapsack: 0/1 knapsack with per-category item counts.
+
+Items are grouped by their ``category`` and each group ``g`` must contribute
+between ``min_g`` and ``max_g`` items; ``max_g = min_g = 1`` is the classic
+multiple-choice knapsack.  Filtering plain knapsack results cannot enforce
+these counts, so the DP carries them: groups are processed one at a time over
+a ``(count, capacity)`` table, each item updating every count and capacity
+in one NumPy operation.
+
+Within a group an item is dropped when ``max_g`` other items each weigh no
+more and are worth no less (it can always be swapped for one of them).
+LP-dominated items (below the upper convex hull of a group's
+``(weight, value)`` points) can still be optimal in integer solutions, so
+the exact DP keeps them; they only drop out of the Lagrangian bound, which
+rejects instances that cannot reach a target value before any DP runs.
+"""
+import heapq
+
+import numpy as np
+
+# Largest keep-bit table (items x counts x capacities) the DP may allocate
+MAX_CELLS = 256 * 1024 * 1024
+# Bisection steps for the Lagrange multiplier
+BOUND_ITERATIONS = 60
+
+
+def group_indices(categories):
+    """Category labels -> ``(names, groups)``: sorted unique names and int64 item indices."""
+    names, inverse = np.unique(np.asarray(categories), return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    splits = np.flatnonzero(np.diff(inverse[order])) + 1
+    return names, np.split(order.astype(np.int64), splits)
+
+
+def group_limits(names, maximum=1, minimum=0):
+    """Per-group ``(min, max)`` arrays from an int or a ``{category: count}`` mapping.
+
+    Categories missing from a mapping are unconstrained (max) or optional (min).
+    """
+    def expand(limit, default):
+        if isinstance(limit, dict):
+            unknown = set(limit) - set(str(name) for name in names)
+            if unknown:
+                raise ValueError(f"Unknown categories: {', '.join(sorted(unknown))}")
+            return np.asarray([int(limit.get(str(name), default)) for name in names])
+        return np.full(len(names), int(limit))
+
+    upper = expand(maximum if maximum is not None else np.iinfo(np.int64).max,
+                   np.iinfo(np.int64).max)
+    lower = expand(minimum or 0, 0)
+    if (lower < 0).any() or (upper < lower).any():
+        raise ValueError("Per-category limits need 0 <= min <= max")
+    return lower, upper
+
+
+def undominated(weights, values, group, keep):
+    """Items of ``group`` with fewer than ``keep`` others weighing <= and worth >= them."""
+    # Heavier-or-equal items come after their dominators; ties broken by value, then index
+    order = group[np.lexsort((group, -values[group], weights[group]))]
+    best = []  # min-heap of the ``keep`` largest values seen so far
+    survivors = []
+    for i in order:
+        value = values[i]
+        if len(best) < keep or value > best[0]:
+            survivors.append(i)
+        if len(best) < keep:
+            heapq.heappush(best, value)
+        elif value > best[0]:
+            heapq.heapreplace(best, value)
+    return np.sort(np.asarray(survivors, dtype=np.int64))
+
+
+def lp_frontier(weights, values, group, include_empty=True):
+    """Items of ``group`` on the upper convex hull of its ``(weight, value)`` points.
+
+    These are the only items a multiple-choice LP (and its Lagrangian) ever
+    uses; ``include_empty`` adds the origin, i.e. choosing nothing.
+    """
+    order = group[np.lexsort((-values[group], weights[group]))]
+    hull = [(0, 0.0, -1)] if include_empty else []
+    for i in order:
+        w, v = int(weights[i]), float(values[i])
+        if hull and w == hull[-1][0]:
+            if v <= hull[-1][1]:
+                continue  # same weight, sorted by value: the first one is best
+            hull.pop()  # a weightless item beats the origin
+        elif hull and v <= hull[-1][1]:
+            continue  # heavier but not better
+        while len(hull) >= 2:
+            (w1, v1, _), (w2, v2, _) = hull[-2], hull[-1]
+            # Drop the middle point when it lies on or below the chord
+            if (v2 - v1) * (w - w1) <= (v - v1) * (w2 - w1):
+                hull.pop()
+            else:
+                break
+        hull.append((w, v, i))
+    return np.asarray([i for _, _, i in hull if i >= 0], dtype=np.int64)
+
+
+def lagrangian_bound(weights, values, capacity, groups, lower, upper) -> float:
+    """Upper bound on the grouped optimum from relaxing the capacity constraint.
+
+    For a multiplier ``lam`` each group independently takes its ``min`` best
+    items by ``value - lam * weight`` plus any further positive ones up to
+    ``max``; ``lam * capacity`` plus those sums bounds the optimum from above
+    for every ``lam >= 0``.  The bound is convex in ``lam`` and is minimised
+    by bisection on its subgradient.  Returns ``-inf`` when some group has
+    fewer items than its minimum.
+    """
+    if any(len(g) < lo for g, lo in zip(groups, lower)):
+        return float('-inf')
+    pools = [lp_frontier(weights, values, g) if (lo, hi) == (0, 1) else g
+             for g, lo, hi in zip(groups, lower, upper)]
+    items = np.concatenate(pools) if pools else np.zeros(0, dtype=np.int64)
+    group_of = np.repeat(np.arange(len(pools)), [len(p) for p in pools])
+    w = weights[items].astype(np.float64)
+    v = values[items].astype(np.float64)
+    lo, hi = lower[group_of], np.minimum(upper, np.iinfo(np.int32).max)[group_of]
+
+    def relaxed(lam):
+        reduced = v - lam * w
+        order = np.lexsort((-reduced, group_of))
+        starts = np.searchsorted(group_of[order], group_of[order], side='left')
+        rank = np.arange(len(order)) - starts
+        taken = order[(rank < lo[order]) | ((rank < hi[order]) & (reduced[order] > 0))]
+        return lam * capacity + reduced[taken].sum(), capacity - w[taken].sum()
+
+    low, high = 0.0, float(np.max(v / np.maximum(w, 1e-9))) if len(v) else 0.0
+    best = relaxed(0.0)
+    if best[1] >= 0:
+        return float(best[0])  # the capacity does not bind
+    best = min(best, relaxed(high))
+    for _ in range(BOUND_ITERATIONS):
+        lam = (low + high) / 2
+        bound, slack = relaxed(lam)
+        best = min(best, (bound, slack))
+        if slack < 0:
+            low = lam
+        else:
+            high = lam
+    return float(best[0])
+
+
+def solve(weights, values, capacity, groups, lower, upper, counters=None) -> dict:
+    """Exact grouped knapsack; returns ``selected_items``, ``total_value``, ``total_weight``.
+
+    ``feasible`` is False (and nothing selected) when the minimum counts
+    cannot be met within the capacity.
+    """
+    def count(name, amount):
+        if counters is not None:
+            counters[name] = counters.get(name, 0) + amount
+
+    capacity = int(capacity)
+    floats = values.dtype.kind == 'f'
+    empty = -np.inf if floats else np.iinfo(np.int64).min // 2
+    dtype = np.float64 if floats else np.int64
+    pruned = [undominated(weights, values, g, int(min(hi, len(g)))) if hi > 0 else g[:0]
+              for g, hi in zip(groups, upper)]
+    limits = [int(min(hi, len(g))) for g, hi in zip(pruned, upper)]
+    if any(len(g) < lo for g, lo in zip(pruned, lower)):
+        return {'selected_items': [], 'total_value': 0, 'total_weight': 0, 'feasible': False}
+    cells = sum(len(g) * (k + 1) for g, k in zip(pruned, limits)) * (capacity + 1)
+    if cells > MAX_CELLS:
+        raise ValueError(f"Grouped DP needs {cells} cells (limit {MAX_CELLS}); "
+                         f"lower the capacity or the per-category limits")
+    count('pruned_items', int(sum(len(g) for g in groups) - sum(len(g) for g in pruned)))
+    count('dp_cells', cells)
+
+    dp = np.zeros(capacity + 1, dtype=dtype)  # best value with weight <= c
+    decisions = []
+    for group, k, lo in zip(pruned, limits, lower):
+        table = np.full((k + 1, capacity + 1), empty, dtype=dtype)
+        table[0] = dp
+        keep = np.zeros((len(group), k + 1, capacity + 1), dtype=bool)
+        for t, i in enumerate(group):
+            w, v = int(weights[i]), values[i]
+            if w > capacity:
+                continue
+            # One item at a time: row j takes it on top of row j-1, all capacities at once
+            candidate = table[:-1, :capacity + 1 - w] + v
+            take = candidate > table[1:, w:]
+            keep[t, 1:, w:] = take
+            table[1:, w:] = np.where(take, candidate, table[1:, w:])
+        counts = lo + np.argmax(table[lo:], axis=0)
+        dp = table[counts, np.arange(capacity + 1)]
+        decisions.append((group, keep, counts))
+
+    if not dp[capacity] > empty / 2:  # the minimum counts do not fit
+        return {'selected_items': [], 'total_value': 0, 'total_weight': 0, 'feasible': False}
+    selected = []
+    c = capacity
+    for group, keep, counts in reversed(decisions):
+        j = int(counts[c])
+        for t in range(len(group) - 1, -1, -1):
+            if j and keep[t, j, c]:
+                selected.append(int(group[t]))
+                c -= int(weights[group[t]])
+                j -= 1
+    selected.sort()
+    return {
+        'selected_items': selected,
+        'total_value': dp[capacity].item(),
+        'total_weight': int(weights[selected].sum()) if selected else 0,
+        'feasible': True,
+    }
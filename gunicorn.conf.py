@@ -0,0 +1,65 @@
+"""
+Gunicorn settings for the prefork production server (started by serve.py).
+
+The app is imported once in the master (``preload_app``), which builds the
+solvers (PRELOAD_PROBLEMS) and parses the bundled and uploaded instances
+(PRELOAD_DATASETS) before any worker forks; workers share those arrays
+copy-on-write.  A worker whose private memory grows more than
+WORKER_MAX_MEMORY_GROWTH_MB past its start is retired after its current
+request and replaced by a fresh fork of the master.
+
+Workers share nothing after the fork.  TSP sessions and LOD scenes stay in
+the worker that created them, and ``/metrics`` reports the scraped worker
+only.  So while TSP sessions are enabled the default is one worker serving
+with threads; running several needs sticky routing (or
+TSP_SESSIONS_ENABLED=0).  The admission budget SOLVER_CAPACITY_SECONDS is
+split evenly between the workers.
+
+    gunicorn -c gunicorn.conf.py app:app
+"""
+import gc
+import os
+
+os.environ.setdefault('PRELOAD_PROBLEMS', 'tsp,knapsack,matching')
+os.environ.setdefault('PRELOAD_DATASETS', 'bundled,uploads')
+
+from config import Config
+from metrics import private_mb
+
+bind = Config.BIND
+workers = max(1, Config.WEB_WORKERS)
+threads = max(1, Config.WEB_THREADS)
+worker_class = 'gthread' if threads > 1 else 'sync'
+timeout = Config.WEB_TIMEOUT
+graceful_timeout = 30
+max_requests = Config.WORKER_MAX_REQUESTS
+max_requests_jitter = max_requests // 10
+preload_app = True
+
+# Read by app.py (imported after this file) to split the admission budget
+Config.SERVER_PROCESSES = workers
+
+
+def when_ready(server):
+    # Keep the collector from touching (and so copying) objects the master built
+    gc.freeze()
+    if workers > 1 and Config.TSP_SESSIONS_ENABLED:
+        server.log.warning(f"{workers} workers with TSP sessions enabled: a session lives in "
+                           f"one worker, so clients need sticky routing "
+                           f"(or set TSP_SESSIONS_ENABLED=0)")
+
+
+def post_fork(server, worker):
+    import app
+    app.after_fork()
+
+
+def post_request(worker, req, environ, resp):
+    import app
+    limit = Config.WORKER_MAX_MEMORY_GROWTH_MB
+    if not limit or not worker.alive:
+        return
+    growth = private_mb() - app.worker_baseline_mb
+    if growth > limit:
+        worker.log.info(f"Worker {worker.pid} grew {growth:.0f} MB (limit {limit:.0f} MB); recycling")
+        worker.alive = False
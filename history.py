@@ -0,0 +1,388 @@
+"""Persistent run history.
+
+Runs are handed to a background ``HistoryWriter`` which batches them into the
+``problems`` / ``algorithm_runs`` / ``performance_metrics`` tables created by
+``init_db.py``, so the solve path never waits on the database.  SQLite is the
+local backend and stands in for MySQL; both go through ``ConnectionPool``.
+"""
+import atexit
+import base64
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from serializers import default as json_default
+
+logger = logging.getLogger(__name__)
+
+# (index name, table, columns) - shared with init_db.py for MySQL
+INDEXES = [
+    ('idx_problems_type', 'problems', 'type, dataset_path'),
+    ('idx_runs_algorithm', 'algorithm_runs', 'algorithm_name, created_at'),
+    ('idx_runs_problem', 'algorithm_runs', 'problem_id, created_at'),
+    ('idx_runs_created', 'algorithm_runs', 'created_at'),
+    ('idx_metrics_run', 'performance_metrics', 'run_id'),
+]
+
+SQLITE_TABLES = [
+    """
+    CREATE TABLE IF NOT EXISTS problems (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        name VARCHAR(255) NOT NULL,
+        type VARCHAR(20) NOT NULL CHECK (type IN ('tsp', 'knapsack', 'matching')),
+        dataset_path VARCHAR(500),
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS algorithm_runs (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        problem_id INTEGER REFERENCES problems(id),
+        algorithm_name VARCHAR(100) NOT NULL,
+        parameters TEXT,
+        solution TEXT,
+        objective_value FLOAT,
+        execution_time FLOAT,
+        memory_used FLOAT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS performance_metrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        run_id INTEGER REFERENCES algorithm_runs(id),
+        metric_name VARCHAR(100),
+        metric_value FLOAT
+    )
+    """
+]
+
+
+class ConnectionPool:
+    """Fixed-size pool of DB-API connections for the ``sqlite`` or ``mysql`` backend."""
+
+    def __init__(self, backend: str = 'sqlite', size: int = 4, sqlite_path: str = 'history.db',
+                 mysql_config: dict = None):
+        self.backend = backend
+        self.size = size
+        if backend == 'mysql':
+            from mysql.connector import pooling
+            self._mysql_pool = pooling.MySQLConnectionPool(
+                pool_name='history', pool_size=size, **(mysql_config or {}))
+        elif backend == 'sqlite':
+            self._sqlite_path = sqlite_path
+            self._idle = queue.LifoQueue()
+            for _ in range(size):
+                self._idle.put(self._connect_sqlite())
+        else:
+            raise ValueError(f"Unknown history backend: {backend}")
+
+    def _connect_sqlite(self):
+        conn = sqlite3.connect(self._sqlite_path, check_same_thread=False, timeout=30)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def sql(self, statement: str) -> str:
+        """Statements are written with ``?`` placeholders; MySQL wants ``%s``."""
+        return statement.replace('?', '%s') if self.backend == 'mysql' else statement
+
+    @contextmanager
+    def connection(self):
+        if self.backend == 'mysql':
+            conn = self._mysql_pool.get_connection()
+            try:
+                yield conn
+            finally:
+                conn.close()  # returns it to the pool
+        else:
+            conn = self._idle.get()
+            try:
+                yield conn
+            finally:
+                self._idle.put(conn)
+
+    def create_schema(self):
+        if self.backend != 'sqlite':
+            return  # MySQL schema is managed by init_db.py
+        with self.connection() as conn:
+            for table in SQLITE_TABLES:
+                conn.execute(table)
+            for name, table, columns in INDEXES:
+                conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
+            conn.commit()
+
+
+def objective_value(solution: dict):
+    for key in ('distance', 'total_value', 'matching_size'):
+        if key in solution:
+            return float(solution[key])
+    return None
+
+
+class HistoryWriter:
+    """Background thread that writes queued runs in batches.
+
+    ``record`` never blocks: when the queue is full the run is dropped and
+    counted in ``dropped``.
+    """
+
+    def __init__(self, pool: ConnectionPool, batch_size: int = 100, flush_interval: float = 1.0,
+                 max_queue: int = 10000):
+        self.pool = pool
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.written = 0
+        self._problem_ids = {}
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def record(self, problem_type: str, algorithm: str, dataset_path: str, result: dict,
+               parameters: dict = None):
+        solution = {k: v for k, v in result.get('solution', {}).items() if k != 'trace'}
+        created_at = datetime.fromtimestamp(result.get('timestamp', time.time()), timezone.utc)
+        row = {
+            'problem_type': problem_type,
+            'dataset_path': dataset_path,
+            'algorithm': algorithm,
+            'parameters': parameters,
+            'solution': solution,
+            'objective_value': objective_value(solution),
+            'execution_time': result.get('execution_time'),
+            'memory_used': result.get('memory_used'),
+            'metrics': self._metrics(result),
+            'created_at': created_at.strftime('%Y-%m-%d %H:%M:%S.%f'),
+        }
+        try:
+            self.queue.put_nowait(row)
+        except queue.Full:
+            self.dropped += 1
+
+    @staticmethod
+    def _metrics(result):
+        metrics = dict(result.get('counters') or {})
+        for phase, seconds in (result.get('phases') or {}).items():
+            metrics[f'{phase}_time'] = seconds
+        return metrics
+
+    def _run(self):
+        while not self._stop.is_set() or not self.queue.empty():
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self._write(batch)
+                    self.written += len(batch)
+                except Exception as e:
+                    logger.error(f"History write of {len(batch)} runs failed: {e}")
+                finally:
+                    for _ in batch:
+                        self.queue.task_done()
+
+    def _problem_id(self, cursor, problem_type, dataset_path):
+        key = (problem_type, dataset_path)
+        if key not in self._problem_ids:
+            cursor.execute(self.pool.sql(
+                "SELECT id FROM problems WHERE type = ? AND dataset_path = ? LIMIT 1"), key)
+            row = cursor.fetchone()
+            if row:
+                self._problem_ids[key] = row[0]
+            else:
+                name = os.path.basename(dataset_path or '') or problem_type
+                cursor.execute(self.pool.sql(
+                    "INSERT INTO problems (name, type, dataset_path) VALUES (?, ?, ?)"),
+                    (name, problem_type, dataset_path))
+                self._problem_ids[key] = cursor.lastrowid
+        return self._problem_ids[key]
+
+    def _write(self, batch):
+        insert_run = self.pool.sql(
+            "INSERT INTO algorithm_runs (problem_id, algorithm_name, parameters, solution, "
+            "objective_value, execution_time, memory_used, created_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)")
+        metric_rows = []
+        with self.pool.connection() as conn:
+            cursor = conn.cursor()
+            try:
+                for row in batch:
+                    problem_id = self._problem_id(cursor, row['problem_type'], row['dataset_path'])
+                    cursor.execute(insert_run, (
+                        problem_id, row['algorithm'],
+                        json.dumps(row['parameters'], default=json_default),
+                        json.dumps(row['solution'], default=json_default),
+                        row['objective_value'], row['execution_time'], row['memory_used'],
+                        row['created_at']))
+                    run_id = cursor.lastrowid
+                    metric_rows.extend((run_id, name, float(value))
+                                       for name, value in row['metrics'].items())
+                if metric_rows:
+                    cursor.executemany(self.pool.sql(
+                        "INSERT INTO performance_metrics (run_id, metric_name, metric_value) "
+                        "VALUES (?, ?, ?)"), metric_rows)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                self._problem_ids.clear()
+                raise
+            finally:
+                cursor.close()
+
+    def flush(self, timeout: float = 5.0):
+        """Wait until everything queued so far has been written."""
+        deadline = time.monotonic() + timeout
+        while self.queue.unfinished_tasks and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+    def is_alive(self) -> bool:
+        """False once the writer thread has stopped (or did not survive a fork)."""
+        return self._thread.is_alive()
+
+    def close(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+
+def encode_cursor(run_id: int) -> str:
+    return base64.urlsafe_b64encode(str(run_id).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> int:
+    return int(base64.urlsafe_b64decode(cursor.encode()).decode())
+
+
+class HistoryStore:
+    """Read side of the run history."""
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    @staticmethod
+    def _filters(problem_type=None, algorithm=None, since=None, until=None):
+        clauses, params = [], []
+        if problem_type:
+            clauses.append("p.type = ?")
+            params.append(problem_type)
+        if algorithm:
+            clauses.append("r.algorithm_name = ?")
+            params.append(algorithm)
+        if since:
+            clauses.append("r.created_at >= ?")
+            params.append(since)
+        if until:
+            clauses.append("r.created_at < ?")
+            params.append(until)
+        return clauses, params
+
+    def runs(self, problem_type=None, algorithm=None, since=None, until=None,
+             limit: int = 50, cursor: str = None):
+        """Newest-first page of runs; returns ``(rows, next_cursor)``.
+
+        Paging is keyset-based on the run id, so deep pages cost the same as
+        the first one.
+        """
+        clauses, params = self._filters(problem_type, algorithm, since, until)
+        if cursor:
+            clauses.append("r.id < ?")
+            params.append(decode_cursor(cursor))
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        statement = (
+            "SELECT r.id, r.algorithm_name, p.type, r.objective_value, r.execution_time, "
+            "r.memory_used, r.created_at "
+            "FROM algorithm_runs r JOIN problems p ON p.id = r.problem_id "
+            f"{where} ORDER BY r.id DESC LIMIT ?")
+        params.append(limit + 1)
+
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(self.pool.sql(statement), params)
+            fetched = cur.fetchall()
+            cur.close()
+
+        rows = [{
+            'id': r[0],
+            'algorithm_name': r[1],
+            'problem_type': r[2],
+            'objective_value': r[3],
+            'execution_time': r[4],
+            'memory_used': r[5],
+            'created_at': str(r[6]),
+        } for r in fetched[:limit]]
+        next_cursor = encode_cursor(rows[-1]['id']) if len(fetched) > limit else None
+        return rows, next_cursor
+
+    def stats(self, problem_type=None, algorithm=None, since=None, until=None):
+        """Per problem/algorithm run count, mean and nearest-rank p50/p95 time."""
+        clauses, params = self._filters(problem_type, algorithm, since, until)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        statement = (
+            "WITH ranked AS ("
+            " SELECT p.type AS problem_type, r.algorithm_name, r.execution_time, r.objective_value,"
+            " ROW_NUMBER() OVER (PARTITION BY p.type, r.algorithm_name"
+            " ORDER BY r.execution_time) AS rn,"
+            " COUNT(*) OVER (PARTITION BY p.type, r.algorithm_name) AS cnt"
+            " FROM algorithm_runs r JOIN problems p ON p.id = r.problem_id"
+            f" {where})"
+            " SELECT problem_type, algorithm_name, COUNT(*), AVG(execution_time),"
+            " MIN(CASE WHEN rn >= 0.50 * cnt THEN execution_time END),"
+            " MIN(CASE WHEN rn >= 0.95 * cnt THEN execution_time END),"
+            " MAX(execution_time), AVG(objective_value)"
+            " FROM ranked GROUP BY problem_type, algorithm_name"
+            " ORDER BY problem_type, algorithm_name")
+
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.execute(self.pool.sql(statement), params)
+            fetched = cur.fetchall()
+            cur.close()
+
+        return [{
+            'problem_type': r[0],
+            'algorithm_name': r[1],
+            'runs': r[2],
+            'mean_time': r[3],
+            'p50_time': r[4],
+            'p95_time': r[5],
+            'max_time': r[6],
+            'mean_objective': r[7],
+        } for r in fetched]
+
+
+def create_history(config):
+    """Build ``(writer, store)`` from a config mapping (e.g. ``app.config``), or ``(None, None)`` if disabled."""
+    backend = config.get('HISTORY_BACKEND', 'sqlite')
+    if not backend or backend == 'none':
+        return None, None
+    mysql_config = {
+        'host': config.get('MYSQL_HOST', 'localhost'),
+        'port': config.get('MYSQL_PORT', 3306),
+        'user': config.get('MYSQL_USER', 'root'),
+        'password': config.get('MYSQL_PASSWORD', ''),
+        'database': config.get('MYSQL_DB', 'optimization_db'),
+    }
+    pool = ConnectionPool(backend,
+                          size=config.get('HISTORY_POOL_SIZE', 4),
+                          sqlite_path=config.get('HISTORY_SQLITE_PATH', 'history.db'),
+                          mysql_config=mysql_config)
+    pool.create_schema()
+    writer = HistoryWriter(pool,
+                           batch_size=config.get('HISTORY_BATCH_SIZE', 100),
+                           flush_interval=config.get('HISTORY_FLUSH_INTERVAL', 1.0))
+    return writer, HistoryStore(pool)
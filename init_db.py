@@ -1,5 +1,6 @@
 import mysql.connector
 from config import Config
+from history import INDEXES
 import os
 
 def init_database():
@@ -56,6 +57,14 @@ def init_database():
         for table in tables:
             cursor.execute(table)
         
+        # Indexes for history queries (MySQL has no CREATE INDEX IF NOT EXISTS)
+        for name, table, columns in INDEXES:
+            try:
+                cursor.execute(f"CREATE INDEX {name} ON {table} ({columns})")
+            except mysql.connector.Error as e:
+                if e.errno != 1061:  # ER_DUP_KEYNAME
+                    raise
+        
         # Insert sample problems
         sample_problems = [
             ("Berlin52 TSP", "tsp", "data/tsp/berlin52.tsp"),
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+"""
+Compact binary instance format (``.gxi``) with memory-mapped loading.
+
+Layout::
+
+    magic  b'GALAXYI\\0'  (8 bytes)
+    uint32 format version, uint32 header length  (little endian)
+    header JSON: problem_type, meta and {name: {dtype, shape, offset}} per array
+    arrays, each 64-byte aligned, raw C-order bytes
+
+Arrays are opened with ``np.memmap`` in read-only mode, so loading costs a few
+syscalls and worker processes share the pages through the OS cache.
+
+    python instance_format.py convert data/tsp/berlin52.tsp berlin52.gxi --problem tsp
+    python instance_format.py info berlin52.gxi
+"""
+import argparse
+import json
+import os
+import struct
+import sys
+
+import numpy as np
+
+MAGIC = b'GALAXYI\0'
+VERSION = 1
+EXTENSION = '.gxi'
+ALIGNMENT = 64
+_PREAMBLE = struct.Struct('<8sII')
+
+
+def is_binary_instance(filepath: str) -> bool:
+    return str(filepath).endswith(EXTENSION)
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def write_instance(path: str, problem_type: str, arrays: dict, meta: dict = None):
+    """Write ``arrays`` (name -> ndarray) and JSON-serialisable ``meta`` to ``path``."""
+    arrays = {name: np.ascontiguousarray(a) for name, a in arrays.items()}
+    specs = {name: {'dtype': a.dtype.str, 'shape': list(a.shape)} for name, a in arrays.items()}
+
+    # Offsets depend on the header length, which depends on the offsets; iterate to a fixed point
+    header_len = 0
+    while True:
+        offset = _align(_PREAMBLE.size + header_len)
+        for name, a in arrays.items():
+            specs[name]['offset'] = offset
+            offset = _align(offset + a.nbytes)
+        header = json.dumps({'problem_type': problem_type, 'meta': meta or {},
+                             'arrays': specs}).encode('utf-8')
+        if len(header) <= header_len:
+            break
+        header_len = len(header) + 64  # headroom so the next pass settles
+    header = header.ljust(header_len)
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(_PREAMBLE.pack(MAGIC, VERSION, header_len))
+        f.write(header)
+        for name, a in arrays.items():
+            f.seek(specs[name]['offset'])
+            f.write(a.tobytes())
+    os.replace(tmp, path)
+
+
+def read_header(path: str) -> dict:
+    with open(path, 'rb') as f:
+        magic, version, header_len = _PREAMBLE.unpack(f.read(_PREAMBLE.size))
+        if magic != MAGIC:
+            raise ValueError(f"{path} is not a binary instance file")
+        if version > VERSION:
+            raise ValueError(f"{path} uses format version {version}; this build reads up to {VERSION}")
+        header = json.loads(f.read(header_len))
+    header['version'] = version
+    return header
+
+
+def read_instance(path: str):
+    """Return ``(problem_type, arrays, meta)`` with every array memory-mapped read-only."""
+    header = read_header(path)
+    arrays = {}
+    for name, spec in header['arrays'].items():
+        shape = tuple(spec['shape'])
+        if 0 in shape:
+            arrays[name] = np.empty(shape, dtype=spec['dtype'])
+            continue
+        mm = np.memmap(path, dtype=spec['dtype'], mode='r', offset=spec['offset'], shape=shape)
+        # Plain ndarray view over the same mapping; indexing a memmap subclass is slower
+        arrays[name] = mm.view(np.ndarray)
+    return header['problem_type'], arrays, header['meta']
+
+
+def _node_ids(nodes):
+    """Int64 array for integer ids, otherwise ``None`` (labels go in the header)."""
+    if all(isinstance(n, (int, np.integer)) and not isinstance(n, bool) for n in nodes):
+        return np.asarray(nodes, dtype=np.int64)
+    return None
+
+
+def arrays_from_problem(problem_type: str, problem, include_distances: bool = True):
+    """Extract ``(arrays, meta)`` from a loaded (and preprocessed) problem."""
+    if problem_type == 'tsp':
+        arrays = {'coordinates': np.asarray(problem.coordinates[:problem.n], dtype=np.float64)}
+        if include_distances:
+            arrays['distances'] = np.asarray(problem.distances, dtype=np.float64)
+        return arrays, {'n': problem.n}
+
+    if problem_type == 'knapsack':
+        values = np.asarray(problem.values)
+        value_dtype = np.int64 if np.issubdtype(values.dtype, np.integer) else np.float64
+        arrays = {'weights': np.asarray(problem.weights, dtype=np.int64),
+                  'values': values.astype(value_dtype)}
+        meta = {'n': problem.n, 'capacity': int(problem.capacity)}
+        if getattr(problem, 'item_ids', None) is not None:
+            ids = _node_ids(list(problem.item_ids))
+            if ids is not None:
+                arrays['item_ids'] = ids
+            else:
+                meta['item_labels'] = [str(i) for i in problem.item_ids]
+        if getattr(problem, 'categories', None) is not None:
+            # Category codes index the label table in the header
+            labels, codes = np.unique(np.asarray(problem.categories).astype(str),
+                                      return_inverse=True)
+            arrays['categories'] = codes.astype(np.int32)
+            meta['category_labels'] = labels.tolist()
+        return arrays, meta
+
+    if problem_type == 'matching':
+        left_index = {u: i for i, u in enumerate(problem.left_nodes)}
+        right_index = {v: i for i, v in enumerate(problem.right_nodes)}
+        rows, cols = [], []
+        for u, v in problem.edges:
+            if u not in left_index:
+                u, v = v, u
+            rows.append(left_index[u])
+            cols.append(right_index[v])
+        rows = np.asarray(rows, dtype=np.int64)
+        cols = np.asarray(cols, dtype=np.int64)
+        order = np.lexsort((cols, rows))
+        indptr = np.zeros(len(problem.left_nodes) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(rows, minlength=len(problem.left_nodes)), out=indptr[1:])
+        arrays = {'indptr': indptr, 'indices': cols[order]}
+        meta = {'n_left': len(problem.left_nodes), 'n_right': len(problem.right_nodes)}
+        for side, nodes in (('left', problem.left_nodes), ('right', problem.right_nodes)):
+            ids = _node_ids(nodes)
+            if ids is not None:
+                arrays[f'{side}_ids'] = ids
+            else:
+                meta[f'{side}_labels'] = list(nodes)
+        return arrays, meta
+
+    raise ValueError(f"Unknown problem type: {problem_type}")
+
+
+def convert(source: str, destination: str, problem_type: str, include_distances: bool = True):
+    """Parse a text dataset with the regular loader and write it as a binary instance."""
+    from optimizer import OptimizationFramework
+
+    problem = OptimizationFramework().problems[problem_type]
+    problem.load_data(source)
+    problem.preprocess()
+    arrays, meta = arrays_from_problem(problem_type, problem, include_distances)
+    meta['source'] = os.path.basename(source)
+    write_instance(destination, problem_type, arrays, meta)
+    return destination
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Convert and inspect binary instance files')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    conv = sub.add_parser('convert', help='convert a .tsp/.csv/.json dataset to .gxi')
+    conv.add_argument('source')
+    conv.add_argument('destination')
+    conv.add_argument('--problem', required=True, choices=['tsp', 'knapsack', 'matching'])
+    conv.add_argument('--no-distances', action='store_true',
+                      help='store TSP coordinates only; the matrix is rebuilt on load')
+
+    info = sub.add_parser('info', help='print the header of a .gxi file')
+    info.add_argument('path')
+
+    args = parser.parse_args(argv)
+    if args.command == 'convert':
+        convert(args.source, args.destination, args.problem, not args.no_distances)
+        print(f"✅ Wrote {args.destination} ({os.path.getsize(args.destination)} bytes)")
+    else:
+        print(json.dumps(read_header(args.path), indent=2))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
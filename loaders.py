@@ -0,0 +1,112 @@
+"""Fast dataset readers that parse straight into typed NumPy arrays."""
+import csv
+import warnings
+
+import numpy as np
+
+KNAPSACK_REQUIRED = ('weight', 'value')
+KNAPSACK_OPTIONAL = ('capacity', 'item_id', 'category')
+
+
+class DatasetError(ValueError):
+    """A dataset file is malformed or violates its format's constraints."""
+
+
+def _integral(array: np.ndarray) -> bool:
+    return bool(np.all(np.isfinite(array)) and np.all(array == np.floor(array)))
+
+
+def read_knapsack_csv(filepath: str, capacity: int = None) -> dict:
+    """Read a knapsack CSV into arrays without pandas.
+
+    Columns ``weight`` and ``value`` are required; ``capacity`` (constant
+    across rows), ``item_id`` and ``category`` are optional, other columns
+    (e.g. ``name``) are skipped without being converted.  ``capacity``
+    overrides the column.  Numeric columns go through NumPy's C CSV reader in
+    a single pass, which handles quoted fields.
+
+    Returns a dict with ``weights`` (int64), ``values`` (int64 when every
+    value is integral, else float64), ``capacity`` (int), ``item_ids``
+    (int64 or None) and ``categories`` (str array or None).
+    """
+    with open(filepath, newline='') as f:
+        header = next(csv.reader(f), None)
+    if not header:
+        raise DatasetError(f"{filepath}: empty CSV")
+    columns = [c.strip().lower() for c in header]
+    for name in KNAPSACK_REQUIRED:
+        if name not in columns:
+            raise DatasetError(f"{filepath}: missing required column '{name}' "
+                               f"(found {', '.join(columns)})")
+    if capacity is None and 'capacity' not in columns:
+        raise DatasetError(f"{filepath}: no 'capacity' column and no capacity given")
+
+    numeric = [name for name in ('weight', 'value', 'capacity', 'item_id') if name in columns]
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', UserWarning)  # "input contained no data"
+            table = np.loadtxt(filepath, delimiter=',', skiprows=1, quotechar='"', ndmin=2,
+                               usecols=[columns.index(name) for name in numeric],
+                               dtype=np.float64)
+            categories = None
+            if 'category' in columns:
+                categories = np.loadtxt(filepath, delimiter=',', skiprows=1, quotechar='"',
+                                        ndmin=1, usecols=columns.index('category'), dtype=str)
+    except ValueError as e:
+        raise DatasetError(f"{filepath}: {e}") from None
+
+    if len(table) == 0:
+        raise DatasetError(f"{filepath}: no items")
+    data = {name: table[:, i] for i, name in enumerate(numeric)}
+
+    if capacity is None:
+        capacities = data['capacity']
+        if not np.all(capacities == capacities[0]):
+            raise DatasetError(f"{filepath}: 'capacity' must be the same on every row")
+        capacity = capacities[0]
+    weights, values, capacity = validate_knapsack(data['weight'], data['value'], capacity, filepath)
+
+    item_ids = None
+    if 'item_id' in data:
+        if not _integral(data['item_id']):
+            raise DatasetError(f"{filepath}: item_id must be integral")
+        item_ids = data['item_id'].astype(np.int64)
+
+    return {
+        'weights': weights,
+        'values': values,
+        'capacity': capacity,
+        'item_ids': item_ids,
+        'categories': categories,
+    }
+
+
+def validate_knapsack(weights, values, capacity, source: str = 'inline'):
+    """Check knapsack items and return ``(weights int64, values, capacity int)``.
+
+    Weights must be non-negative integers, values finite (int64 when every
+    value is integral, else float64) and the capacity a non-negative integer.
+    ``source`` prefixes error messages.
+    """
+    try:
+        weights = np.asarray(weights, dtype=np.float64)
+        values = np.asarray(values, dtype=np.float64)
+    except (TypeError, ValueError):
+        raise DatasetError(f"{source}: weights and values must be numbers") from None
+    if weights.ndim != 1 or weights.shape != values.shape:
+        raise DatasetError(f"{source}: weights and values must be flat lists of the same length")
+    if not _integral(weights) or (len(weights) and weights.min() < 0):
+        bad = int(np.flatnonzero(~np.isfinite(weights) | (weights != np.floor(weights)) | (weights < 0))[0])
+        raise DatasetError(f"{source}: weight on data row {bad + 1} must be a non-negative integer")
+    if not np.all(np.isfinite(values)):
+        raise DatasetError(f"{source}: non-finite value")
+    try:
+        integral_capacity = _integral(np.asarray([capacity], dtype=np.float64))
+    except (TypeError, ValueError):
+        integral_capacity = False
+    if not integral_capacity:
+        raise DatasetError(f"{source}: capacity must be an integer")
+    if capacity < 0:
+        raise DatasetError(f"{source}: capacity must be non-negative")
+    return (weights.astype(np.int64), values.astype(np.int64) if _integral(values) else values,
+            int(capacity))
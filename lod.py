@@ -0,0 +1,235 @@
+"""Level-of-detail payloads for drawing large TSP instances and tours.
+
+A ``LODScene`` normalises an instance's coordinates once into the 0-100
+square the canvas code draws in (aspect ratio kept).  ``view`` answers a
+viewport plus a screen size: cities inside it are binned into small pixel
+cells and sent as cluster centroids with counts, and the tour is clipped to
+the viewport and reduced to one point per pixel cell.  Cells grow until the
+payload fits ``max_points``, so response size follows the screen, not the
+instance.  ``tile`` is the same for a ``z/x/y`` slippy-map tile.
+
+``encode`` packs a view into one binary body that the browser maps straight
+onto typed arrays::
+
+    uint32 header length (little endian)
+    header JSON: meta and {name: {dtype, offset, length}} per array
+    arrays, each 8-byte aligned, little endian
+"""
+import json
+import struct
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+WORLD = 100.0          # normalised coordinates span [0, WORLD]
+TILE_SIZE = 256        # tile edge in pixels
+DEFAULT_MAX_POINTS = 4000
+CLUSTER_PX = 4         # starting cluster cell edge in pixels
+SIMPLIFY_PX = 1        # starting tour simplification cell in pixels
+MAX_ZOOM = 24
+_HEADER = struct.Struct('<I')
+
+
+def normalize(coordinates):
+    """Scale points into ``[0, WORLD]`` keeping the aspect ratio.
+
+    Returns ``(float32 points, transform)``; ``original = point / scale + offset``.
+    """
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    if len(coords) == 0:
+        return np.zeros((0, 2), dtype=np.float32), {'offset': [0.0, 0.0], 'scale': 1.0}
+    low = coords.min(axis=0)
+    extent = float((coords.max(axis=0) - low).max())
+    scale = WORLD / extent if extent > 0 else 1.0
+    points = ((coords - low) * scale).astype(np.float32)
+    return points, {'offset': low.tolist(), 'scale': scale}
+
+
+def _cells(pixels, cell):
+    """Integer cell keys for pixel coordinates."""
+    cells = np.floor(pixels / cell).astype(np.int64)
+    return cells[:, 0] * (1 << 32) + cells[:, 1]
+
+
+def cluster_points(pixels, cell):
+    """Bin points into ``cell``-pixel squares; returns ``(centroid pixels, counts, members)``."""
+    if len(pixels) == 0:
+        return np.zeros((0, 2)), np.zeros(0, dtype=np.uint32), np.zeros(0, dtype=np.int64)
+    keys, inverse, counts = np.unique(_cells(pixels, cell), return_inverse=True,
+                                      return_counts=True)
+    centroids = np.stack([np.bincount(inverse, pixels[:, 0], len(keys)),
+                          np.bincount(inverse, pixels[:, 1], len(keys))], axis=1)
+    return centroids / counts[:, None], counts.astype(np.uint32), inverse
+
+
+def simplify_path(pixels, starts, cell):
+    """Drop path points that stay in the previous point's ``cell``-pixel square.
+
+    ``starts`` flags the first point of each polyline; those are always kept.
+    Returns the kept indices.
+    """
+    if len(pixels) == 0:
+        return np.zeros(0, dtype=np.int64)
+    keys = _cells(pixels, cell)
+    keep = starts.copy()
+    keep[1:] |= keys[1:] != keys[:-1]
+    # Keep each polyline's last point so its end is drawn where it leaves the view
+    ends = np.append(starts[1:], True)
+    return np.flatnonzero(keep | ends)
+
+
+class LODScene:
+    """Normalised coordinates and an optional tour, ready to be cut into views."""
+
+    def __init__(self, coordinates, tour=None):
+        self.points, self.transform = normalize(coordinates)
+        self.tour = None
+        if tour is not None and len(tour) > 1:
+            tour = np.asarray(tour, dtype=np.int64)
+            if tour[0] == tour[-1]:
+                tour = tour[:-1]  # stored open; view() closes it
+            self.tour = tour
+
+    def view(self, viewport=(0.0, 0.0, WORLD, WORLD), width: int = 800, height: int = 600,
+             max_points: int = DEFAULT_MAX_POINTS) -> dict:
+        """Cities and tour inside ``viewport`` ``(x0, y0, x1, y1)`` for a ``width`` x ``height`` screen.
+
+        Returns float32 ``points`` (cluster centroids, normalised units),
+        uint32 ``counts``, float32 ``path`` (tour points) and uint32
+        ``path_starts`` (index of each polyline's first point), plus ``meta``.
+        """
+        x0, y0, x1, y1 = (float(v) for v in viewport)
+        if not (x1 > x0 and y1 > y0) or width < 1 or height < 1:
+            raise ValueError("viewport needs x1 > x0, y1 > y0 and a positive screen size")
+        max_points = max(1, int(max_points))
+        size = np.asarray([x1 - x0, y1 - y0])
+        screen = np.asarray([width, height], dtype=np.float64)
+
+        def to_pixels(points):
+            return (points - (x0, y0)) / size * screen
+
+        inside = ((self.points[:, 0] >= x0) & (self.points[:, 0] <= x1)
+                  & (self.points[:, 1] >= y0) & (self.points[:, 1] <= y1))
+        pixels = to_pixels(self.points[inside])
+        cell = CLUSTER_PX
+        centroids, counts, _ = cluster_points(pixels, cell)
+        while len(centroids) > max_points // 2:
+            cell *= 2
+            centroids, counts, _ = cluster_points(pixels, cell)
+        point_cell = cell
+
+        path = np.zeros((0, 2))
+        starts = np.zeros(0, dtype=bool)
+        cell = SIMPLIFY_PX
+        if self.tour is not None:
+            closed = self.points[np.append(self.tour, self.tour[0])]
+            a, b = closed[:-1], closed[1:]
+            visible = ((np.maximum(a[:, 0], b[:, 0]) >= x0) & (np.minimum(a[:, 0], b[:, 0]) <= x1)
+                       & (np.maximum(a[:, 1], b[:, 1]) >= y0) & (np.minimum(a[:, 1], b[:, 1]) <= y1))
+            # Point i is drawn when segment i-1 or i is; a hidden segment i-1 starts a new polyline
+            before = np.append(False, visible)
+            after = np.append(visible, False)
+            kept = np.flatnonzero(before | after)
+            starts = ~before[kept]
+            path = to_pixels(closed[kept])
+            chosen = simplify_path(path, starts, cell)
+            while len(chosen) > max_points - len(centroids) and cell < max(width, height):
+                cell *= 2
+                chosen = simplify_path(path, starts, cell)
+            if len(chosen) > max_points - len(centroids):
+                # Many separate crossings of the view: keep polyline starts and stride the rest
+                budget = max(1, max_points - len(centroids))
+                chosen = np.union1d(chosen[starts[chosen]][:budget],
+                                    chosen[::max(1, len(chosen) // budget)])[:budget]
+            path, starts = path[chosen], starts[chosen]
+
+        def to_world(pixels):
+            return (pixels / screen * size + (x0, y0)).astype(np.float32)
+
+        return {
+            'points': to_world(centroids),
+            'counts': counts,
+            'path': to_world(path),
+            'path_starts': np.flatnonzero(starts).astype(np.uint32),
+            'meta': {
+                'viewport': [x0, y0, x1, y1],
+                'width': int(width),
+                'height': int(height),
+                'cities': int(inside.sum()),
+                'total_cities': len(self.points),
+                'cluster_px': point_cell,
+                'simplify_px': cell,
+                'transform': self.transform,
+            },
+        }
+
+    def tile(self, z: int, x: int, y: int, tile_size: int = TILE_SIZE,
+             max_points: int = DEFAULT_MAX_POINTS) -> dict:
+        """View of slippy-map tile ``z/x/y``: the world split into ``2**z`` x ``2**z`` tiles."""
+        if not 0 <= z <= MAX_ZOOM or not (0 <= x < 2 ** z and 0 <= y < 2 ** z):
+            raise ValueError(f"No tile {z}/{x}/{y}")
+        span = WORLD / 2 ** z
+        result = self.view((x * span, y * span, (x + 1) * span, (y + 1) * span),
+                           tile_size, tile_size, max_points)
+        result['meta']['tile'] = [z, x, y]
+        return result
+
+
+def encode(view: dict) -> bytes:
+    """Pack a view into the binary layout described in the module docstring."""
+    arrays = {name: np.ascontiguousarray(value).astype(value.dtype.newbyteorder('<'))
+              for name, value in view.items() if isinstance(value, np.ndarray)}
+    specs = {name: {'dtype': array.dtype.name, 'length': int(array.size)}
+             for name, array in arrays.items()}
+
+    def aligned(offset):
+        return (offset + 7) // 8 * 8
+
+    # Offsets shift with the header length; grow the reserved header until it fits
+    reserved = 256
+    while True:
+        offset = aligned(_HEADER.size + reserved)
+        for name, array in arrays.items():
+            specs[name]['offset'] = offset
+            offset = aligned(offset + array.nbytes)
+        header = json.dumps({'meta': view.get('meta', {}), 'arrays': specs}).encode('utf-8')
+        if len(header) <= reserved:
+            break
+        reserved = len(header) + 64
+    body = bytearray(offset)
+    body[:_HEADER.size] = _HEADER.pack(reserved)
+    body[_HEADER.size:_HEADER.size + reserved] = header.ljust(reserved)
+    for name, array in arrays.items():
+        start = specs[name]['offset']
+        body[start:start + array.nbytes] = array.tobytes()
+    return bytes(body)
+
+
+def to_json(view: dict) -> dict:
+    """JSON-friendly view: arrays as lists, 2-D points as ``[x, y]`` pairs."""
+    return {name: value.tolist() if isinstance(value, np.ndarray) else value
+            for name, value in view.items()}
+
+
+class SceneCache:
+    """Built scenes by key (e.g. instance and algorithm), least recently used evicted."""
+
+    def __init__(self, max_scenes: int = 32):
+        self.max_scenes = max_scenes
+        self._scenes = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, build):
+        """Scene for ``key``, calling ``build()`` on a miss (outside the lock)."""
+        with self._lock:
+            scene = self._scenes.get(key)
+            if scene is not None:
+                self._scenes.move_to_end(key)
+                return scene
+        scene = build()
+        with self._lock:
+            self._scenes[key] = scene
+            while len(self._scenes) > self.max_scenes:
+                self._scenes.popitem(last=False)
+        return scene
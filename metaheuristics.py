@@ -0,0 +1,327 @@
+"""Multi-start metaheuristics for instances beyond the exact solvers' size limits.
+
+* TSP simulated annealing: random 2-opt moves with O(1) length deltas and a
+  geometric cooling schedule, started from a nearest-neighbour tour.
+* TSP genetic algorithm: tournament selection, order crossover (OX) and a
+  segment reversal (2-opt move) as mutation; each generation is scored in one
+  NumPy gather over the ``(population, n)`` tour array.
+* Knapsack genetic algorithm: bit-string population scored as
+  ``X @ values - penalty * overweight`` with matrix products, best individual
+  repaired and filled greedily.
+
+Independent restarts run in the shared process pool (process_pool.py).  The
+instance arrays (distance matrix, weights, values) are published once per
+call in shared memory and attached by the workers, so a restart ships only
+its seed and settings.
+"""
+import math
+import time
+from concurrent.futures import wait
+from multiprocessing import shared_memory
+
+import numpy as np
+
+import process_pool
+
+# Per-call wall-clock limit when the request gives none; also what admission control charges
+DEFAULT_TIME_LIMIT = 10.0
+# Largest restarts per call, and the largest value a request may give each setting
+MAX_RESTARTS = 64
+SETTING_LIMITS = {'iterations': 50_000_000, 'population': 1000, 'generations': 100_000}
+
+_attached = {}  # worker side: shared block name -> (SharedMemory, ndarray)
+
+
+class SharedArrays:
+    """Copies arrays into named shared memory blocks; ``specs`` lets workers attach them."""
+
+    def __init__(self, arrays: dict):
+        self.blocks = []
+        self.specs = {}
+        try:
+            for name, array in arrays.items():
+                array = np.ascontiguousarray(array)
+                block = shared_memory.SharedMemory(create=True, size=max(1, array.nbytes))
+                self.blocks.append(block)
+                np.ndarray(array.shape, array.dtype, buffer=block.buf)[...] = array
+                self.specs[name] = (block.name, array.dtype.str, array.shape)
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def attach(specs: dict) -> dict:
+    """Worker side: map shared blocks described by ``specs`` (cached per process)."""
+    wanted = {block_name for block_name, _, _ in specs.values()}
+    for block_name in list(_attached):
+        if block_name not in wanted:  # arrays of an earlier call
+            _attached.pop(block_name)[0].close()
+    arrays = {}
+    for name, (block_name, dtype, shape) in specs.items():
+        if block_name not in _attached:
+            # Pool workers share the parent's resource tracker, which unlinks on close()
+            block = shared_memory.SharedMemory(name=block_name)
+            _attached[block_name] = (block, np.ndarray(shape, dtype, buffer=block.buf))
+        arrays[name] = _attached[block_name][1]
+    return arrays
+
+
+def tour_lengths(distances: np.ndarray, tours: np.ndarray) -> np.ndarray:
+    """Closed-tour lengths for a ``(k, n)`` array of tours in one gather."""
+    return distances[tours, np.roll(tours, -1, axis=1)].sum(axis=1)
+
+
+def nearest_neighbor(distances: np.ndarray, start: int = 0) -> np.ndarray:
+    n = len(distances)
+    visited = np.zeros(n, dtype=bool)
+    tour = np.empty(n, dtype=np.int64)
+    tour[0] = start
+    visited[start] = True
+    for k in range(1, n):
+        row = np.where(visited, np.inf, distances[tour[k - 1]])
+        tour[k] = np.argmin(row)
+        visited[tour[k]] = True
+    return tour
+
+
+def two_opt_polish(distances: np.ndarray, tour: np.ndarray, max_passes: int = 20) -> np.ndarray:
+    """First-improvement 2-opt; each city's candidate moves are scored in one vector op."""
+    tour = tour.copy()
+    n = len(tour)
+    for _ in range(max_passes):
+        improved = False
+        for i in range(n - 2):
+            a, b = tour[i], tour[i + 1]
+            c = tour[i + 2:]
+            e = np.append(tour[i + 3:], tour[0])
+            gain = distances[a, b] + distances[c, e] - distances[a, c] - distances[b, e]
+            if i == 0:
+                gain[-1] = 0  # edge (tour[-1], tour[0]) is adjacent to (a, b)
+            j = int(np.argmax(gain))
+            if gain[j] > 1e-9:
+                tour[i + 1:i + j + 3] = tour[i + 1:i + j + 3][::-1]
+                improved = True
+        if not improved:
+            break
+    return tour
+
+
+def _anneal(distances, rng, iterations, deadline=None, neighbors=10):
+    """2-opt annealing; each move joins a random city to one of its nearest neighbours."""
+    n = len(distances)
+    tour = nearest_neighbor(distances, int(rng.integers(n))).tolist()
+    length = float(tour_lengths(distances, np.asarray([tour]))[0])
+    best, best_length = list(tour), length
+    if n < 4:
+        return best, best_length, 0
+    k = min(neighbors, n - 1)
+    near = np.argpartition(distances, k, axis=1)[:, :k + 1]
+    near = [[int(c) for c in row if c != city][:k] for city, row in enumerate(near)]
+    position = [0] * n
+    for i, city in enumerate(tour):
+        position[city] = i
+    # Start by accepting a third of an average edge uphill about half the time
+    temperature = 0.3 * (length / n) / math.log(2)
+    cooling = math.exp(math.log(1e-3) / max(iterations, 1))
+    d = distances
+    cities = rng.integers(0, n, size=iterations)
+    picks = rng.integers(0, k, size=iterations)
+    thresholds = rng.random(iterations)
+    done = 0
+    for step in range(iterations):
+        if deadline and step % 1000 == 0 and time.time() > deadline:
+            break
+        done = step + 1
+        temperature *= cooling
+        a = int(cities[step])
+        i, j = position[a], position[near[a][picks[step]]]
+        if i > j:
+            i, j = j, i
+        if j - i < 2 or (i == 0 and j == n - 1):
+            continue
+        # Reversing tour[i+1..j] replaces edges (a, b), (c, e) by (a, c), (b, e)
+        a, b, c, e = tour[i], tour[i + 1], tour[j], tour[(j + 1) % n]
+        delta = d[a, c] + d[b, e] - d[a, b] - d[c, e]
+        if delta < 0 or thresholds[step] < math.exp(-delta / temperature):
+            tour[i + 1:j + 1] = tour[i + 1:j + 1][::-1]
+            for p in range(i + 1, j + 1):
+                position[tour[p]] = p
+            length += delta
+            if length < best_length - 1e-9:
+                best, best_length = list(tour), length
+    return best, best_length, done
+
+
+def _order_crossover(rng, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+    n = len(first)
+    a, b = sorted(rng.choice(n + 1, size=2, replace=False))
+    child = np.empty(n, dtype=first.dtype)
+    child[a:b] = first[a:b]
+    rest = np.roll(second, -b)
+    fill = rest[~np.isin(rest, first[a:b], assume_unique=True)]
+    child[(b + np.arange(n - (b - a))) % n] = fill
+    return child
+
+
+def _tsp_genetic(distances, rng, population, generations, mutation_rate, deadline=None):
+    n = len(distances)
+    if n < 4:
+        tour = nearest_neighbor(distances)
+        return tour.tolist(), float(tour_lengths(distances, tour[None, :])[0]), 0
+    pop = np.argsort(rng.random((population, n)), axis=1)
+    pop[0] = nearest_neighbor(distances, int(rng.integers(n)))
+    elite = max(1, population // 20)
+    done = 0
+    for generation in range(generations):
+        if deadline and time.time() > deadline:
+            break
+        lengths = tour_lengths(distances, pop)
+        order = np.argsort(lengths)
+        children = [pop[k] for k in order[:elite]]
+        # Tournament selection of size 3, all parents drawn at once
+        contenders = rng.integers(0, population, size=(2 * (population - elite), 3))
+        winners = contenders[np.arange(len(contenders)), np.argmin(lengths[contenders], axis=1)]
+        for k in range(population - elite):
+            child = _order_crossover(rng, pop[winners[2 * k]], pop[winners[2 * k + 1]])
+            if rng.random() < mutation_rate:
+                i, j = sorted(rng.choice(n, size=2, replace=False))
+                child[i:j + 1] = child[i:j + 1][::-1]
+            children.append(child)
+        pop = np.asarray(children)
+        done = generation + 1
+    lengths = tour_lengths(distances, pop)
+    best = two_opt_polish(distances, pop[int(np.argmin(lengths))])
+    return best.tolist(), float(tour_lengths(distances, best[None, :])[0]), done
+
+
+def _knapsack_repair(weights, values, capacity, chosen):
+    """Drop worst-ratio items until feasible, then add best-ratio items that still fit."""
+    ratio = values / np.maximum(weights, 1e-9)
+    chosen = chosen.copy()
+    load = int(weights[chosen].sum())
+    for i in np.argsort(ratio):
+        if load <= capacity:
+            break
+        if chosen[i]:
+            chosen[i] = False
+            load -= int(weights[i])
+    for i in np.argsort(-ratio):
+        if not chosen[i] and load + weights[i] <= capacity:
+            chosen[i] = True
+            load += int(weights[i])
+    return chosen
+
+
+def _knapsack_genetic(weights, values, capacity, rng, population, generations,
+                      mutation_rate=None, deadline=None):
+    n = len(weights)
+    w = weights.astype(np.float64)
+    v = values.astype(np.float64)
+    # Any overweight unit costs more than the best value density can earn back
+    penalty = float(np.max(v / np.maximum(w, 1e-9))) + 1.0 if n else 1.0
+    fill = min(1.0, capacity / max(float(w.sum()), 1.0))
+    pop = rng.random((population, n)) < fill
+    pop[0] = _knapsack_repair(weights, values, capacity, np.zeros(n, dtype=bool))
+    elite = max(1, population // 20)
+    flip = mutation_rate if mutation_rate is not None else 1.0 / max(n, 1)
+    done = 0
+    for generation in range(generations):
+        if deadline and time.time() > deadline:
+            break
+        x = pop.astype(np.float64)
+        fitness = x @ v - penalty * np.maximum(x @ w - capacity, 0)
+        order = np.argsort(-fitness)
+        contenders = rng.integers(0, population, size=(2 * (population - elite), 3))
+        winners = contenders[np.arange(len(contenders)), np.argmax(fitness[contenders], axis=1)]
+        parents = pop[winners].reshape(population - elite, 2, n)
+        mask = rng.random((population - elite, n)) < 0.5
+        children = np.where(mask, parents[:, 0], parents[:, 1])
+        children ^= rng.random(children.shape) < flip
+        pop = np.concatenate((pop[order[:elite]], children))
+        done = generation + 1
+    x = pop.astype(np.float64)
+    feasible = (x @ w) <= capacity
+    score = np.where(feasible, x @ v, -np.inf)
+    start = int(np.argmax(score)) if feasible.any() else int(np.argmax(x @ v))
+    chosen = _knapsack_repair(weights, values, capacity, pop[start])
+    return np.flatnonzero(chosen).tolist(), values[chosen].sum().item(), done
+
+
+def run_start(kind: str, specs: dict, arrays: dict, seed, settings: dict) -> dict:
+    """One independent restart; ``specs`` (shared memory) or ``arrays`` hold the instance."""
+    if specs:
+        arrays = attach(specs)
+    rng = np.random.default_rng(seed)
+    start = time.perf_counter()
+    if kind == 'tsp_annealing':
+        tour, length, steps = _anneal(arrays['distances'], rng, settings['iterations'],
+                                      settings.get('deadline'))
+        result = {'tour': tour, 'objective': length}
+    elif kind == 'tsp_genetic':
+        tour, length, steps = _tsp_genetic(arrays['distances'], rng, settings['population'],
+                                           settings['generations'], settings['mutation_rate'],
+                                           settings.get('deadline'))
+        result = {'tour': tour, 'objective': length}
+    elif kind == 'knapsack_genetic':
+        items, value, steps = _knapsack_genetic(arrays['weights'], arrays['values'],
+                                                settings['capacity'], rng,
+                                                settings['population'], settings['generations'],
+                                                settings.get('mutation_rate'),
+                                                settings.get('deadline'))
+        result = {'selected_items': items, 'objective': value}
+    else:
+        raise ValueError(f"Unknown metaheuristic: {kind}")
+    result.update({'time': time.perf_counter() - start, 'steps': steps})
+    return result
+
+
+def multi_start(kind: str, arrays: dict, settings: dict, restarts: int = 1, workers: int = None,
+                seed=None, time_limit: float = None, maximize: bool = False) -> dict:
+    """Run ``restarts`` independent starts and return the best plus per-start statistics.
+
+    With more than one worker the starts run in the process pool against
+    shared-memory copies of ``arrays``; otherwise they run here.  Starts stop
+    early once ``time_limit`` seconds have passed since the call.  ``workers``
+    is capped at the restarts and the pool's ``MAX_WORKERS``.
+    """
+    restarts = int(restarts)
+    if not 1 <= restarts <= MAX_RESTARTS:
+        raise ValueError(f"restarts must be between 1 and {MAX_RESTARTS}")
+    settings = dict(settings, deadline=time.time() + time_limit if time_limit else None)
+    workers = restarts if workers is None else max(1, int(workers))
+    workers = min(workers, restarts, process_pool.MAX_WORKERS)
+    seeds = np.random.SeedSequence(seed).spawn(restarts)
+    if workers > 1 and restarts > 1:
+        with SharedArrays(arrays) as shared:
+            pool = process_pool.get_pool(workers)
+            futures = [pool.submit(run_start, kind, shared.specs, None, s, settings) for s in seeds]
+            # Let every start finish before the blocks are unlinked, even if one failed
+            wait(futures)
+            starts = [f.result() for f in futures]
+    else:
+        starts = [run_start(kind, None, arrays, s, settings) for s in seeds]
+
+    objectives = np.asarray([s['objective'] for s in starts], dtype=np.float64)
+    best_index = int(np.argmax(objectives) if maximize else np.argmin(objectives))
+    return {
+        'best': starts[best_index],
+        'best_start': best_index,
+        'starts': [{'start': k, 'objective': s['objective'], 'time': s['time'],
+                    'steps': s['steps']} for k, s in enumerate(starts)],
+        'summary': {'restarts': restarts, 'workers': workers,
+                    'best': float(objectives[best_index]), 'mean': float(objectives.mean()),
+                    'std': float(objectives.std()), 'worst': float(objectives.min() if maximize
+                                                                   else objectives.max())},
+    }
@@ -0,0 +1,204 @@
+"""Run instrumentation: per-phase timers, solver counters and a Prometheus registry.
+
+``OptimizationFramework.solve`` times each phase with ``PhaseTimer`` and can
+track peak Python heap usage with ``track_peak_memory``.  Every finished run
+is fed to ``REGISTRY`` which renders the text exposition format for
+``/metrics``.  Problem and algorithm labels outside the registered names are
+recorded as ``unknown`` so request input cannot add label values.
+"""
+import math
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from bisect import bisect_left
+from collections import defaultdict
+from contextlib import contextmanager
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+class PhaseTimer:
+    """Accumulates wall time per named phase using ``time.perf_counter``."""
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    def total(self) -> float:
+        return sum(self.phases.values())
+
+
+@contextmanager
+def track_peak_memory(enabled: bool = True):
+    """Yield a dict whose ``peak_mb`` is filled with the peak traced heap on exit.
+
+    Uses ``tracemalloc``, so it only sees Python/NumPy allocations and slows
+    the traced code down; keep it off for latency-sensitive calls.
+    """
+    result = {'peak_mb': None}
+    if not enabled:
+        yield result
+        return
+    already_tracing = tracemalloc.is_tracing()
+    if already_tracing:
+        tracemalloc.reset_peak()
+    else:
+        tracemalloc.start()
+    try:
+        yield result
+    finally:
+        _, peak = tracemalloc.get_traced_memory()
+        if not already_tracing:
+            tracemalloc.stop()
+        result['peak_mb'] = peak / (1024 * 1024)
+
+
+# Optional dependencies worth tracking in the startup report
+HEAVY_MODULES = ('numpy', 'pandas', 'networkx', 'flask', 'mysql.connector', 'orjson', 'msgpack')
+
+
+def rss_mb():
+    """Current resident set size in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # ru_maxrss is KiB on Linux, bytes on macOS
+        return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def private_mb():
+    """Memory only this process holds (private pages), in MiB; RSS where /proc lacks it.
+
+    Unlike RSS it leaves out pages still shared copy-on-write with a prefork master.
+    """
+    try:
+        total = 0
+        with open('/proc/self/smaps_rollup') as f:
+            for line in f:
+                if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                    total += int(line.split()[1])  # KiB
+        return total / 1024
+    except (OSError, ValueError):
+        return rss_mb()
+
+
+def startup_report(boot_start: float) -> dict:
+    """Boot time since ``boot_start`` (a perf_counter value), RSS and heavy modules loaded."""
+    return {
+        'boot_seconds': time.perf_counter() - boot_start,
+        'rss_mb': rss_mb(),
+        'heavy_modules': [m for m in HEAVY_MODULES if m in sys.modules],
+    }
+
+
+class Histogram:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(**labels) -> str:
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + '}'
+
+
+def _number(value) -> str:
+    """Sample value without losing precision: integers exactly, floats by ``repr``."""
+    if isinstance(value, int) or (math.isfinite(value) and value == int(value)):
+        return str(int(value))
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))  # 'nan' is what Prometheus expects
+
+
+class MetricsRegistry:
+    """Process-local metrics rendered in Prometheus text format."""
+
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._latency = defaultdict(lambda: Histogram(self.buckets))  # (problem, algorithm, phase)
+        self._runs = defaultdict(int)                                 # (problem, algorithm, status)
+        self._counters = defaultdict(float)                           # (problem, algorithm, counter)
+        self._allowed = {'problem': set(), 'algorithm': set()}
+
+    def allow(self, label: str, values):
+        """Register values of the ``problem`` or ``algorithm`` label; others become ``unknown``."""
+        with self._lock:
+            self._allowed[label].update(values)
+
+    def _keys(self, problem_type, algorithm):
+        allowed = self._allowed
+        return (problem_type if problem_type in allowed['problem'] else 'unknown',
+                algorithm if algorithm in allowed['algorithm'] else 'unknown')
+
+    def observe_run(self, problem_type: str, algorithm: str, phases: dict = None,
+                    counters: dict = None, status: str = 'ok'):
+        with self._lock:
+            problem_type, algorithm = self._keys(problem_type, algorithm)
+            self._runs[(problem_type, algorithm, status)] += 1
+            for phase, seconds in (phases or {}).items():
+                self._latency[(problem_type, algorithm, phase)].observe(seconds)
+            for name, value in (counters or {}).items():
+                self._counters[(problem_type, algorithm, name)] += value
+
+    def observe_phase(self, problem_type: str, algorithm: str, phase: str, seconds: float):
+        with self._lock:
+            problem_type, algorithm = self._keys(problem_type, algorithm)
+            self._latency[(problem_type, algorithm, phase)].observe(seconds)
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            lines.append('# HELP galaxy_runs_total Solver runs by problem, algorithm and status.')
+            lines.append('# TYPE galaxy_runs_total counter')
+            for (problem, algorithm, status), value in sorted(self._runs.items()):
+                lines.append(f'galaxy_runs_total{_labels(problem=problem, algorithm=algorithm, status=status)} {value}')
+
+            lines.append('# HELP galaxy_phase_seconds Run latency per phase.')
+            lines.append('# TYPE galaxy_phase_seconds histogram')
+            for (problem, algorithm, phase), hist in sorted(self._latency.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, hist.counts):
+                    cumulative += count
+                    labels = _labels(problem=problem, algorithm=algorithm, phase=phase, le=bound)
+                    lines.append(f'galaxy_phase_seconds_bucket{labels} {cumulative}')
+                labels = _labels(problem=problem, algorithm=algorithm, phase=phase, le='+Inf')
+                lines.append(f'galaxy_phase_seconds_bucket{labels} {hist.count}')
+                labels = _labels(problem=problem, algorithm=algorithm, phase=phase)
+                lines.append(f'galaxy_phase_seconds_sum{labels} {_number(hist.sum)}')
+                lines.append(f'galaxy_phase_seconds_count{labels} {hist.count}')
+
+            lines.append('# HELP galaxy_solver_events_total Solver internals (nodes expanded, DP cells, ...).')
+            lines.append('# TYPE galaxy_solver_events_total counter')
+            for (problem, algorithm, name), value in sorted(self._counters.items()):
+                labels = _labels(problem=problem, algorithm=algorithm, counter=name)
+                lines.append(f'galaxy_solver_events_total{labels} {_number(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = MetricsRegistry()
@@ -1,14 +1,165 @@
+import os
 import time
 import json
+import copy
+import importlib
+import threading
 import numpy as np
-import networkx as nx
 from abc import ABC, abstractmethod
 from typing import List, Dict, Any, Tuple
 import math
 import heapq
+from array import array
 from copy import deepcopy
+from collections import deque
+from contextlib import nullcontext
+from metrics import PhaseTimer, REGISTRY, track_peak_memory
+from instance_format import is_binary_instance, read_instance
+from loaders import DatasetError, read_knapsack_csv, validate_knapsack
+
+class TraceRecorder:
+    """Delta-encoded solver trace.
+
+    Each step appends one item (a city, a knapsack item, ...) and the running
+    objective.  Items are kept in full so any frame can be rebuilt as a prefix
+    of ``items``; frames themselves are sampled every ``every`` steps and
+    decimated to at most ``max_frames``.
+    """
+
+    def __init__(self, enabled: bool = True, every: int = 1, max_frames: int = None):
+        self.enabled = enabled
+        self.stride = max(1, int(every or 1))
+        self.max_frames = max(2, int(max_frames)) if max_frames else None
+        self.items = array('l')
+        self.frames = array('l')  # prefix length of ``items`` at each frame
+        self.values = array('d')
+        self.total_steps = 0
+
+    @classmethod
+    def from_options(cls, options) -> 'TraceRecorder':
+        if options is False:
+            return cls(enabled=False)
+        options = options or {}
+        return cls(enabled=options.get('enabled', True),
+                   every=options.get('every', 1),
+                   max_frames=options.get('max_frames'))
+
+    def seed(self, items):
+        """Record starting items that are part of every frame but are not steps."""
+        if self.enabled:
+            self.items.extend(int(i) for i in items)
+
+    def record(self, item, value):
+        if not self.enabled:
+            return
+        self.items.append(int(item))
+        if self.total_steps % self.stride == 0:
+            self._add_frame(value)
+        self.total_steps += 1
+
+    def _add_frame(self, value):
+        self.frames.append(len(self.items))
+        self.values.append(float(value))
+        if self.max_frames and len(self.frames) > self.max_frames:
+            # Drop every other frame and halve the sampling rate from here on
+            self.frames = self.frames[::2]
+            self.values = self.values[::2]
+            self.stride *= 2
+
+    def finish(self, value):
+        """Make sure the final state is the last frame, still within ``max_frames``."""
+        if not self.enabled or (self.frames and self.frames[-1] == len(self.items)):
+            return
+        if self.max_frames and len(self.frames) >= self.max_frames:
+            # Full: the final state replaces the last sampled frame
+            self.frames[-1] = len(self.items)
+            self.values[-1] = float(value)
+        else:
+            self.frames.append(len(self.items))
+            self.values.append(float(value))
+
+    def to_dict(self):
+        """The trace with NumPy arrays; serializers.py sends them as lists or typed blobs."""
+        if not self.enabled:
+            return None
+        return {
+            'encoding': 'delta',
+            'items': np.array(self.items, dtype=np.int64),
+            'frames': np.array(self.frames, dtype=np.int64),
+            'values': np.array(self.values, dtype=np.float64),
+            'total_steps': self.total_steps,
+            'stride': self.stride
+        }
+
+# Algorithm names accepted by the API -> Problem solver methods
+ALGORITHMS = {
+    'greedy': 'greedy_solution',
+    'dp': 'dynamic_programming_solution',
+    'backtracking': 'backtracking_solution',
+    'branchbound': 'branch_and_bound_solution',
+    'divideconquer': 'divide_and_conquer_solution',
+    'annealing': 'annealing_solution',
+    'genetic': 'genetic_solution',
+    'grouped': 'grouped_solution',
+    'subsetsum': 'subset_sum_solution',
+}
+# Multi-start metaheuristics (see metaheuristics.py); run time is set by their time limit
+METAHEURISTICS = ('annealing', 'genetic')
+# 'auto' is recorded when a run fails before the cost model picks an algorithm
+REGISTRY.allow('algorithm', [*ALGORITHMS, 'auto'])
 
 class Problem(ABC):
+    # Heavy modules this problem imports lazily; imported up front by warm_up()
+    REQUIRES = ()
+    # Largest n an exact algorithm accepts before it falls back to greedy
+    EXACT_LIMITS = {}
+    # Algorithms that only redirect to another solver -> the solver that runs
+    ALIASES = {}
+    
+    # Set by OptimizationFramework.solve for each call; see TraceRecorder.from_options
+    trace_options = None
+    # Solver internals for the current call (nodes expanded, DP cells, ...)
+    counters = None
+    # Per-call problem parameters from the request (e.g. knapsack 'capacity')
+    params = {}
+    # Params that change how the instance file is read; a request setting any of them
+    # bypasses the preloaded copy and reloads the file
+    LOAD_PARAMS = ()
+
+    def new_trace(self) -> TraceRecorder:
+        return TraceRecorder.from_options(self.trace_options)
+
+    def warm_up(self):
+        """Import this problem's heavy dependencies now (e.g. before forking workers)."""
+        for module in self.REQUIRES:
+            importlib.import_module(module)
+
+    def count(self, name: str, amount=1):
+        if self.counters is not None:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def load_arrays(self, arrays: dict, meta: dict):
+        """Load from memory-mapped arrays of a binary instance (see instance_format)."""
+        raise NotImplementedError(f"{type(self).__name__} has no binary loader")
+    
+    def load_inline(self, data: dict):
+        """Load an instance given inline as a JSON object (batch requests)."""
+        raise NotImplementedError(f"{type(self).__name__} has no inline loader")
+    
+    def features(self) -> Dict[str, float]:
+        """Size features of the loaded instance, as used by the cost model."""
+        return {'n': self.n}
+    
+    def run(self, algorithm: str):
+        """Run the named algorithm on the loaded, preprocessed instance."""
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"Unknown algorithm: {algorithm}")
+        return getattr(self, ALGORITHMS[algorithm])()
+    
+    def preprocess(self):
+        """Build derived structures after load_data (distance matrix, graph, ...)."""
+        pass
+
     @abstractmethod
     def load_data(self, filepath: str):
         pass
@@ -32,8 +183,52 @@ class Problem(ABC):
     @abstractmethod
     def divide_and_conquer_solution(self):
         pass
+    
+    def annealing_solution(self):
+        raise ValueError(f"{type(self).__name__} has no simulated annealing solver")
+    
+    def genetic_solution(self):
+        raise ValueError(f"{type(self).__name__} has no genetic algorithm solver")
+    
+    def grouped_solution(self):
+        raise ValueError(f"{type(self).__name__} has no grouped solver")
+    
+    def subset_sum_solution(self):
+        raise ValueError(f"{type(self).__name__} has no subset-sum solver")
+    
+    def _multi_start(self, kind: str, arrays: dict, settings: dict, maximize: bool = False):
+        """Run a metaheuristic with the request's ``restarts``/``workers``/``seed``/``time_limit``."""
+        from metaheuristics import DEFAULT_TIME_LIMIT, SETTING_LIMITS, multi_start
+        for name in settings:
+            if name in self.params:
+                settings[name] = type(settings[name])(self.params[name])
+                limit = SETTING_LIMITS.get(name)
+                if limit is not None and not 1 <= settings[name] <= limit:
+                    raise ValueError(f"{name} must be between 1 and {limit}")
+        run = multi_start(kind, arrays, settings,
+                          restarts=self.params.get('restarts', 4),
+                          workers=self.params.get('workers'),
+                          seed=self.params.get('seed'),
+                          time_limit=self.params.get('time_limit', DEFAULT_TIME_LIMIT),
+                          maximize=maximize)
+        self.count('restarts', run['summary']['restarts'])
+        self.count('steps', sum(start['steps'] for start in run['starts']))
+        return run
+
+def euclidean_distances(coords, out=None):
+    """Pairwise distances of ``(n, 2)`` points, written into ``out`` when given.
+
+    Built one axis at a time, so the only temporary is one ``(n, n)`` matrix.
+    """
+    coords = np.asarray(coords, dtype=float)
+    x, y = coords[:, 0], coords[:, 1]
+    dx = np.subtract.outer(x, x, out=out)
+    dy = np.subtract.outer(y, y)
+    return np.hypot(dx, dy, out=dx)
 
 class TSPProblem(Problem):
+    EXACT_LIMITS = {'dp': 15, 'backtracking': 10, 'branchbound': 20}
+    
     def __init__(self):
         self.distances = None
         self.n = 0
@@ -63,15 +258,7 @@ class TSPProblem(Problem):
             
             if not self.coordinates:
                 raise ValueError("No coordinates found")
-                
-            # Calculate distance matrix
-            self.distances = np.zeros((self.n, self.n))
-            for i in range(self.n):
-                for j in range(self.n):
-                    if i != j:
-                        dx = self.coordinates[i][0] - self.coordinates[j][0]
-                        dy = self.coordinates[i][1] - self.coordinates[j][1]
-                        self.distances[i][j] = math.sqrt(dx*dx + dy*dy)
+            self.distances = None  # built in preprocess()
             self.cities = list(range(self.n))
             
         except Exception as e:
@@ -82,15 +269,32 @@ class TSPProblem(Problem):
         self.n = 10
         np.random.seed(42)
         self.coordinates = [(np.random.uniform(0, 100), np.random.uniform(0, 100)) for _ in range(self.n)]
-        self.distances = np.zeros((self.n, self.n))
-        for i in range(self.n):
-            for j in range(self.n):
-                if i != j:
-                    dx = self.coordinates[i][0] - self.coordinates[j][0]
-                    dy = self.coordinates[i][1] - self.coordinates[j][1]
-                    self.distances[i][j] = math.sqrt(dx*dx + dy*dy)
+        self.distances = None
+        self.cities = list(range(self.n))
+    
+    def load_inline(self, data):
+        coordinates = np.asarray(data['coordinates'], dtype=np.float64)
+        if coordinates.ndim != 2 or coordinates.shape[1] != 2 or len(coordinates) == 0:
+            raise ValueError("'coordinates' must be a non-empty list of [x, y] pairs")
+        self.coordinates = coordinates
+        self.n = len(coordinates)
+        self.distances = None
+        self.cities = list(range(self.n))
+    
+    def load_arrays(self, arrays, meta):
+        self.coordinates = arrays['coordinates']
+        self.n = len(self.coordinates)
+        # A stored matrix is used as-is (shared mapping); otherwise preprocess builds it
+        self.distances = arrays.get('distances')
         self.cities = list(range(self.n))
     
+    def preprocess(self):
+        if self.distances is not None and len(self.distances) == self.n:
+            return
+        # Euclidean distance matrix
+        coords = np.asarray(self.coordinates[:self.n], dtype=float).reshape(-1, 2)
+        self.distances = euclidean_distances(coords)
+    
     def greedy_solution(self):
         unvisited = set(self.cities)
         current = 0
@@ -98,35 +302,31 @@ class TSPProblem(Problem):
         unvisited.remove(current)
         total_distance = 0
         
-        steps = []  # For visualization
+        trace = self.new_trace()  # For visualization
+        trace.seed(tour)
         
         while unvisited:
             next_city = min(unvisited, key=lambda city: self.distances[current][city])
             total_distance += self.distances[current][next_city]
             tour.append(next_city)
             unvisited.remove(next_city)
-            
-            steps.append({
-                'current_tour': tour.copy(),
-                'current_city': next_city,
-                'distance_so_far': total_distance
-            })
-            
+            trace.record(next_city, total_distance)
             current = next_city
         
+        trace.finish(total_distance)
         total_distance += self.distances[tour[-1]][tour[0]]
         tour.append(tour[0])  # Return to start
         
         return {
             'tour': tour,
             'distance': total_distance,
-            'steps': steps,
+            'trace': trace.to_dict(),
             'optimal': False
         }
     
     def dynamic_programming_solution(self):
         n = self.n
-        if n > 15:  # DP becomes too slow for large instances
+        if n > self.EXACT_LIMITS['dp']:  # DP becomes too slow for large instances
             result = self.greedy_solution()
             result['optimal'] = False
             result['note'] = 'DP too slow, used greedy instead'
@@ -159,26 +359,37 @@ class TSPProblem(Problem):
             return min_dist, best_path
         
         min_dist, path = dp(1, 0)  # Start from city 0
+        self.count('dp_states', len(memo))
+        
+        trace = self.new_trace()
+        trace.seed(path[:1])
+        distance_so_far = 0
+        for prev, city in zip(path, path[1:]):
+            distance_so_far += self.distances[prev][city]
+            trace.record(city, distance_so_far)
+        trace.finish(min_dist)
         
         return {
             'tour': path,
             'distance': min_dist,
-            'steps': [{'current_tour': path, 'current_city': 0, 'distance_so_far': min_dist}],
+            'trace': trace.to_dict(),
             'optimal': True
         }
     
     def backtracking_solution(self):
         n = self.n
-        if n > 10:  # Backtracking too slow for large instances
+        if n > self.EXACT_LIMITS['backtracking']:  # Backtracking too slow for large instances
             result = self.greedy_solution()
             result['optimal'] = False
             return result
         
         best_tour = None
         best_distance = float('inf')
+        nodes_visited = 0
         
         def backtrack(tour, distance, visited):
-            nonlocal best_tour, best_distance
+            nonlocal best_tour, best_distance, nodes_visited
+            nodes_visited += 1
             
             if len(tour) == n:
                 # Complete tour
@@ -196,6 +407,7 @@ class TSPProblem(Problem):
                         backtrack(tour + [next_city], new_distance, visited | {next_city})
         
         backtrack([0], 0, {0})
+        self.count('nodes_visited', nodes_visited)
         
         return {
             'tour': best_tour,
@@ -205,7 +417,7 @@ class TSPProblem(Problem):
     
     def branch_and_bound_solution(self):
         n = self.n
-        if n > 20:  # B&B can handle larger instances than backtracking
+        if n > self.EXACT_LIMITS['branchbound']:  # B&B can handle larger instances than backtracking
             result = self.greedy_solution()
             result['optimal'] = False
             return result
@@ -232,11 +444,14 @@ class TSPProblem(Problem):
         initial_lb = calculate_lower_bound({0})
         heapq.heappush(queue, (initial_lb, 0, [0], {0}))
         
+        nodes_expanded = nodes_pruned = 0
         while queue:
             lb, distance, tour, visited = heapq.heappop(queue)
             
             if lb >= best_distance:
+                nodes_pruned += 1
                 continue
+            nodes_expanded += 1
                 
             if len(tour) == n:
                 complete_distance = distance + self.distances[tour[-1]][tour[0]]
@@ -254,6 +469,10 @@ class TSPProblem(Problem):
                     
                     if new_lb < best_distance:
                         heapq.heappush(queue, (new_lb, new_distance, tour + [next_city], new_visited))
+                    else:
+                        nodes_pruned += 1
+        self.count('nodes_expanded', nodes_expanded)
+        self.count('nodes_pruned', nodes_pruned)
         
         return {
             'tour': best_tour,
@@ -324,28 +543,90 @@ class TSPProblem(Problem):
         for i in range(len(tour) - 1):
             distance += self.distances[tour[i]][tour[i+1]]
         return distance
+    
+    def annealing_solution(self):
+        # Multi-start simulated annealing over 2-opt moves
+        run = self._multi_start('tsp_annealing', {'distances': self.distances},
+                                {'iterations': min(2000 * self.n, 2_000_000)})
+        return self._metaheuristic_result(run, 'simulated_annealing')
+    
+    def genetic_solution(self):
+        # Multi-start GA: order crossover, 2-opt mutation, 2-opt polish of the winner
+        run = self._multi_start('tsp_genetic', {'distances': self.distances},
+                                {'population': 60, 'generations': 200, 'mutation_rate': 0.3})
+        return self._metaheuristic_result(run, 'genetic')
+    
+    def _metaheuristic_result(self, run, method):
+        tour = run['best']['tour']
+        rotate = tour.index(0)  # start at city 0 like the other solvers
+        tour = tour[rotate:] + tour[:rotate] + [0]
+        trace = self.new_trace()
+        trace.seed(tour[:1])
+        distance = 0
+        for prev, city in zip(tour, tour[1:-1]):
+            distance += self.distances[prev][city]
+            trace.record(city, distance)
+        trace.finish(distance)
+        return {
+            'tour': tour,
+            'distance': self._calculate_tour_distance(tour),
+            'trace': trace.to_dict(),
+            'optimal': False,
+            'method': method,
+            'best_start': run['best_start'],
+            'restarts': run['starts'],
+            'restart_summary': run['summary']
+        }
 
 class KnapsackProblem(Problem):
+    EXACT_LIMITS = {'backtracking': 24, 'branchbound': 24, 'divideconquer': 26}
+    ALIASES = {'branchbound': 'backtracking'}
+    LOAD_PARAMS = ('capacity',)
+    
     def __init__(self):
         self.weights = []
         self.values = []
         self.capacity = 0
         self.n = 0
+        # Typed copies for vectorised code; the lists above serve the Python loops
+        self.weight_array = np.zeros(0, dtype=np.int64)
+        self.value_array = np.zeros(0, dtype=np.int64)
+        self.item_ids = None
+        self.categories = None
     
     def load_data(self, filepath: str):
-        try:
-            import pandas as pd
-            df = pd.read_csv(filepath)
-            self.weights = df['weight'].tolist()
-            self.values = df['value'].tolist()
-            self.capacity = int(df['capacity'].iloc[0]) if 'capacity' in df.columns else int(df['capacity'].iloc[0])
-            self.n = len(self.weights)
-        except:
-            # Sample data
-            self.weights = [2, 3, 4, 5, 6]
-            self.values = [3, 4, 5, 6, 7]
-            self.capacity = 15
-            self.n = len(self.weights)
+        # Malformed files raise DatasetError instead of silently using sample items
+        data = read_knapsack_csv(filepath, capacity=self.params.get('capacity'))
+        self._set_items(data['weights'], data['values'], data['capacity'],
+                        data['item_ids'], data['categories'])
+    
+    def load_inline(self, data):
+        capacity = self.params.get('capacity', data.get('capacity'))
+        if capacity is None:
+            raise DatasetError("inline knapsack: no capacity given")
+        self._set_items(*validate_knapsack(data['weights'], data['values'], capacity),
+                        data.get('item_ids'), data.get('categories'))
+    
+    def features(self):
+        return {'n': self.n, 'capacity': self.capacity}
+    
+    def load_arrays(self, arrays, meta):
+        item_ids = arrays['item_ids'] if 'item_ids' in arrays else meta.get('item_labels')
+        categories = None
+        if 'categories' in arrays:
+            categories = np.asarray(meta['category_labels'])[arrays['categories']]
+        self._set_items(arrays['weights'], arrays['values'],
+                        self.params.get('capacity', meta['capacity']), item_ids, categories)
+    
+    def _set_items(self, weights, values, capacity, item_ids=None, categories=None):
+        self.weight_array = np.asarray(weights)
+        self.value_array = np.asarray(values)
+        self.weights = self.weight_array.tolist()
+        self.values = self.value_array.tolist()
+        self.capacity = int(capacity)
+        self.n = len(self.weights)
+        self.item_ids = item_ids
+        self.categories = categories
     
     def greedy_solution(self):
         # Value-to-weight ratio greedy
@@ -355,28 +636,34 @@ class KnapsackProblem(Problem):
         current_weight = 0
         total_value = 0
         selected = []
+        trace = self.new_trace()
         
         for i in items:
             if current_weight + self.weights[i] <= self.capacity:
                 selected.append(i)
                 current_weight += self.weights[i]
                 total_value += self.values[i]
+                trace.record(i, total_value)
+        trace.finish(total_value)
         
         return {
             'selected_items': selected,
             'total_value': total_value,
             'total_weight': current_weight,
+            'trace': trace.to_dict(),
             'optimal': False
         }
     
     def dynamic_programming_solution(self):
-        # Standard 0/1 knapsack DP
-        dp = [[0] * (self.capacity + 1) for _ in range(self.n + 1)]
+        # Standard 0/1 knapsack DP over the capacity trimmed to the largest reachable fill
+        from subset_sum import max_fill
+        capacity = max_fill(self.weights, self.capacity)
+        dp = [[0] * (capacity + 1) for _ in range(self.n + 1)]
         
         for i in range(1, self.n + 1):
             wi = self.weights[i-1]
             vi = self.values[i-1]
-            for w in range(0, self.capacity + 1):
+            for w in range(0, capacity + 1):
                 if wi <= w:
                     dp[i][w] = max(dp[i-1][w], dp[i-1][w - wi] + vi)
                 else:
@@ -384,37 +671,41 @@ class KnapsackProblem(Problem):
         
         # Backtrack to find selected items
         selected = []
-        w = self.capacity
+        w = capacity
         for i in range(self.n, 0, -1):
             if dp[i][w] != dp[i-1][w]:
                 selected.append(i-1)
                 w -= self.weights[i-1]
         
         selected.reverse()
+        self.count('dp_cells', self.n * (capacity + 1))
         
         return {
             'selected_items': selected,
-            'total_value': dp[self.n][self.capacity],
+            'total_value': dp[self.n][capacity],
             'total_weight': sum(self.weights[i] for i in selected),
             'optimal': True
         }
 
     def backtracking_solution(self):
         # Use backtracking with pruning for small n, else fall back
-        if self.n > 24:
+        if self.n > self.EXACT_LIMITS['backtracking']:
             result = self.greedy_solution()
             result['note'] = 'Backtracking too slow, used greedy'
             return result
         
         best_value = 0
         best_set = []
+        # No selection can fill more than the largest reachable weight; bound against that
+        from subset_sum import max_fill
+        capacity = max_fill(self.weights, self.capacity)
         
         items = list(range(self.n))
         ratio_order = sorted(items, key=lambda i: self.values[i]/max(1e-9, self.weights[i]), reverse=True)
         
         def upper_bound(idx, current_weight, current_value):
             # Fractional knapsack upper bound
-            rem = self.capacity - current_weight
+            rem = capacity - current_weight
             bound = current_value
             for j in range(idx, self.n):
                 i = ratio_order[j]
@@ -426,9 +717,12 @@ class KnapsackProblem(Problem):
                     break
             return bound
         
+        nodes_visited = 0
+        
         def dfs(idx, current_weight, current_value, chosen, order_idx):
-            nonlocal best_value, best_set
-            if current_weight > self.capacity:
+            nonlocal best_value, best_set, nodes_visited
+            nodes_visited += 1
+            if current_weight > capacity:
                 return
             if order_idx == self.n:
                 if current_value > best_value:
@@ -447,6 +741,7 @@ class KnapsackProblem(Problem):
             dfs(idx+1, current_weight, current_value, chosen, order_idx+1)
         
         dfs(0, 0, 0, [], 0)
+        self.count('nodes_visited', nodes_visited)
         best_set.sort()
         return {
             'selected_items': best_set,
@@ -461,12 +756,116 @@ class KnapsackProblem(Problem):
 
     def divide_and_conquer_solution(self):
         # Meet-in-the-middle for knapsack (approx): split items, compute subset sums, combine
-        if self.n <= 26:
+        if self.n <= self.EXACT_LIMITS['divideconquer']:
             # Fallback to DP which is exact and simple for moderate sizes
             return self.dynamic_programming_solution()
         return self.greedy_solution()
+    
+    def genetic_solution(self):
+        # Multi-start penalty GA: overweight selections are penalised, the winner repaired
+        run = self._multi_start('knapsack_genetic',
+                                {'weights': self.weight_array, 'values': self.value_array},
+                                {'capacity': self.capacity, 'population': 80, 'generations': 300},
+                                maximize=True)
+        selected = sorted(run['best']['selected_items'])
+        trace = self.new_trace()
+        total_value = 0
+        for i in selected:
+            total_value += self.values[i]
+            trace.record(i, total_value)
+        trace.finish(total_value)
+        return {
+            'selected_items': selected,
+            'total_value': total_value,
+            'total_weight': sum(self.weights[i] for i in selected),
+            'trace': trace.to_dict(),
+            'optimal': False,
+            'method': 'genetic',
+            'best_start': run['best_start'],
+            'restarts': run['starts'],
+            'restart_summary': run['summary']
+        }
+
+    def subset_sum_solution(self):
+        """Which total weights are reachable, and a witness for the closest fill.
+
+        Params: ``target`` (a weight to reach exactly instead of the best
+        fill) and ``queries`` (weights to test for reachability).
+        """
+        import subset_sum
+        bits = subset_sum.reachable(self.weights, self.capacity)
+        summary = subset_sum.summarize(bits, self.capacity)
+        target = int(self.params.get('target', summary['best_fill']))
+        selected = subset_sum.witness(self.weights, self.capacity, target)
+        self.count('bitset_words', self.n * (self.capacity // 64 + 1))
+        
+        trace = self.new_trace()
+        total_value = 0
+        for i in selected or []:
+            total_value += self.values[i]
+            trace.record(i, total_value)
+        trace.finish(total_value)
+        summary.update({
+            'selected_items': selected or [],
+            'total_value': total_value,
+            'total_weight': target if selected is not None else 0,
+            'target': target,
+            'reachable': selected is not None,
+            'queries': {str(q): subset_sum.is_set(bits, int(q))
+                        for q in self.params.get('queries', [])},
+            'trace': trace.to_dict(),
+            # Optimal for the fill; values are reported but not maximised
+            'optimal': selected is not None
+        })
+        return summary
+    
+    def grouped_solution(self):
+        """Exact knapsack with per-category counts (multiple-choice knapsack by default).
+
+        Params: ``max_per_category`` and ``min_per_category`` (an int or a
+        ``{category: count}`` mapping; defaults 1 and 0) and ``min_value``,
+        which rejects the instance early when the Lagrangian bound is below it.
+        """
+        import grouped_knapsack
+        if self.categories is None:
+            raise DatasetError("Grouped knapsack needs a 'category' column")
+        names, groups = grouped_knapsack.group_indices(self.categories)
+        lower, upper = grouped_knapsack.group_limits(names,
+                                                     self.params.get('max_per_category', 1),
+                                                     self.params.get('min_per_category', 0))
+        bound = grouped_knapsack.lagrangian_bound(self.weight_array, self.value_array,
+                                                  self.capacity, groups, lower, upper)
+        min_value = self.params.get('min_value')
+        if min_value is not None and bound < min_value:
+            solution = {'selected_items': [], 'total_value': 0, 'total_weight': 0,
+                        'feasible': False, 'rejected': True}
+        else:
+            # Nothing heavier than the largest reachable fill can be selected
+            from subset_sum import max_fill
+            solution = grouped_knapsack.solve(self.weight_array, self.value_array,
+                                              max_fill(self.weights, self.capacity),
+                                              groups, lower, upper, self.counters)
+        trace = self.new_trace()
+        total_value = 0
+        by_category = {}
+        for i in solution['selected_items']:
+            total_value += self.values[i]
+            trace.record(i, total_value)
+            by_category.setdefault(str(self.categories[i]), []).append(i)
+        trace.finish(total_value)
+        solution.update({
+            # -inf: some category has fewer items than its minimum
+            'upper_bound': bound if math.isfinite(bound) else None,
+            'categories': by_category,
+            'trace': trace.to_dict(),
+            'optimal': solution['feasible']
+        })
+        return solution
 
 class GraphMatchingProblem(Problem):
+    REQUIRES = ('networkx',)
+    ALIASES = {'backtracking': 'dp', 'branchbound': 'dp', 'divideconquer': 'greedy'}
+    
     def __init__(self):
         self.graph = None
         self.left_nodes = []
@@ -477,25 +876,47 @@ class GraphMatchingProblem(Problem):
         try:
             with open(filepath, 'r') as f:
                 data = json.load(f)
-            self.left_nodes = data['left_nodes']
-            self.right_nodes = data['right_nodes']
-            self.edges = [tuple(e) for e in data['edges']]
-            
-            # Create bipartite graph
-            self.graph = nx.Graph()
-            self.graph.add_nodes_from(self.left_nodes, bipartite=0)
-            self.graph.add_nodes_from(self.right_nodes, bipartite=1)
-            self.graph.add_edges_from(self.edges)
+            self.load_inline(data)
             
         except:
             # Sample data
             self.left_nodes = [0, 1, 2]
             self.right_nodes = [3, 4, 5]
             self.edges = [(0, 3), (0, 4), (1, 3), (1, 5), (2, 4), (2, 5)]
-            self.graph = nx.Graph()
-            self.graph.add_nodes_from(self.left_nodes, bipartite=0)
-            self.graph.add_nodes_from(self.right_nodes, bipartite=1)
-            self.graph.add_edges_from(self.edges)
+    
+    def load_inline(self, data):
+        # Nodes may be plain ids or {"id": ...} objects, edges pairs or {"from", "to"}
+        self.left_nodes = [n['id'] if isinstance(n, dict) else n for n in data['left_nodes']]
+        self.right_nodes = [n['id'] if isinstance(n, dict) else n for n in data['right_nodes']]
+        self.edges = [(e['from'], e['to']) if isinstance(e, dict) else tuple(e)
+                      for e in data['edges']]
+    
+    def features(self):
+        n_left, n_right = len(self.left_nodes), len(self.right_nodes)
+        edges = len(self.edges)
+        return {'n': n_left + n_right, 'n_left': n_left, 'n_right': n_right, 'edges': edges,
+                'density': edges / (n_left * n_right) if n_left and n_right else 0.0}
+    
+    def load_arrays(self, arrays, meta):
+        n_left, n_right = meta['n_left'], meta['n_right']
+        self.left_nodes = (arrays['left_ids'].tolist() if 'left_ids' in arrays
+                           else meta['left_labels'])
+        self.right_nodes = (arrays['right_ids'].tolist() if 'right_ids' in arrays
+                            else meta['right_labels'])
+        # Expand CSR rows into (left, right) edge pairs
+        rows = np.repeat(np.arange(n_left), np.diff(arrays['indptr']))
+        left = np.asarray(self.left_nodes, dtype=object) if n_left else np.empty(0, dtype=object)
+        right = np.asarray(self.right_nodes, dtype=object) if n_right else np.empty(0, dtype=object)
+        self.edges = list(zip(left[rows].tolist(), right[arrays['indices']].tolist()))
+    
+    def preprocess(self):
+        import networkx as nx
+        
+        # Create bipartite graph
+        self.graph = nx.Graph()
+        self.graph.add_nodes_from(self.left_nodes, bipartite=0)
+        self.graph.add_nodes_from(self.right_nodes, bipartite=1)
+        self.graph.add_edges_from(self.edges)
 
     def greedy_solution(self):
         # Build a simple maximal matching greedily
@@ -512,16 +933,76 @@ class GraphMatchingProblem(Problem):
         }
 
     def dynamic_programming_solution(self):
-        # Use maximum matching from networkx (optimal)
-        max_match = nx.algorithms.matching.maximum_matching(self.graph)
-        # convert set of pairs to list with left-right orientation if possible
-        seen = set()
-        matching_list = []
-        for u, v in max_match:
-            if (u, v) in seen or (v, u) in seen:
-                continue
-            seen.add((u, v))
-            matching_list.append((u, v))
+        # Hopcroft-Karp maximum cardinality matching (optimal)
+        left = set(self.left_nodes)
+        adjacency = {u: [] for u in self.left_nodes}
+        for u, v in self.edges:
+            if u in left:
+                adjacency[u].append(v)
+            elif v in left:
+                adjacency[v].append(u)
+        
+        match_left = {u: None for u in self.left_nodes}
+        match_right = {}
+        phases = augmenting_paths = 0
+        
+        def bfs():
+            # Layer free left nodes and report whether an augmenting path exists
+            dist = {}
+            queue = deque()
+            for u in self.left_nodes:
+                if match_left[u] is None:
+                    dist[u] = 0
+                    queue.append(u)
+            found = False
+            while queue:
+                u = queue.popleft()
+                for v in adjacency[u]:
+                    w = match_right.get(v)
+                    if w is None:
+                        found = True
+                    elif w not in dist:
+                        dist[w] = dist[u] + 1
+                        queue.append(w)
+            return found, dist
+        
+        def dfs(root, dist):
+            # Explicit stack: augmenting paths can be far longer than the recursion limit
+            stack = [(root, iter(adjacency[root]))]
+            path = []  # right node taken from each stack entry but the top
+            while stack:
+                u, neighbours = stack[-1]
+                for v in neighbours:
+                    w = match_right.get(v)
+                    if w is None:
+                        # Free right node: flip every edge along the path
+                        for (x, _), y in zip(stack, path + [v]):
+                            match_left[x] = y
+                            match_right[y] = x
+                        return True
+                    if dist.get(w) == dist[u] + 1:
+                        path.append(v)
+                        stack.append((w, iter(adjacency[w])))
+                        break
+                else:
+                    dist[u] = None  # dead end for this phase
+                    stack.pop()
+                    if path:
+                        path.pop()
+            return False
+        
+        while True:
+            found, dist = bfs()
+            if not found:
+                break
+            phases += 1
+            for u in self.left_nodes:
+                if match_left[u] is None and dfs(u, dist):
+                    augmenting_paths += 1
+        
+        self.count('bfs_phases', phases)
+        self.count('augmenting_paths', augmenting_paths)
+        matching_list = [(u, v) for u, v in match_left.items() if v is not None]
         return {
             'matching': matching_list,
             'matching_size': len(matching_list),
@@ -540,59 +1021,278 @@ class GraphMatchingProblem(Problem):
         # Redirect to greedy as an approximate variant
         return self.greedy_solution()
 
+class LazyProblems(dict):
+    """Problem instances created on first lookup from a name -> factory mapping.
+
+    Factories are classes or ``'module:Class'`` strings, so a problem living in
+    its own module is not even imported until a request needs it.
+    """
+
+    def __init__(self, factories):
+        super().__init__()
+        self.factories = dict(factories)
+        self._lock = threading.Lock()
+
+    def __missing__(self, name):
+        factory = self.factories[name]
+        with self._lock:
+            if name not in self:
+                if isinstance(factory, str):
+                    module, _, attr = factory.partition(':')
+                    factory = getattr(importlib.import_module(module), attr)
+                dict.__setitem__(self, name, factory())
+        return dict.__getitem__(self, name)
+
+    def get(self, name, default=None):
+        return self[name] if name in self.factories else default
+
 class OptimizationFramework:
-    def __init__(self):
-        self.problems = {
-            'tsp': TSPProblem(),
-            'knapsack': KnapsackProblem(),
-            'matching': GraphMatchingProblem()
-        }
+    PROBLEM_FACTORIES = {
+        'tsp': TSPProblem,
+        'knapsack': KnapsackProblem,
+        'matching': GraphMatchingProblem
+    }
+    REGISTRY.allow('problem', PROBLEM_FACTORIES)
+    
+    def __init__(self, preload: List[str] = None, cost_model=None, admission=None):
+        """``preload`` lists problems to build and warm up now instead of on first use.
+
+        ``cost_model`` (a ``costmodel.CostModel``, built-in coefficients by
+        default) drives ``algorithm='auto'``; with an ``admission``
+        controller every run is gated on its predicted cost.
+        """
+        self.problems = LazyProblems(self.PROBLEM_FACTORIES)
+        self.cost_model = cost_model
+        self.admission = admission
+        self._batch_runner = None
+        self._batch_lock = threading.Lock()
+        # (problem_type, real path) -> parsed, preprocessed problem; see preload_dataset
+        self.datasets = {}
+        for problem_type in preload or []:
+            self.problems[problem_type].warm_up()
     
-    def solve(self, problem_type: str, algorithm: str, filepath: str) -> Dict[str, Any]:
+    @classmethod
+    def register_problem(cls, name: str, factory):
+        """Register a problem class or ``'module:Class'`` path under ``name``."""
+        cls.PROBLEM_FACTORIES[name] = factory
+        REGISTRY.allow('problem', [name])
+    
+    def solve(self, problem_type: str, algorithm: str, filepath: str, trace=None,
+              track_memory: bool = False, params: Dict[str, Any] = None,
+              budget: float = None) -> Dict[str, Any]:
+        """Solve one instance.
+
+        ``trace`` controls step recording: ``False`` disables it, or a dict with
+        ``enabled``, ``every`` (record every k-th step) and ``max_frames``.
+        ``track_memory`` adds the peak traced heap (MiB) as ``memory_used``.
+        ``params`` are problem parameters such as a knapsack ``capacity`` override.
+        ``algorithm='auto'`` picks the strongest algorithm predicted to finish
+        within ``budget`` seconds; the result's ``selection`` says why.
+        """
         problem = self.problems.get(problem_type)
         if not problem:
             raise ValueError(f"Unknown problem type: {problem_type}")
-        
-        problem.load_data(filepath)
-        start_time = time.time()
-        
-        if algorithm == 'greedy':
-            solution = problem.greedy_solution()
-        elif algorithm == 'dp':
-            solution = problem.dynamic_programming_solution()
-        elif algorithm == 'backtracking':
-            solution = problem.backtracking_solution()
-        elif algorithm == 'branchbound':
-            solution = problem.branch_and_bound_solution()
-        elif algorithm == 'divideconquer':
-            solution = problem.divide_and_conquer_solution()
+        params = params or {}
+        preloaded = self.datasets.get((problem_type, os.path.realpath(filepath)))
+        if preloaded is not None and not set(preloaded.LOAD_PARAMS) & set(params):
+            # Shallow copy: per-call attributes are private, the parsed arrays stay shared
+            problem = copy.copy(preloaded)
         else:
-            raise ValueError(f"Unknown algorithm: {algorithm}")
+            preloaded = None
         
-        execution_time = time.time() - start_time
+        timer = PhaseTimer()
+        problem.trace_options = trace
+        problem.counters = {}
+        problem.params = params
+        try:
+            with track_peak_memory(track_memory) as memory:
+                with timer.phase('parse'):
+                    if preloaded is None:
+                        self._load(problem, problem_type, filepath)
+                selection = None
+                if algorithm == 'auto':
+                    selection = self._cost_model().choose(
+                        problem_type, problem.features(), budget,
+                        self.admission.max_memory_mb if self.admission else None,
+                        problem.EXACT_LIMITS)
+                    algorithm = selection['algorithm']
+                with self._admit(problem_type, algorithm, problem, selection):
+                    with timer.phase('preprocess'):
+                        if preloaded is None:
+                            problem.preprocess()
+                    with timer.phase('solve'):
+                        solution = problem.run(algorithm)
+        except Exception:
+            REGISTRY.observe_run(problem_type, algorithm, timer.phases, status='error')
+            raise
         
-        return {
+        counters = problem.counters
+        REGISTRY.observe_run(problem_type, algorithm, timer.phases, counters)
+        
+        result = {
             'solution': solution,
-            'execution_time': execution_time,
+            'execution_time': timer.phases['solve'],
+            'phases': timer.phases,
+            'counters': counters,
+            'memory_used': memory['peak_mb'],
             'algorithm': algorithm,
             'problem_type': problem_type,
             'timestamp': time.time()
         }
+        if selection:
+            result['selection'] = selection
+        return result
     
-    def hybrid_solve(self, problem_type: str, algorithms: List[str], filepath: str) -> Dict[str, Any]:
-        """Run multiple algorithms and combine results"""
+    @staticmethod
+    def _load(problem, problem_type, filepath):
+        if is_binary_instance(filepath):
+            loaded_type, arrays, meta = read_instance(filepath)
+            if loaded_type != problem_type:
+                raise ValueError(f"{filepath} holds a {loaded_type} instance")
+            problem.load_arrays(arrays, meta)
+        else:
+            problem.load_data(filepath)
+    
+    def preload_dataset(self, problem_type: str, filepath: str):
+        """Parse and preprocess ``filepath`` now; later solves of it skip both steps.
+
+        Called in a prefork master, the arrays (distance matrices, weights,
+        graphs) are built once and shared copy-on-write by every worker.
+        Requests with ``LOAD_PARAMS`` (e.g. a knapsack capacity override)
+        still read the file themselves.
+        """
+        template = self.problems.get(problem_type)
+        if not template:
+            raise ValueError(f"Unknown problem type: {problem_type}")
+        problem = type(template)()
+        problem.params = {}
+        self._load(problem, problem_type, filepath)
+        problem.preprocess()
+        self.datasets[(problem_type, os.path.realpath(filepath))] = problem
+        return problem
+    
+    def _cost_model(self):
+        if self.cost_model is None:
+            from costmodel import CostModel
+            self.cost_model = CostModel()
+        return self.cost_model
+    
+    def _price(self, problem_type, algorithm, problem):
+        """Predicted ``(seconds, memory_mb)`` of a run on a loaded problem, or None if unpriced."""
+        features = problem.features()
+        # Price the solver that actually runs: aliases redirect, and above its
+        # size limit an exact algorithm runs greedy
+        limit = problem.EXACT_LIMITS.get(algorithm)
+        effective = problem.ALIASES.get(algorithm, algorithm)
+        if limit is not None and features['n'] > limit:
+            effective = 'greedy'
+        if effective in METAHEURISTICS:
+            # Bounded by their time limit rather than by a size-based model
+            from metaheuristics import DEFAULT_TIME_LIMIT
+            return float(problem.params.get('time_limit', DEFAULT_TIME_LIMIT)), 0.0
+        if not self._cost_model().covers(problem_type, effective):
+            return None
+        estimate = self._cost_model().estimate(problem_type, effective, features)
+        return estimate['seconds'], estimate['memory_mb']
+
+    def _admit(self, problem_type, algorithm, problem, selection):
+        if self.admission is None:
+            return nullcontext()
+        if selection is None:
+            cost = self._price(problem_type, algorithm, problem)
+            if cost is None:
+                return nullcontext()  # nothing to price it with; run it ungated
+            seconds, memory_mb = cost
+        else:
+            seconds, memory_mb = selection['predicted_seconds'], selection['predicted_memory_mb']
+        return self.admission.admit(seconds, memory_mb)
+
+    def _price_batch(self, classes, instances, problem_type, algorithm, limits):
+        """Summed predicted seconds and largest predicted memory of a batch's valid instances."""
+        from batch import limit_error
+        seconds = memory_mb = 0.0
+        for instance in instances:
+            if not isinstance(instance, dict) or not isinstance(instance.get('data'), dict):
+                continue
+            name = instance.get('problem_type', problem_type)
+            params = instance.get('params') or {}
+            if name not in classes or limit_error(name, instance['data'], params, limits):
+                continue
+            problem = classes[name]()
+            problem.params = params
+            try:
+                problem.load_inline(instance['data'])
+                cost = self._price(name, instance.get('algorithm', algorithm), problem)
+            except Exception:
+                continue  # reported as a failed instance by the batch itself
+            if cost is not None:
+                seconds += cost[0]
+                memory_mb = max(memory_mb, cost[1])
+        return seconds, memory_mb
+
+    @staticmethod
+    def _gated(admission, results):
+        with admission:
+            yield
+            yield from results
+    
+    def solve_batch(self, instances: List[Dict[str, Any]], problem_type: str = None,
+                    algorithm: str = None, workers: int = None, chunk_size: int = None,
+                    limits: Dict[str, int] = None):
+        """Solve many inline instances; yields one result per instance as chunks finish.
+
+        Each instance is ``{"data": {...}}`` with optional ``id``,
+        ``problem_type``, ``algorithm`` and ``params`` (defaulting to the
+        arguments).  Results carry the instance ``index`` since they arrive in
+        completion order.  ``workers`` sizes the process pool on first use;
+        instances over the upload ``limits`` fail.  With an admission
+        controller the whole batch is admitted on its summed predicted cost
+        before this returns (raising ``AdmissionError``) and held until the
+        results are consumed.
+        """
+        with self._batch_lock:
+            if self._batch_runner is None:
+                from batch import BatchRunner
+                self._batch_runner = BatchRunner(workers)
+        requested = {i.get('problem_type', problem_type) for i in instances if isinstance(i, dict)}
+        classes = {name: type(self.problems[name]) for name in requested
+                   if name in self.problems.factories}
+        results = self._batch_runner.run(classes, instances, problem_type, algorithm, chunk_size,
+                                         limits)
+        if self.admission is None:
+            return results
+        seconds, memory_mb = self._price_batch(classes, instances, problem_type, algorithm, limits)
+        gated = self._gated(self.admission.admit(seconds, memory_mb), results)
+        next(gated)  # admit now; closing the generator releases the capacity
+        return gated
+    
+    def hybrid_solve(self, problem_type: str, algorithms: List[str], filepath: str, trace=None,
+                     params: Dict[str, Any] = None) -> Dict[str, Any]:
+        """Run multiple algorithms and combine results.
+
+        ``params`` go to every run (e.g. ``restarts`` and ``seed`` for the
+        metaheuristics); ``start_stats`` has the per-start objective
+        statistics of each multi-start algorithm.
+        """
         results = []
         for algorithm in algorithms:
-            result = self.solve(problem_type, algorithm, filepath)
+            result = self.solve(problem_type, algorithm, filepath, trace=trace, params=params)
             results.append(result)
         
         # Return the best solution
-        best_result = min(results, key=lambda r: r['solution'].get('distance', float('inf')) 
-                                        if 'distance' in r['solution'] 
-                                        else -r['solution'].get('total_value', float('-inf')))
+        def objective(r):
+            solution = r['solution']
+            if 'distance' in solution:
+                return solution['distance']
+            if 'total_value' in solution:
+                return -solution['total_value']
+            return -solution.get('matching_size', float('-inf'))
+        best_result = min(results, key=objective)
         
         return {
             'best_solution': best_result,
             'all_results': results,
+            'start_stats': {r['algorithm']: r['solution']['restart_summary']
+                            for r in results if 'restart_summary' in r['solution']},
             'hybrid_method': 'best_of_' + '_'.join(algorithms)
         }
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""The one process pool shared by batch solving and multi-start metaheuristics.
+
+The server runs request threads and the history writer thread, and a plain
+``fork`` copies whatever locks those threads hold at that moment into the
+child, where nobody will ever release them.  Workers are therefore started
+with ``forkserver`` on POSIX (forked from a small single-threaded server
+process that has the solver modules imported) and ``spawn`` elsewhere.
+"""
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Imported once by the fork server so each worker starts with them loaded
+PRELOAD = ['numpy', 'optimizer', 'batch', 'metaheuristics']
+# Upper bound on pool size whatever a request or setting asks for
+MAX_WORKERS = os.cpu_count() or 1
+
+_pool = None
+_pool_workers = 0
+_lock = threading.Lock()
+
+
+def _context():
+    if 'forkserver' in multiprocessing.get_all_start_methods():
+        context = multiprocessing.get_context('forkserver')
+        context.set_forkserver_preload(PRELOAD)
+        return context
+    return multiprocessing.get_context('spawn')
+
+
+def get_pool(workers: int) -> ProcessPoolExecutor:
+    """Shared pool of at least ``workers`` processes, capped at MAX_WORKERS; it only grows."""
+    global _pool, _pool_workers
+    workers = max(1, min(int(workers), MAX_WORKERS))
+    with _lock:
+        if _pool is None or _pool_workers < workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False)  # work already submitted still finishes
+            _pool = ProcessPoolExecutor(workers, mp_context=_context())
+            _pool_workers = workers
+        return _pool
+
+
+def shutdown():
+    """Stop the pool, cancelling queued work; the next ``get_pool`` starts a new one."""
+    global _pool, _pool_workers
+    with _lock:
+        if _pool is not None:
+            _pool.shutdown(cancel_futures=True)
+            _pool, _pool_workers = None, 0
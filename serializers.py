@@ -0,0 +1,135 @@
+"""Response serialization for solver results.
+
+Solver results mix NumPy scalars and arrays (traces are NumPy arrays), tuples
+and plain Python containers.  This module encodes them without a pre-pass through
+``jsonify``'s type coercion and picks the wire format from the request:
+
+* ``application/json`` (default) - ``orjson`` when installed, stdlib otherwise
+* ``application/msgpack`` - MessagePack with NumPy arrays as raw typed blobs
+  (requires ``msgpack``)
+
+Bodies above ``COMPRESSION_MIN_BYTES`` are compressed with ``br`` (requires
+``brotli``) or ``gzip`` depending on ``Accept-Encoding``.
+"""
+import gzip
+import json
+from array import array
+
+import numpy as np
+from flask import Response
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MIMETYPE = 'application/json'
+MSGPACK_MIMETYPE = 'application/msgpack'
+COMPRESSION_MIN_BYTES = 1024
+
+# Marker key for NumPy arrays packed as raw bytes in MessagePack bodies
+NDARRAY_KEY = '__ndarray__'
+
+
+def default(obj):
+    """Fallback for types the JSON encoders don't know about."""
+    if isinstance(obj, np.integer):
+        return int(obj)
+    if isinstance(obj, np.floating):
+        return float(obj)
+    if isinstance(obj, np.bool_):
+        return bool(obj)
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, array):
+        return obj.tolist()
+    if isinstance(obj, (set, frozenset)):
+        return list(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps_json(payload) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(payload, default=default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(payload, default=default, separators=(',', ':')).encode('utf-8')
+
+
+def _msgpack_default(obj):
+    if isinstance(obj, np.ndarray):
+        obj = np.ascontiguousarray(obj)
+        return {NDARRAY_KEY: True, 'dtype': obj.dtype.str, 'shape': list(obj.shape),
+                'data': obj.tobytes()}
+    if isinstance(obj, array):
+        return {NDARRAY_KEY: True, 'dtype': np.dtype(obj.typecode).str, 'shape': [len(obj)],
+                'data': obj.tobytes()}
+    return default(obj)
+
+
+def dumps_msgpack(payload) -> bytes:
+    if msgpack is None:
+        raise RuntimeError("msgpack is not installed")
+    return msgpack.packb(payload, default=_msgpack_default, use_bin_type=True)
+
+
+def loads_msgpack(body: bytes):
+    """Decode a MessagePack body, restoring packed arrays as NumPy arrays."""
+    def hook(obj):
+        if obj.get(NDARRAY_KEY):
+            return np.frombuffer(obj['data'], dtype=obj['dtype']).reshape(obj['shape'])
+        return obj
+    return msgpack.unpackb(body, object_hook=hook, raw=False, strict_map_key=False)
+
+
+def negotiate_format(req) -> str:
+    if msgpack is not None and req.accept_mimetypes.best_match(
+            [JSON_MIMETYPE, MSGPACK_MIMETYPE], default=JSON_MIMETYPE) == MSGPACK_MIMETYPE:
+        return MSGPACK_MIMETYPE
+    return JSON_MIMETYPE
+
+
+def compress(body: bytes, accept_encoding: str):
+    """Return ``(body, content_encoding)`` compressed per ``Accept-Encoding``."""
+    if len(body) < COMPRESSION_MIN_BYTES or not accept_encoding:
+        return body, None
+    encodings = {e.split(';')[0].strip() for e in accept_encoding.split(',')}
+    if brotli is not None and 'br' in encodings:
+        return brotli.compress(body, quality=4), 'br'
+    if 'gzip' in encodings:
+        return gzip.compress(body, compresslevel=5), 'gzip'
+    return body, None
+
+
+def respond(payload, req, status: int = 200) -> Response:
+    """Encode ``payload`` in the format and encoding the request asked for."""
+    mimetype = negotiate_format(req)
+    body = dumps_msgpack(payload) if mimetype == MSGPACK_MIMETYPE else dumps_json(payload)
+    body, encoding = compress(body, req.headers.get('Accept-Encoding', ''))
+
+    response = Response(body, status=status, mimetype=mimetype)
+    if encoding:
+        response.headers['Content-Encoding'] = encoding
+    response.headers['Vary'] = 'Accept, Accept-Encoding'
+    return response
+
+
+class NumpyJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider so plain ``jsonify`` calls also accept NumPy types."""
+
+    @staticmethod
+    def default(obj):
+        try:
+            return default(obj)
+        except TypeError:
+            return DefaultJSONProvider.default(obj)
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Optimization Galaxy - production server.
+
+Runs gunicorn with gunicorn.conf.py: a master that preloads the solvers and
+datasets, forking WEB_WORKERS workers that share them.  Flags override the
+environment settings in config.py.  ``/ready`` is the readiness probe.
+TSP sessions live in one worker, so more than one worker needs sticky
+routing (see gunicorn.conf.py).
+
+    python serve.py
+    python serve.py --workers 8 --threads 2 --bind 0.0.0.0:8000
+
+Gunicorn needs Linux or macOS; on Windows use run.py (development server).
+"""
+import argparse
+import os
+import sys
+
+OVERRIDES = (('bind', 'BIND'), ('workers', 'WEB_WORKERS'), ('threads', 'WEB_THREADS'),
+             ('max_requests', 'WORKER_MAX_REQUESTS'),
+             ('max_memory_growth', 'WORKER_MAX_MEMORY_GROWTH_MB'))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bind', help='address to listen on (BIND)')
+    parser.add_argument('--workers', type=int, help='worker processes (WEB_WORKERS)')
+    parser.add_argument('--threads', type=int, help='threads per worker (WEB_THREADS)')
+    parser.add_argument('--max-requests', type=int,
+                        help='recycle workers after this many requests (WORKER_MAX_REQUESTS)')
+    parser.add_argument('--max-memory-growth', type=float,
+                        help='recycle workers past this much private memory growth, MB '
+                             '(WORKER_MAX_MEMORY_GROWTH_MB)')
+    args = parser.parse_args(argv)
+    for option, variable in OVERRIDES:
+        if getattr(args, option) is not None:
+            os.environ[variable] = str(getattr(args, option))
+
+    try:
+        from gunicorn.app.wsgiapp import WSGIApplication
+    except ImportError:
+        print("❌ gunicorn is not installed (pip install -r requirements.txt); "
+              "on Windows use run.py instead")
+        return 1
+
+    print("🚀 Starting Optimization Galaxy (prefork)")
+    here = os.path.dirname(os.path.abspath(__file__))
+    os.chdir(here)  # bundled datasets and uploads are relative paths
+    sys.argv = [sys.argv[0], '-c', os.path.join(here, 'gunicorn.conf.py'), 'app:app']
+    WSGIApplication('%(prog)s [OPTIONS] [APP_MODULE]').run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
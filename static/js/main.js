@@ -116,7 +116,7 @@ function setupDragAndDrop() {
 
     function handleUpload() {
         if (selectedFile) {
-            simulateUpload(selectedFile);
+            uploadDataset(selectedFile);
         }
     }
 
@@ -145,31 +145,48 @@ function handleFiles(files) {
         const fileName = file.name.toLowerCase();
         
         if (fileName.endsWith('.tsp') || fileName.endsWith('.csv') || fileName.endsWith('.json')) {
-            // Simulate upload process
-            simulateUpload(file);
+            uploadDataset(file);
         } else {
             showNotification('Invalid file type. Please upload .tsp, .csv, or .json files.', 'error');
         }
     }
 }
 
-function simulateUpload(file) {
+async function uploadDataset(file) {
     const progressBar = document.createElement('div');
     progressBar.className = 'upload-progress';
     document.getElementById('drop-zone').appendChild(progressBar);
     
     anime({
         targets: progressBar,
-        width: ['0%', '100%'],
+        width: ['0%', '90%'],
         duration: 2000,
-        easing: 'easeOutQuad',
-        complete: () => {
+        easing: 'easeOutQuad'
+    });
+    
+    try {
+        // Raw body so the server can stream it straight into the parser
+        const response = await fetch(`/api/upload?filename=${encodeURIComponent(file.name)}`, {
+            method: 'POST',
+            headers: {'Content-Type': 'application/octet-stream'},
+            body: file
+        });
+        const result = await response.json();
+        
+        if (result.success) {
+            // Remember the instance so later solves can reference it
+            localStorage.setItem(`galaxy-instance-${result.problem_type}`, result.instance_id);
             showNotification(`File "${file.name}" uploaded successfully!`, 'success');
-            progressBar.remove();
-            // Optionally close modal on success
             setTimeout(closeUploadModal, 1000);
+        } else {
+            showNotification(`Upload failed: ${result.error}`, 'error');
         }
-    });
+    } catch (error) {
+        console.error('Upload failed:', error);
+        showNotification('Network error. Please try again.', 'error');
+    } finally {
+        progressBar.remove();
+    }
 }
 
 // Strategy Mixer
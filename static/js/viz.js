@@ -122,6 +122,63 @@ class VisualizationManager {
             this.ctx.shadowBlur = 0;
         }
     }
+    
+    // Level-of-detail view from /api/lod/.../view or /tiles/z/x/y (binary body)
+    async loadLOD(url) {
+        const response = await fetch(url);
+        if (!response.ok) {
+            throw new Error(`LOD request failed: ${response.status}`);
+        }
+        const view = decodeLOD(await response.arrayBuffer());
+        this.visualizeLOD(view);
+        return view;
+    }
+    
+    visualizeLOD(view) {
+        this.drawInitialState();
+        const [x0, y0, x1, y1] = view.meta.viewport;
+        const sx = this.canvas.width / (x1 - x0);
+        const sy = this.canvas.height / (y1 - y0);
+        
+        // Tour polylines; path_starts marks where the tour re-enters the view
+        const path = view.path;
+        const starts = new Set(view.path_starts);
+        this.ctx.strokeStyle = '#22d3ee';
+        this.ctx.lineWidth = 1.5;
+        this.ctx.beginPath();
+        for (let i = 0; i < path.length / 2; i++) {
+            const x = (path[2 * i] - x0) * sx;
+            const y = (path[2 * i + 1] - y0) * sy;
+            if (starts.has(i)) {
+                this.ctx.moveTo(x, y);
+            } else {
+                this.ctx.lineTo(x, y);
+            }
+        }
+        this.ctx.stroke();
+        
+        // Cities, one dot per cluster sized by how many it stands for
+        this.ctx.fillStyle = '#06b6d4';
+        const points = view.points;
+        for (let i = 0; i < view.counts.length; i++) {
+            const radius = Math.min(8, 2 + Math.log2(view.counts[i]));
+            this.ctx.beginPath();
+            this.ctx.arc((points[2 * i] - x0) * sx, (points[2 * i + 1] - y0) * sy, radius, 0, 2 * Math.PI);
+            this.ctx.fill();
+        }
+    }
+}
+
+// Decode a binary LOD body: uint32 header length, JSON header, 8-byte aligned typed arrays
+function decodeLOD(buffer) {
+    const headerLength = new DataView(buffer).getUint32(0, true);
+    const header = JSON.parse(new TextDecoder().decode(new Uint8Array(buffer, 4, headerLength)));
+    const types = { float32: Float32Array, uint32: Uint32Array };
+    const view = { meta: header.meta };
+    for (const [name, spec] of Object.entries(header.arrays)) {
+        view[name] = new types[spec.dtype](buffer, spec.offset, spec.length);
+    }
+    return view;
 }
 
 // Performance Charts
@@ -205,10 +262,48 @@ function runOptimization() {
     vizManager.isRunning = true;
     document.getElementById('run-btn').disabled = true;
     
+    // A large uploaded TSP instance is solved on the server and drawn from a LOD view
+    const instanceId = vizManager.canvas.dataset.problemType === 'tsp'
+        && localStorage.getItem('galaxy-instance-tsp');
+    if (instanceId) {
+        drawLargeInstance(instanceId, selectedAlgorithms[0])
+            .then(drawn => drawn ? finishOptimization() : simulateOptimization(selectedAlgorithms))
+            .catch(error => {
+                showNotification(error.message, 'error');
+                finishOptimization();
+            });
+        return;
+    }
+    
     // Simulate optimization process (replace with actual API call)
     simulateOptimization(selectedAlgorithms);
 }
 
+// Instances with at least this many cities are drawn from /api/lod views
+const LOD_MIN_CITIES = 1000;
+
+async function drawLargeInstance(instanceId, algorithm) {
+    const response = await fetch(`/api/instances/${instanceId}`);
+    if (!response.ok) {
+        return false;  // gone from the server; fall back to the demo
+    }
+    const instance = await response.json();
+    if (instance.summary.n < LOD_MIN_CITIES) {
+        return false;
+    }
+    const start = performance.now();
+    const query = new URLSearchParams({
+        algorithm,
+        width: vizManager.canvas.width,
+        height: vizManager.canvas.height
+    });
+    const view = await vizManager.loadLOD(`/api/lod/instances/${instanceId}/view?${query}`);
+    document.getElementById('iterations').textContent = view.meta.cities;
+    document.getElementById('execution-time').textContent =
+        ((performance.now() - start) / 1000).toFixed(1) + 's';
+    return true;
+}
+
 function simulateOptimization(algorithms) {
     let step = 0;
     const cities = generateRandomCities(15);
@@ -0,0 +1,92 @@
+"""Bitset subset-sum engine for knapsack reachability queries.
+
+Bit ``s`` of a Python int is set when some subset of the items weighs
+exactly ``s``; adding an item of weight ``w`` is one shift-OR,
+``bits |= bits << w``, which CPython runs over 30-bit digits, so a pass
+over the items costs about ``n * capacity / 30`` word operations instead of
+the value DP's ``n * capacity`` Python-level cells.  Capacities in the tens
+of millions take a few megabytes per bitset.
+
+Witnesses are rebuilt without keeping one bitset per item: the bitset is
+checkpointed every ``sqrt(n)`` items, and walking back one block at a time
+recomputes only that block's intermediate bitsets.
+"""
+import math
+
+import numpy as np
+
+
+def reachable(weights, capacity: int) -> int:
+    """Bitset of every subset weight up to ``capacity`` (bit 0: the empty set)."""
+    mask = (1 << (capacity + 1)) - 1
+    bits = 1
+    for w in weights:
+        if w <= capacity:
+            bits |= (bits << int(w)) & mask
+    return bits
+
+
+def best_fill(weights, capacity: int) -> int:
+    """Largest subset weight that fits in ``capacity``."""
+    return reachable(weights, capacity).bit_length() - 1
+
+
+def max_fill(weights, capacity: int) -> int:
+    """Pruning helper for the exact solvers: no feasible selection weighs more.
+
+    Bounds and tables built for this capacity instead of ``capacity`` are
+    still exact but tighter (or smaller).  Skips the bitset when every item
+    fits together.
+    """
+    total = int(np.sum(weights)) if len(weights) else 0
+    return total if total <= capacity else best_fill(weights, capacity)
+
+
+def is_set(bits: int, s: int) -> bool:
+    return s >= 0 and (bits >> s) & 1 == 1
+
+
+def witness(weights, capacity: int, target: int):
+    """Indices of items weighing exactly ``target`` in total, or None if unreachable."""
+    if target < 0 or target > capacity:
+        return None
+    weights = [int(w) for w in weights]
+    n = len(weights)
+    mask = (1 << (target + 1)) - 1  # sums above the target never lead back to it
+    block = max(1, math.isqrt(n))
+    checkpoints = [1]  # bitset before items block * k
+    bits = 1
+    for i, w in enumerate(weights):
+        if w <= target:
+            bits |= (bits << w) & mask
+        if (i + 1) % block == 0:
+            checkpoints.append(bits)
+    if not is_set(bits, target):
+        return None
+
+    chosen = []
+    s = target
+    for k in range((n - 1) // block, -1, -1):
+        # Bitsets before each item of block k, recomputed from its checkpoint
+        before = []
+        bits = checkpoints[k]
+        for i in range(k * block, min(n, (k + 1) * block)):
+            before.append(bits)
+            if weights[i] <= target:
+                bits |= (bits << weights[i]) & mask
+        for i in range(min(n, (k + 1) * block) - 1, k * block - 1, -1):
+            # Still reachable without item i: leave it out
+            if not is_set(before[i - k * block], s):
+                chosen.append(i)
+                s -= weights[i]
+    chosen.reverse()
+    return chosen
+
+
+def summarize(bits: int, capacity: int) -> dict:
+    """Reachability facts of a bitset: count of reachable weights and the best fill."""
+    return {
+        'reachable_count': bits.bit_count() if hasattr(bits, 'bit_count') else bin(bits).count('1'),
+        'best_fill': bits.bit_length() - 1,
+        'capacity': capacity,
+    }
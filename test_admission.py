@@ -0,0 +1,42 @@
+"""Admission control must let every algorithm through for every problem type.
+
+    python -m pytest -q test_admission.py
+"""
+import pytest
+
+from costmodel import AdmissionController, AdmissionError
+from optimizer import ALGORITHMS, OptimizationFramework
+
+DATASETS = {
+    'tsp': 'data/tsp/berlin52.tsp',
+    'knapsack': 'data/knapsack/sample1.csv',
+    'matching': 'data/matching/bipartite5.json',
+}
+
+
+@pytest.fixture(scope='module')
+def framework():
+    return OptimizationFramework(admission=AdmissionController(max_seconds=600,
+                                                               max_memory_mb=4096))
+
+
+@pytest.mark.parametrize('problem_type', sorted(DATASETS))
+@pytest.mark.parametrize('algorithm', sorted(ALGORITHMS))
+def test_every_algorithm_is_admitted(framework, problem_type, algorithm):
+    try:
+        result = framework.solve(problem_type, algorithm, DATASETS[problem_type],
+                                 trace=False, params={'time_limit': 0.2})
+    except AdmissionError as e:
+        pytest.fail(f"{problem_type}/{algorithm} refused: {e}")
+    except ValueError as e:
+        # No solver for this pair, or the sample lacks its columns; not admission's doing
+        assert 'cost model' not in str(e), f"{problem_type}/{algorithm}: {e}"
+    else:
+        assert result['solution'] is not None
+
+
+def test_pair_without_cost_model_runs_ungated():
+    framework = OptimizationFramework(admission=AdmissionController(max_seconds=1e-9))
+    problem = framework.problems['matching']
+    with framework._admit('matching', 'no-such-solver', problem, None):
+        pass
@@ -0,0 +1,112 @@
+"""Request validation in the Flask API, through Flask's test client (no server needed).
+
+    python -m pytest -q test_app.py
+"""
+import pytest
+
+import app as galaxy
+
+
+@pytest.fixture
+def client():
+    return galaxy.app.test_client()
+
+
+@pytest.mark.parametrize('limit', ['0', '-5', '1', '100000'])
+def test_history_limit_is_clamped(client, limit):
+    response = client.get(f'/api/history?limit={limit}')
+    assert response.status_code == 200
+    assert isinstance(response.get_json(), list)
+
+
+@pytest.mark.parametrize('limit', ['abc', '1.5', ''])
+def test_history_limit_must_be_an_integer(client, limit):
+    if galaxy.history_store is None:
+        pytest.skip('run history disabled')
+    response = client.get(f'/api/history?limit={limit}')
+    assert response.status_code == 400
+    assert response.get_json()['error'] == "'limit' must be an integer"
+
+
+@pytest.fixture
+def small_uploads(tmp_path, monkeypatch):
+    from uploads import DEFAULT_LIMITS, InstanceStore
+    instances = InstanceStore(str(tmp_path), dict(DEFAULT_LIMITS, MAX_UPLOAD_BYTES=64,
+                                                  MAX_KNAPSACK_ITEMS=3))
+    monkeypatch.setattr(galaxy, 'instance_store', instances)
+    return instances
+
+
+def test_upload_is_stored_and_listed(client, small_uploads):
+    response = client.post('/api/upload?problem_type=knapsack',
+                           data=b'weight,value,capacity\n2,3,5\n3,4,5\n')
+    assert response.status_code == 200
+    instance_id = response.get_json()['instance_id']
+    assert client.get(f'/api/instances/{instance_id}').get_json()['summary']['n'] == 2
+
+
+@pytest.mark.parametrize('body', [b'weight,value,capacity\n' + b'1,1,5\n' * 20,
+                                  b'weight,value,capacity\n' + b'1,1,5\n' * 4])
+def test_upload_over_a_limit_answers_413(client, small_uploads, body):
+    response = client.post('/api/upload?filename=big.csv', data=body)
+    assert response.status_code == 413
+    assert response.get_json()['success'] is False
+
+
+def test_upload_needs_a_problem_type(client, small_uploads):
+    response = client.post('/api/upload', data=b'1,2\n')
+    assert response.status_code == 400
+
+
+def test_admission_budget_is_split_between_processes(monkeypatch):
+    monkeypatch.setitem(galaxy.app.config, 'SOLVER_CAPACITY_SECONDS', 30.0)
+    monkeypatch.setitem(galaxy.app.config, 'SERVER_PROCESSES', 4)
+    assert galaxy.process_capacity() == 7.5
+    monkeypatch.setitem(galaxy.app.config, 'SOLVER_CAPACITY_SECONDS', None)
+    assert galaxy.process_capacity() is None
+
+
+def test_sessions_can_be_disabled(client, monkeypatch):
+    monkeypatch.setitem(galaxy.app.config, 'TSP_SESSIONS_ENABLED', False)
+    response = client.post('/api/tsp/sessions', json={'coordinates': [[0, 0], [1, 1]]})
+    assert response.status_code == 404
+
+
+def test_batch_results_are_recorded_in_history(client, monkeypatch):
+    recorded = []
+
+    class Writer:
+        def record(self, *args, **kwargs):
+            recorded.append((args, kwargs))
+
+    monkeypatch.setattr(galaxy, 'history_writer', Writer())
+    instances = [{'data': {'weights': [2, 3], 'values': [3, 4], 'capacity': 4},
+                  'params': {'capacity': 3}},
+                 {'data': {'weights': [1], 'values': [1]}}]
+    response = client.post('/api/solve/batch', json={'problem_type': 'knapsack',
+                                                     'algorithm': 'greedy',
+                                                     'instances': instances})
+    assert response.status_code == 200
+    assert response.get_data(as_text=True).count('\n') == 3
+    (args, kwargs), = recorded
+    assert args[:3] == ('knapsack', 'greedy', 'inline')
+    assert kwargs['parameters'] == {'capacity': 3}
+
+
+def test_solve_returns_the_trace_as_json_lists(client):
+    response = client.post('/api/solve', json={'problem_type': 'tsp', 'algorithms': ['greedy']})
+    trace = response.get_json()['best_result']['solution']['trace']
+    assert isinstance(trace['items'], list) and trace['frames'][-1] == len(trace['items'])
+
+
+def test_lod_views_of_an_uploaded_instance(client, tmp_path, monkeypatch):
+    from uploads import DEFAULT_LIMITS, InstanceStore
+    monkeypatch.setattr(galaxy, 'instance_store', InstanceStore(str(tmp_path), DEFAULT_LIMITS))
+    body = 'DIMENSION: 4\nNODE_COORD_SECTION\n1 0 0\n2 10 0\n3 10 10\n4 0 10\nEOF\n'
+    instance_id = client.post('/api/upload?problem_type=tsp', data=body).get_json()['instance_id']
+    view = client.get(f'/api/lod/instances/{instance_id}/view?algorithm=greedy&format=json').get_json()
+    assert view['meta']['cities'] == 4 and len(view['path']) == 5
+    binary = client.get(f'/api/lod/instances/{instance_id}/tiles/1/0/0')
+    assert binary.mimetype == 'application/octet-stream'
+    assert client.get(f'/api/lod/instances/{instance_id}/tiles/1/2/0').status_code == 400
+    assert client.get('/api/lod/instances/0123abcd/view').status_code == 404
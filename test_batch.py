@@ -0,0 +1,108 @@
+"""Batch solving: the stacked knapsack DP against brute force.
+
+    python -m pytest -q test_batch.py
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+from batch import stacked_knapsack_dp
+
+
+def brute_force(weights, values, capacity):
+    best = 0
+    for mask in itertools.product([False, True], repeat=len(weights)):
+        mask = np.asarray(mask, dtype=bool)
+        if weights[mask].sum() <= capacity:
+            best = max(best, values[mask].sum())
+    return best
+
+
+@pytest.mark.parametrize('floats', [False, True])
+def test_stacked_dp_matches_brute_force(floats):
+    rng = np.random.default_rng(7)
+    instances = []
+    for _ in range(40):
+        n = int(rng.integers(0, 10))
+        weights = rng.integers(0, 15, n).astype(np.int64)
+        values = rng.integers(0, 30, n)
+        values = values + rng.random(n) if floats else values.astype(np.int64)
+        instances.append((weights, values, int(rng.integers(0, 40))))
+
+    for (weights, values, capacity), solution in zip(instances,
+                                                     stacked_knapsack_dp(instances)):
+        selected = solution['selected_items']
+        assert len(set(selected)) == len(selected)
+        assert weights[selected].sum() <= capacity
+        assert solution['total_weight'] == weights[selected].sum()
+        assert solution['total_value'] == pytest.approx(values[selected].sum())
+        assert solution['total_value'] == pytest.approx(brute_force(weights, values, capacity))
+
+
+def test_pool_and_in_process_runs_agree():
+    from batch import BatchRunner
+    from optimizer import KnapsackProblem, TSPProblem
+
+    rng = np.random.default_rng(3)
+    instances = [{'id': k, 'problem_type': 'knapsack', 'algorithm': algorithm,
+                  'data': {'weights': rng.integers(1, 10, 8).tolist(),
+                           'values': rng.integers(1, 20, 8).tolist(), 'capacity': 20}}
+                 for k in range(24) for algorithm in ('dp', 'greedy')]
+    classes = {'knapsack': KnapsackProblem, 'tsp': TSPProblem}
+
+    def solve(workers):
+        results = BatchRunner(workers, chunk_size=4).run(classes, instances)
+        return {(r['id'], r['algorithm']): r['solution']['total_value'] for r in results}
+
+    pooled = solve(2)
+    assert len(pooled) == len(instances)
+    assert pooled == solve(1)
+
+
+def knapsack_instances(count, capacity=20, algorithm='dp'):
+    return [{'id': k, 'problem_type': 'knapsack', 'algorithm': algorithm,
+             'data': {'weights': [2, 3, 4, 5], 'values': [3, 4, 5, 6], 'capacity': capacity}}
+            for k in range(count)]
+
+
+def test_inline_instances_get_the_upload_limits():
+    from batch import group_instances
+    instances = knapsack_instances(2) + knapsack_instances(1, capacity=10 ** 6)
+    instances.append({'problem_type': 'tsp', 'algorithm': 'greedy',
+                      'data': {'coordinates': [[0, 0]] * 11}})
+    groups, errors = group_instances(instances, limits={'MAX_KNAPSACK_CAPACITY': 1000,
+                                                        'MAX_TSP_DIMENSION': 10})
+    assert [len(items) for items in groups.values()] == [2]
+    assert sorted(e['index'] for e in errors) == [2, 3]
+    assert all('limit' in e['error'] for e in errors)
+
+
+def test_metaheuristics_are_refused_in_batches():
+    from batch import BatchRunner
+    from optimizer import KnapsackProblem
+
+    results = list(BatchRunner(1).run({'knapsack': KnapsackProblem},
+                                      knapsack_instances(3, algorithm='genetic')))
+    assert len(results) == 3
+    assert not any(r['success'] for r in results)
+
+
+def test_batch_is_admitted_on_its_total_cost():
+    from costmodel import AdmissionController, AdmissionError
+    from optimizer import OptimizationFramework
+
+    admission = AdmissionController(max_seconds=600)
+    framework = OptimizationFramework(admission=admission)
+    results = framework.solve_batch(knapsack_instances(5), workers=1)
+    assert admission.running == 1 and admission.in_flight > 0
+    assert sum(r['success'] for r in results) == 5
+    assert admission.running == 0 and admission.in_flight == 0
+
+    estimate = framework._cost_model().estimate('knapsack', 'dp', {'n': 4, 'capacity': 20})
+    admission.max_seconds = estimate['seconds'] * 2.5
+    framework.solve_batch(knapsack_instances(2), workers=1).close()
+    with pytest.raises(AdmissionError) as raised:
+        framework.solve_batch(knapsack_instances(3), workers=1)
+    assert raised.value.status == 413
+    assert admission.running == 0
@@ -0,0 +1,87 @@
+"""Synthetic generators: seeded output that loads back through the regular loaders.
+
+    python -m pytest -q test_generators.py
+"""
+import io
+
+import numpy as np
+import pytest
+
+import generators
+from instance_format import read_instance
+from optimizer import GraphMatchingProblem, KnapsackProblem, TSPProblem
+from uploads import DEFAULT_LIMITS, InstanceStore
+
+CLASSES = {'tsp': TSPProblem, 'knapsack': KnapsackProblem, 'matching': GraphMatchingProblem}
+FAMILIES = [(problem, family) for problem, families in generators.FAMILIES.items()
+            for family in families]
+
+
+def load(problem_type, path):
+    problem = CLASSES[problem_type]()
+    problem.params = {}
+    if path.endswith(generators.BINARY_EXTENSION):
+        loaded_type, arrays, meta = read_instance(path)
+        assert loaded_type == problem_type
+        problem.load_arrays(arrays, meta)
+    else:
+        problem.load_data(path)
+    problem.preprocess()
+    return problem
+
+
+def contents(problem_type, problem):
+    """What the loader kept, in comparable form."""
+    if problem_type == 'tsp':
+        return np.asarray(problem.coordinates).round(3).tolist()
+    if problem_type == 'knapsack':
+        return problem.weights, problem.values, problem.capacity
+    return list(problem.left_nodes), list(problem.right_nodes), sorted(map(tuple, problem.edges))
+
+
+@pytest.mark.parametrize('problem_type, family', FAMILIES)
+def test_text_and_binary_files_load_the_generated_instance(tmp_path, problem_type, family):
+    n = 40
+    arrays, meta = generators.generate(problem_type, family, n, seed=3)
+    text = load(problem_type, generators.generate_file(problem_type, family, n, seed=3,
+                                                       directory=str(tmp_path)))
+    binary = load(problem_type, generators.generate_file(problem_type, family, n, seed=3,
+                                                         directory=str(tmp_path), binary=True))
+    assert contents(problem_type, text) == contents(problem_type, binary)
+    if problem_type == 'tsp':
+        assert len(text.coordinates) == n
+        assert np.allclose(text.coordinates, arrays['coordinates'], atol=5e-4)
+    elif problem_type == 'knapsack':
+        assert text.weights == arrays['weights'].tolist() and text.capacity == meta['capacity']
+    else:
+        # Not the loader's built-in sample graph
+        assert len(text.left_nodes) == n and len(text.edges) == len(arrays['indices'])
+
+
+@pytest.mark.parametrize('problem_type, family', FAMILIES)
+def test_generation_is_seeded(problem_type, family):
+    first, _ = generators.generate(problem_type, family, 30, seed=1)
+    again, _ = generators.generate(problem_type, family, 30, seed=1)
+    other, _ = generators.generate(problem_type, family, 30, seed=2)
+    assert all(np.array_equal(first[k], again[k]) for k in first)
+    if family != 'grid':
+        assert not all(np.array_equal(first[k], other[k]) for k in first)
+
+
+@pytest.mark.parametrize('problem_type, family', [('tsp', 'clustered'),
+                                                  ('knapsack', 'strongly_correlated'),
+                                                  ('matching', 'powerlaw')])
+def test_generated_text_files_pass_the_upload_parsers(tmp_path, problem_type, family):
+    path = generators.generate_file(problem_type, family, 2000, directory=str(tmp_path))
+    with open(path, 'rb') as f:
+        meta = InstanceStore(str(tmp_path / 'store'), DEFAULT_LIMITS).ingest(
+            io.BytesIO(f.read()), problem_type)
+    assert meta['summary']
+
+
+def test_cli_writes_the_requested_file(tmp_path, capsys):
+    path = str(tmp_path / 'items.csv')
+    assert generators.main(['knapsack', 'subset_sum', '25', '-o', path, '--range', '50']) == 0
+    problem = load('knapsack', path)
+    assert len(problem.weights) == 25 and problem.weights == problem.values
+    assert max(problem.weights) <= 50
@@ -0,0 +1,65 @@
+"""Grouped knapsack: the DP and the Lagrangian bound against brute force.
+
+    python -m pytest -q test_grouped_knapsack.py
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+import grouped_knapsack
+
+
+def brute_force(weights, values, capacity, groups, lower, upper):
+    """Best value over selections meeting the capacity and counts, or None."""
+    best = None
+    for mask in itertools.product([False, True], repeat=len(weights)):
+        mask = np.asarray(mask, dtype=bool)
+        counts = [mask[g].sum() for g in groups]
+        if weights[mask].sum() > capacity or any(c < lo or c > hi for c, lo, hi
+                                                 in zip(counts, lower, upper)):
+            continue
+        value = values[mask].sum()
+        best = value if best is None else max(best, value)
+    return best
+
+
+@pytest.mark.parametrize('seed', range(6))
+def test_solve_matches_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    for trial in range(40):
+        n = int(rng.integers(1, 10))
+        weights = rng.integers(0, 12, n).astype(np.int64)
+        values = rng.integers(0, 20, n)
+        values = values + rng.random(n) if trial % 2 else values.astype(np.int64)
+        capacity = int(rng.integers(0, 30))
+        names, groups = grouped_knapsack.group_indices(rng.choice(['a', 'b', 'c'], n))
+        maximum = int(rng.integers(0, 4))
+        lower, upper = grouped_knapsack.group_limits(names, maximum,
+                                                     min(int(rng.integers(0, 2)), maximum))
+
+        best = brute_force(weights, values, capacity, groups, lower, upper)
+        solution = grouped_knapsack.solve(weights, values, capacity, groups, lower, upper)
+        if best is None:
+            assert not solution['feasible']
+            continue
+        selected = np.zeros(n, dtype=bool)
+        selected[solution['selected_items']] = True
+        assert solution['feasible']
+        assert weights[selected].sum() <= capacity
+        assert all(lo <= selected[g].sum() <= hi for g, lo, hi in zip(groups, lower, upper))
+        assert solution['total_value'] == pytest.approx(best)
+        assert values[selected].sum() == pytest.approx(best)
+        bound = grouped_knapsack.lagrangian_bound(weights, values, capacity, groups, lower, upper)
+        assert bound >= best - 1e-6
+
+
+def test_group_limits_from_mapping():
+    names = np.asarray(['a', 'b', 'c'])
+    lower, upper = grouped_knapsack.group_limits(names, {'a': 2}, {'b': 1})
+    assert lower.tolist() == [0, 1, 0]
+    assert upper[0] == 2 and upper[1] == upper[2] == np.iinfo(np.int64).max
+    with pytest.raises(ValueError):
+        grouped_knapsack.group_limits(names, {'z': 1})
+    with pytest.raises(ValueError):
+        grouped_knapsack.group_limits(names, 1, 2)
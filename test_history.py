@@ -0,0 +1,70 @@
+"""Run history: batched writes and keyset (cursor) paging.
+
+    python -m pytest -q test_history.py
+"""
+import pytest
+
+from history import create_history, decode_cursor, encode_cursor
+
+
+@pytest.fixture
+def history(tmp_path):
+    writer, store = create_history({'HISTORY_BACKEND': 'sqlite',
+                                    'HISTORY_SQLITE_PATH': str(tmp_path / 'history.db'),
+                                    'HISTORY_FLUSH_INTERVAL': 0.01})
+    yield writer, store
+    writer.close()
+
+
+def record(writer, count, algorithm='greedy'):
+    for i in range(count):
+        writer.record('tsp', algorithm, 'data/tsp/berlin52.tsp',
+                      {'solution': {'distance': 100 + i}, 'execution_time': 0.01 * (i + 1)})
+    writer.flush()
+
+
+def pages(store, limit, **filters):
+    cursor, result = None, []
+    while True:
+        rows, cursor = store.runs(limit=limit, cursor=cursor, **filters)
+        result.append(rows)
+        if cursor is None:
+            return result
+
+
+def test_cursor_round_trip():
+    assert decode_cursor(encode_cursor(12345)) == 12345
+
+
+def test_pages_cover_every_run_once_newest_first(history):
+    writer, store = history
+    record(writer, 7)
+    result = pages(store, 3)
+    assert [len(rows) for rows in result] == [3, 3, 1]
+    ids = [row['id'] for rows in result for row in rows]
+    assert ids == sorted(set(ids), reverse=True) and len(ids) == 7
+
+
+def test_exact_multiple_has_no_empty_last_page(history):
+    writer, store = history
+    record(writer, 4)
+    assert [len(rows) for rows in pages(store, 2)] == [2, 2]
+
+
+def test_new_runs_do_not_shift_later_pages(history):
+    writer, store = history
+    record(writer, 5)
+    first, cursor = store.runs(limit=2)
+    record(writer, 3)
+    second, _ = store.runs(limit=2, cursor=cursor)
+    assert second[0]['id'] == first[-1]['id'] - 1
+
+
+def test_filters_apply_to_every_page(history):
+    writer, store = history
+    record(writer, 3, 'greedy')
+    record(writer, 4, 'dp')
+    rows = [row for page in pages(store, 2, algorithm='dp') for row in page]
+    assert len(rows) == 4 and {row['algorithm_name'] for row in rows} == {'dp'}
+    stats = {s['algorithm_name']: s['runs'] for s in store.stats(problem_type='tsp')}
+    assert stats == {'dp': 4, 'greedy': 3}
@@ -0,0 +1,95 @@
+"""Binary instances (.gxi) must load back into the same problem as their source.
+
+    python -m pytest -q test_instance_format.py
+"""
+import json
+
+import numpy as np
+import pytest
+
+from instance_format import convert, read_instance
+from optimizer import OptimizationFramework
+
+GROUPED_CSV = """item_id,weight,value,capacity,category
+10,4,7,12,"tools"
+11,3,5,12,"tools"
+12,6,9,12,"food"
+13,2,3,12,"food"
+14,5,8,12,"drink"
+15,1,1,12,"drink"
+"""
+
+
+def load(problem_type, path, params=None):
+    problem = type(OptimizationFramework().problems[problem_type])()
+    problem.params = params or {}
+    if path.endswith('.gxi'):
+        _, arrays, meta = read_instance(path)
+        problem.load_arrays(arrays, meta)
+    else:
+        problem.load_data(path)
+    problem.preprocess()
+    return problem
+
+
+def test_tsp_round_trip(tmp_path):
+    for include_distances in (True, False):
+        target = str(tmp_path / f'berlin52-{include_distances}.gxi')
+        convert('data/tsp/berlin52.tsp', target, 'tsp', include_distances)
+        source, binary = load('tsp', 'data/tsp/berlin52.tsp'), load('tsp', target)
+        assert np.array_equal(np.asarray(binary.coordinates), np.asarray(source.coordinates))
+        assert np.allclose(binary.distances, source.distances)
+
+
+def test_knapsack_round_trip_keeps_ids_and_categories(tmp_path):
+    csv = tmp_path / 'grouped.csv'
+    csv.write_text(GROUPED_CSV)
+    target = str(tmp_path / 'grouped.gxi')
+    convert(str(csv), target, 'knapsack')
+    source, binary = load('knapsack', str(csv)), load('knapsack', target)
+    assert binary.weights == source.weights and binary.values == source.values
+    assert binary.capacity == source.capacity
+    assert list(binary.item_ids) == [10, 11, 12, 13, 14, 15]
+    assert list(binary.categories) == list(source.categories)
+
+    expected = source.run('grouped')
+    solution = binary.run('grouped')
+    assert solution['total_value'] == expected['total_value']
+    assert solution['categories'] == expected['categories']
+
+
+def test_knapsack_without_categories(tmp_path):
+    target = str(tmp_path / 'sample1.gxi')
+    convert('data/knapsack/sample1.csv', target, 'knapsack')
+    _, arrays, meta = read_instance(target)
+    assert 'categories' not in arrays and 'category_labels' not in meta
+    binary = load('knapsack', target)
+    assert binary.categories is None
+    source = load('knapsack', 'data/knapsack/sample1.csv')
+    assert binary.run('dp')['total_value'] == source.run('dp')['total_value']
+
+
+@pytest.mark.parametrize('right', [[10, 11, 12, 13], ['x', 'y', 'z', 'w']])
+def test_matching_round_trip(tmp_path, right):
+    # String labels go in the header, integer ids in arrays; edges may be given either way round
+    left = ['ann', 'bob', {'id': 'cy'}]
+    edges = [['ann', right[0]], [right[1], 'ann'], {'from': 'bob', 'to': right[1]},
+             ['cy', right[2]], ['cy', right[3]]]
+    source_path = tmp_path / 'graph.json'
+    source_path.write_text(json.dumps({'left_nodes': left, 'right_nodes': right, 'edges': edges}))
+    target = str(tmp_path / 'graph.gxi')
+    convert(str(source_path), target, 'matching')
+
+    _, arrays, meta = read_instance(target)
+    assert meta['left_labels'] == ['ann', 'bob', 'cy'] and 'left_ids' not in arrays
+    if isinstance(right[0], str):
+        assert meta['right_labels'] == right and 'right_ids' not in arrays
+    else:
+        assert arrays['right_ids'].tolist() == right and 'right_labels' not in meta
+    source, binary = load('matching', str(source_path)), load('matching', target)
+    assert source.left_nodes == ['ann', 'bob', 'cy'] and source.right_nodes == right
+    assert binary.left_nodes == source.left_nodes and binary.right_nodes == source.right_nodes
+    assert sorted(binary.edges, key=str) == sorted(
+        [('ann', right[0]), ('ann', right[1]), ('bob', right[1]), ('cy', right[2]), ('cy', right[3])],
+        key=str)
+    assert binary.run('dp')['matching_size'] == source.run('dp')['matching_size'] == 3
\ No newline at end of file
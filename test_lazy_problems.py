@@ -0,0 +1,75 @@
+"""Lazy problem construction: nothing is built or imported before a request needs it.
+
+    python -m pytest -q test_lazy_problems.py
+"""
+import subprocess
+import sys
+import threading
+
+import pytest
+
+from optimizer import LazyProblems, OptimizationFramework
+
+
+def run_python(code):
+    """Run ``code`` in a fresh interpreter (sys.modules here is already polluted)."""
+    return subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                          check=True).stdout.splitlines()
+
+
+def test_problems_are_built_on_first_lookup_only_once():
+    built = []
+
+    class Counting:
+        def __init__(self):
+            built.append(self)
+
+    problems = LazyProblems({'a': Counting, 'b': Counting})
+    assert built == [] and 'a' not in problems
+    threads = [threading.Thread(target=lambda: problems['a']) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(built) == 1 and problems['a'] is built[0]
+    assert problems.get('missing') is None and len(built) == 1
+    with pytest.raises(KeyError):
+        problems['missing']
+
+
+def test_string_factories_import_their_module_on_first_lookup(tmp_path, monkeypatch):
+    (tmp_path / 'lazy_problem_module.py').write_text('class Problem:\n    pass\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+    problems = LazyProblems({'lazy': 'lazy_problem_module:Problem'})
+    assert 'lazy_problem_module' not in sys.modules
+    assert type(problems['lazy']).__name__ == 'Problem'
+    assert 'lazy_problem_module' in sys.modules
+    monkeypatch.delitem(sys.modules, 'lazy_problem_module')
+
+
+def test_framework_imports_no_heavy_module_until_asked():
+    before, after_build, after_warm_up = run_python(
+        "import sys, optimizer\n"
+        "check = lambda: print(int('networkx' in sys.modules))\n"
+        "check()\n"
+        "framework = optimizer.OptimizationFramework()\n"
+        "framework.problems['matching']\n"
+        "check()\n"
+        "framework.problems['matching'].warm_up()\n"
+        "check()\n")
+    assert (before, after_build, after_warm_up) == ('0', '0', '1')
+
+
+def test_app_import_defers_the_framework():
+    # conftest.py's environment (history and upload paths) is inherited; the
+    # last two lines follow app's own startup messages
+    framework, heavy = run_python(
+        "import sys, app\n"
+        "print(app.framework is None)\n"
+        "print(','.join(m for m in ('networkx', 'pandas') if m in sys.modules) or '-')\n")[-2:]
+    assert (framework, heavy) == ('True', '-')
+
+
+def test_preload_builds_only_the_named_problems():
+    framework = OptimizationFramework(preload=['knapsack'])
+    assert set(framework.problems) == {'knapsack'}
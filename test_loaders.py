@@ -0,0 +1,72 @@
+"""Knapsack CSV loader: typed arrays straight from np.loadtxt, errors instead of fallbacks.
+
+    python -m pytest -q test_loaders.py
+"""
+import numpy as np
+import pytest
+
+from loaders import DatasetError, read_knapsack_csv, validate_knapsack
+
+
+def csv_file(tmp_path, text):
+    path = tmp_path / 'items.csv'
+    path.write_text(text)
+    return str(path)
+
+
+def test_all_columns_are_parsed_into_typed_arrays(tmp_path):
+    path = csv_file(tmp_path, 'Item_ID,Name,Weight,Value,Category,Capacity\n'
+                              '7,"Tent, small",4,10,camping,9\n'
+                              '8,Stove,3,6.5,"cook, gas",9\n')
+    data = read_knapsack_csv(path)
+    assert data['weights'].dtype == np.int64 and data['weights'].tolist() == [4, 3]
+    assert data['values'].dtype == np.float64 and data['values'].tolist() == [10.0, 6.5]
+    assert data['capacity'] == 9 and isinstance(data['capacity'], int)
+    assert data['item_ids'].tolist() == [7, 8]
+    assert data['categories'].tolist() == ['camping', 'cook, gas']
+
+
+def test_integral_values_stay_integers_and_capacity_can_be_given(tmp_path):
+    data = read_knapsack_csv(csv_file(tmp_path, 'weight,value\n1,2\n3,4\n'), capacity=5)
+    assert data['values'].dtype == np.int64 and data['capacity'] == 5
+    assert data['item_ids'] is None and data['categories'] is None
+
+
+def test_a_single_row_is_still_a_table(tmp_path):
+    data = read_knapsack_csv(csv_file(tmp_path, 'weight,value,capacity\n2,3,5\n'))
+    assert data['weights'].tolist() == [2]
+
+
+@pytest.mark.parametrize('text, message', [
+    ('', 'empty CSV'),
+    ('weight,capacity\n1,5\n', "missing required column 'value'"),
+    ('weight,value\n1,2\n', "no 'capacity' column"),
+    ('weight,value,capacity\n', 'no items'),
+    ('weight,value,capacity\n1,2,5\n3,oops,5\n', 'oops'),
+    ('weight,value,capacity\n1,2,5\n3,4\n', 'row 2 with 2 columns'),
+    ('weight,value,capacity\n1,2,5\n3,4,6\n', 'same on every row'),
+    ('weight,value,capacity\n1.5,2,5\n', 'row 1 must be a non-negative integer'),
+    ('weight,value,capacity\n1,2,5\n-3,2,5\n', 'row 2 must be a non-negative integer'),
+    ('weight,value,item_id,capacity\n1,2,0.5,5\n', 'item_id must be integral'),
+])
+def test_malformed_files_raise_instead_of_falling_back(tmp_path, text, message):
+    with pytest.raises(DatasetError, match=message):
+        read_knapsack_csv(csv_file(tmp_path, text))
+
+
+def test_inline_validation():
+    weights, values, capacity = validate_knapsack([1, 2], [3.0, 4.0], 3.0)
+    assert weights.dtype == np.int64 and values.dtype == np.int64 and capacity == 3
+    for bad in (([1], [1, 2], 3), ([1], [np.nan], 3), ([1], [1], 2.5), ([1], [1], -1),
+                ([[1]], [[1]], 3), (['a'], [1], 3)):
+        with pytest.raises(DatasetError):
+            validate_knapsack(*bad)
+
+
+def test_knapsack_problem_reports_loader_errors(tmp_path):
+    from optimizer import KnapsackProblem
+    problem = KnapsackProblem()
+    problem.load_data(csv_file(tmp_path, 'weight,value,capacity\n2,3,5\n3,4,5\n'))
+    assert problem.weights == [2, 3] and problem.capacity == 5
+    with pytest.raises(DatasetError):
+        problem.load_data(csv_file(tmp_path, 'weight,value,capacity\n2,x,5\n'))
@@ -0,0 +1,91 @@
+"""Level-of-detail views: point budgets, viewport clipping, tiles and the binary layout.
+
+    python -m pytest -q test_lod.py
+"""
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from lod import WORLD, LODScene, encode, normalize
+
+
+def scene(n=20000, seed=0):
+    rng = np.random.default_rng(seed)
+    coordinates = rng.random((n, 2)) * [5000, 2500] + [-300, 40]
+    return LODScene(coordinates, np.append(rng.permutation(n), 0)), coordinates
+
+
+def test_normalize_keeps_the_aspect_ratio_and_inverts():
+    coordinates = np.array([[10.0, 20.0], [30.0, 25.0], [20.0, 20.0]])
+    points, transform = normalize(coordinates)
+    assert points.dtype == np.float32
+    assert points[:, 0].min() == 0 and points[:, 0].max() == WORLD and points[:, 1].max() == 25
+    assert np.allclose(points / transform['scale'] + transform['offset'], coordinates)
+
+
+@pytest.mark.parametrize('max_points', [50, 500, 4000])
+@pytest.mark.parametrize('viewport', [(0, 0, WORLD, WORLD), (10, 10, 30, 20)])
+def test_views_stay_within_the_point_budget(max_points, viewport):
+    lod, _ = scene()
+    view = lod.view(viewport, 800, 600, max_points)
+    assert len(view['points']) + len(view['path']) <= max_points
+    assert view['counts'].sum() == view['meta']['cities']
+    assert view['meta']['total_cities'] == 20000
+
+
+def test_whole_view_counts_every_city_and_small_instances_are_exact():
+    lod, _ = scene()
+    assert lod.view(max_points=300)['counts'].sum() == 20000
+    small = LODScene([[0, 0], [100, 0], [100, 100], [0, 100]], [0, 1, 2, 3, 0])
+    view = small.view(width=1000, height=1000)
+    assert view['counts'].tolist() == [1, 1, 1, 1]
+    assert len(view['path']) == 5 and view['path_starts'].tolist() == [0]
+
+
+def test_viewport_clips_cities_and_tour():
+    lod, _ = scene()
+    x0, y0, x1, y1 = 20, 10, 40, 25
+    view = lod.view((x0, y0, x1, y1), 400, 300)
+    inside = ((lod.points[:, 0] >= x0) & (lod.points[:, 0] <= x1)
+              & (lod.points[:, 1] >= y0) & (lod.points[:, 1] <= y1))
+    assert view['meta']['cities'] == inside.sum()
+    points = view['points']
+    assert ((points >= (x0, y0)) & (points <= (x1, y1))).all()
+    # Polylines may run one segment past the edge, no further than the farthest city
+    assert len(view['path_starts']) > 1
+    assert view['path'][:, 0].min() >= 0 and view['path'][:, 0].max() <= WORLD
+
+
+def test_tiles_partition_the_world():
+    lod, _ = scene(5000)
+    tiles = [lod.tile(2, x, y, max_points=10 ** 6) for x in range(4) for y in range(4)]
+    assert sum(t['meta']['cities'] for t in tiles) >= 5000
+    assert tiles[5]['meta']['tile'] == [2, 1, 1]
+    assert tiles[5]['meta']['viewport'] == [WORLD / 4, WORLD / 4, WORLD / 2, WORLD / 2]
+    for z, x, y in [(-1, 0, 0), (2, 4, 0), (2, 0, -1), (25, 0, 0)]:
+        with pytest.raises(ValueError):
+            lod.tile(z, x, y)
+
+
+def test_bad_viewports_are_rejected():
+    lod, _ = scene(100)
+    for viewport, width in [((10, 0, 5, 10), 800), ((0, 0, 10, 10), 0)]:
+        with pytest.raises(ValueError):
+            lod.view(viewport, width, 600)
+
+
+def test_encode_layout_round_trips():
+    lod, _ = scene(3000)
+    view = lod.view((0, 0, 60, 60), 640, 480, max_points=900)
+    body = encode(view)
+    (header_length,) = struct.unpack_from('<I', body)
+    header = json.loads(body[4:4 + header_length].decode('utf-8').rstrip())
+    assert header['meta'] == json.loads(json.dumps(view['meta']))
+    for name, spec in header['arrays'].items():
+        assert spec['offset'] % 8 == 0 and spec['offset'] >= 4 + header_length
+        decoded = np.frombuffer(body, dtype=np.dtype(spec['dtype']).newbyteorder('<'),
+                                count=spec['length'], offset=spec['offset'])
+        assert np.array_equal(decoded, view[name].reshape(-1))
+    assert set(header['arrays']) == {'points', 'counts', 'path', 'path_starts'}
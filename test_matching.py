@@ -0,0 +1,48 @@
+"""Bipartite matching: Hopcroft-Karp against networkx, including very long augmenting paths.
+
+    python -m pytest -q test_matching.py
+"""
+import networkx as nx
+import numpy as np
+import pytest
+
+from optimizer import GraphMatchingProblem
+
+
+def hopcroft_karp(left, right, edges):
+    problem = GraphMatchingProblem()
+    problem.load_inline({'left_nodes': left, 'right_nodes': right, 'edges': edges})
+    return problem.dynamic_programming_solution()
+
+
+def assert_valid(result, edges):
+    matched = result['matching']
+    assert len({u for u, _ in matched}) == len({v for _, v in matched}) == len(matched)
+    edge_set = {tuple(e) for e in edges} | {tuple(e[::-1]) for e in edges}
+    assert all((u, v) in edge_set for u, v in matched)
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_matches_networkx(seed):
+    rng = np.random.default_rng(seed)
+    left = [f'l{i}' for i in range(30)]
+    right = [f'r{i}' for i in range(25)]
+    edges = [[u, v] for u in left for v in right if rng.random() < 0.08]
+    result = hopcroft_karp(left, right, edges)
+    graph = nx.Graph(edges)
+    graph.add_nodes_from(left + right)
+    expected = len(nx.bipartite.maximum_matching(graph, top_nodes=left)) // 2
+    assert result['matching_size'] == expected
+    assert_valid(result, edges)
+
+
+def test_augmenting_path_longer_than_the_recursion_limit():
+    # l_i takes r_i in the first phase; l_k can then only be matched by
+    # shifting every l_i to r_{i+1}, one augmenting path through 3002 nodes
+    k = 1500
+    left, right = list(range(k + 1)), list(range(k + 1, 2 * k + 2))
+    edges = [[i, k + 1 + i] for i in range(k)] + [[i, k + 2 + i] for i in range(k)]
+    edges.append([k, k + 1])
+    result = hopcroft_karp(left, right, edges)
+    assert result['matching_size'] == k + 1
+    assert_valid(result, edges)
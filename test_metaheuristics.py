@@ -0,0 +1,84 @@
+"""Multi-start metaheuristics and the shared process pool.
+
+    python -m pytest -q test_metaheuristics.py
+"""
+import numpy as np
+import pytest
+
+import metaheuristics
+import process_pool
+from optimizer import KnapsackProblem, euclidean_distances
+
+
+def distances(n, seed=0):
+    return euclidean_distances(np.random.default_rng(seed).random((n, 2)) * 100)
+
+
+def test_annealing_returns_a_tour_no_worse_than_nearest_neighbour():
+    d = distances(60)
+    run = metaheuristics.multi_start('tsp_annealing', {'distances': d}, {'iterations': 20000},
+                                     restarts=2, workers=1, seed=1)
+    assert sorted(run['best']['tour']) == list(range(60))
+    nn = metaheuristics.nearest_neighbor(d)
+    assert run['best']['objective'] <= metaheuristics.tour_lengths(d, nn[None, :])[0] + 1e-9
+    assert run['summary']['restarts'] == 2 and len(run['starts']) == 2
+
+
+def test_same_seed_same_result_in_process_and_in_the_pool():
+    d = distances(40, seed=2)
+    settings = {'population': 30, 'generations': 40, 'mutation_rate': 0.3}
+    here = metaheuristics.multi_start('tsp_genetic', {'distances': d}, settings,
+                                      restarts=2, workers=1, seed=5)
+    pooled = metaheuristics.multi_start('tsp_genetic', {'distances': d}, settings,
+                                        restarts=2, workers=2, seed=5)
+    assert [s['objective'] for s in pooled['starts']] == [s['objective'] for s in here['starts']]
+
+
+def test_knapsack_genetic_is_feasible():
+    rng = np.random.default_rng(3)
+    weights, values = rng.integers(1, 30, 40), rng.integers(1, 50, 40)
+    run = metaheuristics.multi_start('knapsack_genetic', {'weights': weights, 'values': values},
+                                     {'capacity': 200, 'population': 40, 'generations': 50},
+                                     restarts=2, workers=1, seed=0, maximize=True)
+    chosen = run['best']['selected_items']
+    assert weights[chosen].sum() <= 200
+    assert run['best']['objective'] == values[chosen].sum()
+
+
+def test_workers_are_capped(monkeypatch):
+    requested = []
+    real_get_pool = process_pool.get_pool
+    monkeypatch.setattr(process_pool, 'get_pool',
+                        lambda workers: requested.append(workers) or real_get_pool(workers))
+    run = metaheuristics.multi_start('tsp_annealing', {'distances': distances(20)},
+                                     {'iterations': 2000}, restarts=3, workers=10000, seed=0)
+    assert run['summary']['workers'] <= min(3, process_pool.MAX_WORKERS)
+    assert all(workers <= process_pool.MAX_WORKERS for workers in requested)
+
+
+@pytest.mark.parametrize('restarts', [0, -1, metaheuristics.MAX_RESTARTS + 1])
+def test_restarts_out_of_range_are_rejected_before_the_pool(monkeypatch, restarts):
+    def no_pool(workers):
+        raise AssertionError('pool touched')
+
+    monkeypatch.setattr(process_pool, 'get_pool', no_pool)
+    with pytest.raises(ValueError):
+        metaheuristics.multi_start('tsp_annealing', {'distances': distances(10)},
+                                   {'iterations': 100}, restarts=restarts, workers=4)
+
+
+def test_request_settings_are_bounded():
+    problem = KnapsackProblem()
+    problem.load_inline({'weights': [1, 2, 3], 'values': [3, 4, 5], 'capacity': 4})
+    problem.params = {'population': 10 ** 9, 'restarts': 1}
+    with pytest.raises(ValueError, match='population'):
+        problem.run('genetic')
+
+
+def test_pool_grows_but_never_past_max_workers():
+    pool = process_pool.get_pool(1)
+    assert process_pool.get_pool(1) is pool
+    big = process_pool.get_pool(10 ** 6)
+    assert process_pool._pool_workers == process_pool.MAX_WORKERS
+    assert process_pool.get_pool(process_pool.MAX_WORKERS) is big
+    assert big.submit(sum, [1, 2, 3]).result() == 6
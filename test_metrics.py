@@ -0,0 +1,50 @@
+"""Prometheus exposition: label values and sample precision.
+
+    python -m pytest -q test_metrics.py
+"""
+from metrics import MetricsRegistry, REGISTRY
+from optimizer import ALGORITHMS, OptimizationFramework
+
+
+def samples(text):
+    """``{'name{labels}': 'value'}`` for every sample line."""
+    return dict(line.rsplit(' ', 1) for line in text.splitlines() if not line.startswith('#'))
+
+
+def registry():
+    metrics = MetricsRegistry(buckets=(0.1, 1.0))
+    metrics.allow('problem', ['tsp'])
+    metrics.allow('algorithm', ['dp'])
+    return metrics
+
+
+def test_exposition_format_and_precision():
+    metrics = registry()
+    metrics.observe_run('tsp', 'dp', {'solve': 0.5}, {'dp_cells': 123456789, 'bound': 0.1 + 0.2})
+    metrics.observe_run('tsp', 'dp', {'solve': 2.0}, {'dp_cells': 1})
+    text = metrics.render()
+    assert text.endswith('\n')
+    assert text.count('# TYPE ') == 3
+    values = samples(text)
+    assert values['galaxy_runs_total{problem="tsp",algorithm="dp",status="ok"}'] == '2'
+    assert values['galaxy_solver_events_total{problem="tsp",algorithm="dp",counter="dp_cells"}'] == '123456790'
+    assert values['galaxy_solver_events_total{problem="tsp",algorithm="dp",counter="bound"}'] == repr(0.1 + 0.2)
+    bucket = 'galaxy_phase_seconds_bucket{problem="tsp",algorithm="dp",phase="solve",le="%s"}'
+    assert [values[bucket % le] for le in ('0.1', '1.0', '+Inf')] == ['0', '1', '2']
+    assert values['galaxy_phase_seconds_sum{problem="tsp",algorithm="dp",phase="solve"}'] == '2.5'
+
+
+def test_unregistered_labels_are_recorded_as_unknown():
+    metrics = registry()
+    for i in range(50):
+        metrics.observe_run(f'problem-{i}', f'algorithm-{i}\n"', status='error')
+    metrics.observe_phase('tsp', 'nonsense', 'serialize', 0.01)
+    values = samples(metrics.render())
+    assert values['galaxy_runs_total{problem="unknown",algorithm="unknown",status="error"}'] == '50'
+    assert 'galaxy_phase_seconds_count{problem="tsp",algorithm="unknown",phase="serialize"}' in values
+    assert len([key for key in values if key.startswith('galaxy_runs_total')]) == 1
+
+
+def test_solver_names_are_registered():
+    assert set(ALGORITHMS) <= REGISTRY._allowed['algorithm']
+    assert set(OptimizationFramework.PROBLEM_FACTORIES) <= REGISTRY._allowed['problem']
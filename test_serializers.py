@@ -0,0 +1,93 @@
+"""Response encoding: JSON (orjson and stdlib), MessagePack typed blobs, negotiation, compression.
+
+    python -m pytest -q test_serializers.py
+"""
+import gzip
+import json
+
+import numpy as np
+import pytest
+from flask import Flask
+
+import serializers
+from optimizer import TraceRecorder
+
+
+def trace():
+    recorder = TraceRecorder()
+    recorder.seed([0])
+    for step in range(1, 6):
+        recorder.record(step, step * 1.5)
+    recorder.finish(7.5)
+    return recorder.to_dict()
+
+
+def payload():
+    return {'trace': trace(), 'total': np.int64(3), 'ratio': np.float32(0.5),
+            'ok': np.bool_(True), 'pairs': [(1, 2)], 'grid': np.arange(6).reshape(2, 3)}
+
+
+EXPECTED = {'trace': {'encoding': 'delta', 'items': [0, 1, 2, 3, 4, 5],
+                      'frames': [2, 3, 4, 5, 6], 'values': [1.5, 3.0, 4.5, 6.0, 7.5],
+                      'total_steps': 5, 'stride': 1},
+            'total': 3, 'ratio': 0.5, 'ok': True, 'pairs': [[1, 2]], 'grid': [[0, 1, 2], [3, 4, 5]]}
+
+
+def test_traces_are_numpy_arrays():
+    result = trace()
+    assert result['items'].dtype == np.int64 and result['values'].dtype == np.float64
+
+
+@pytest.mark.parametrize('use_orjson', [True, False])
+def test_json_round_trip(monkeypatch, use_orjson):
+    if use_orjson and serializers.orjson is None:
+        pytest.skip('orjson not installed')
+    if not use_orjson:
+        monkeypatch.setattr(serializers, 'orjson', None)
+    assert json.loads(serializers.dumps_json(payload())) == EXPECTED
+
+
+def test_arrays_are_packed_as_typed_blobs():
+    packed = serializers._msgpack_default(np.arange(4, dtype=np.int32).reshape(2, 2))
+    assert packed['dtype'] == np.dtype(np.int32).str and packed['shape'] == [2, 2]
+    assert packed['data'] == np.arange(4, dtype=np.int32).tobytes()
+
+
+def test_msgpack_round_trip_restores_arrays():
+    pytest.importorskip('msgpack')
+    decoded = serializers.loads_msgpack(serializers.dumps_msgpack(payload()))
+    for key in ('items', 'frames', 'values'):
+        restored = decoded['trace'][key]
+        assert isinstance(restored, np.ndarray) and restored.dtype == trace()[key].dtype
+        assert restored.tolist() == EXPECTED['trace'][key]
+    assert decoded['grid'].shape == (2, 3)
+    assert decoded['total'] == 3 and decoded['pairs'] == [[1, 2]]
+
+
+@pytest.fixture
+def app():
+    return Flask(__name__)
+
+
+def test_format_is_negotiated(app):
+    with app.test_request_context(headers={'Accept': 'application/msgpack'}):
+        from flask import request
+        response = serializers.respond(payload(), request)
+    if serializers.msgpack is None:
+        assert response.mimetype == serializers.JSON_MIMETYPE
+        assert json.loads(response.get_data()) == EXPECTED
+    else:
+        assert response.mimetype == serializers.MSGPACK_MIMETYPE
+        assert serializers.loads_msgpack(response.get_data())['grid'].shape == (2, 3)
+    assert response.headers['Vary'] == 'Accept, Accept-Encoding'
+
+
+def test_large_bodies_are_compressed_small_ones_are_not(app):
+    from flask import request
+    big = {'values': np.arange(serializers.COMPRESSION_MIN_BYTES, dtype=np.float64)}
+    with app.test_request_context(headers={'Accept-Encoding': 'gzip'}):
+        response = serializers.respond(big, request)
+        assert response.headers['Content-Encoding'] == 'gzip'
+        assert json.loads(gzip.decompress(response.get_data()))['values'][-1] == len(big['values']) - 1
+        small = serializers.respond({'n': 1}, request)
+        assert 'Content-Encoding' not in small.headers
@@ -0,0 +1,90 @@
+"""Production server settings (serve.py, gunicorn.conf.py); gunicorn itself is not needed.
+
+    python -m pytest -q test_serve.py
+"""
+import json
+import os
+import runpy
+import subprocess
+import sys
+
+import pytest
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+CONF = os.path.join(HERE, 'gunicorn.conf.py')
+
+
+def settings(**env):
+    """Settings gunicorn.conf.py produces in a fresh interpreter under ``env``."""
+    script = ("import json, runpy; from config import Config; ns = runpy.run_path(%r); "
+              "print(json.dumps({k: ns[k] for k in ('workers', 'threads', 'worker_class', "
+              "'max_requests', 'preload_app')} | {'processes': Config.SERVER_PROCESSES}))" % CONF)
+    clean = {k: v for k, v in os.environ.items()
+             if k not in ('WEB_WORKERS', 'WEB_THREADS', 'TSP_SESSIONS_ENABLED')}
+    output = subprocess.run([sys.executable, '-c', script], cwd=HERE, check=True,
+                            capture_output=True, text=True, env=dict(clean, **env)).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def test_one_threaded_worker_while_sessions_are_enabled():
+    conf = settings()
+    assert conf['workers'] == 1 and conf['threads'] > 1
+    assert conf['worker_class'] == 'gthread' and conf['preload_app']
+    assert conf['processes'] == 1
+
+
+def test_workers_default_to_cpus_without_sessions():
+    conf = settings(TSP_SESSIONS_ENABLED='0')
+    assert conf['workers'] == (os.cpu_count() or 1)
+    assert conf['processes'] == conf['workers']
+
+
+def test_explicit_workers_split_the_admission_budget():
+    conf = settings(WEB_WORKERS='3', WEB_THREADS='1')
+    assert conf['workers'] == conf['processes'] == 3
+    assert conf['worker_class'] == 'sync'
+
+
+class FakeLog:
+    def info(self, message):
+        self.message = message
+
+
+class FakeWorker:
+    pid = 1234
+    alive = True
+    log = FakeLog()
+
+
+def test_post_request_recycles_workers_that_grew(monkeypatch):
+    import app
+    from config import Config
+    from metrics import private_mb
+
+    post_request = runpy.run_path(CONF)['post_request']
+    monkeypatch.setattr(Config, 'WORKER_MAX_MEMORY_GROWTH_MB', 100.0)
+
+    worker = FakeWorker()
+    monkeypatch.setattr(app, 'worker_baseline_mb', private_mb())
+    post_request(worker, None, None, None)
+    assert worker.alive
+
+    monkeypatch.setattr(app, 'worker_baseline_mb', private_mb() - 500)
+    post_request(worker, None, None, None)
+    assert not worker.alive and 'recycling' in worker.log.message
+
+
+def test_serve_flags_override_the_environment(monkeypatch):
+    try:
+        import gunicorn  # noqa: F401
+        pytest.skip('gunicorn is installed; main() would start the server')
+    except ImportError:
+        pass
+    import serve
+    for _, variable in serve.OVERRIDES:
+        monkeypatch.delenv(variable, raising=False)
+    monkeypatch.chdir(HERE)
+    assert serve.main(['--workers', '3', '--threads', '2', '--bind', '127.0.0.1:9']) == 1
+    assert os.environ['WEB_WORKERS'] == '3' and os.environ['WEB_THREADS'] == '2'
+    assert os.environ['BIND'] == '127.0.0.1:9'
+    assert 'WORKER_MAX_REQUESTS' not in os.environ
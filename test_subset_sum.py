@@ -0,0 +1,48 @@
+"""Subset-sum bitsets and witnesses against brute force.
+
+    python -m pytest -q test_subset_sum.py
+"""
+import itertools
+
+import numpy as np
+import pytest
+
+import subset_sum
+
+
+def subset_weights(weights, capacity):
+    sums = set()
+    for r in range(len(weights) + 1):
+        for combo in itertools.combinations(weights, r):
+            if sum(combo) <= capacity:
+                sums.add(sum(combo))
+    return sums
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_reachable_and_witness_match_brute_force(seed):
+    rng = np.random.default_rng(seed)
+    for _ in range(30):
+        n = int(rng.integers(0, 12))
+        weights = rng.integers(0, 25, n).tolist()
+        capacity = int(rng.integers(0, 60))
+        sums = subset_weights(weights, capacity)
+
+        bits = subset_sum.reachable(weights, capacity)
+        assert {s for s in range(capacity + 1) if subset_sum.is_set(bits, s)} == sums
+        assert subset_sum.best_fill(weights, capacity) == max(sums)
+        assert subset_sum.max_fill(np.asarray(weights, dtype=np.int64), capacity) == max(sums)
+
+        for target in range(-1, capacity + 2):
+            chosen = subset_sum.witness(weights, capacity, target)
+            if target not in sums:
+                assert chosen is None
+                continue
+            assert chosen == sorted(set(chosen))
+            assert sum(weights[i] for i in chosen) == target
+
+
+def test_summarize():
+    bits = subset_sum.reachable([3, 5], 10)
+    assert subset_sum.summarize(bits, 10) == {'reachable_count': 4, 'best_fill': 8,
+                                              'capacity': 10}
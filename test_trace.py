@@ -0,0 +1,32 @@
+"""Solver traces: sampling, decimation and the ``max_frames`` bound.
+
+    python -m pytest -q test_trace.py
+"""
+import pytest
+
+from optimizer import TraceRecorder
+
+
+@pytest.mark.parametrize('steps', [0, 1, 2, 3, 9, 16, 17, 63, 64, 65])
+@pytest.mark.parametrize('max_frames', [2, 3, 8])
+def test_frames_stay_within_max_frames(steps, max_frames):
+    trace = TraceRecorder(max_frames=max_frames)
+    for step in range(steps):
+        trace.record(step, (step + 1) * 10)
+    trace.finish(steps * 10)
+    frames = trace.to_dict()['frames'].tolist()
+    assert len(frames) <= max_frames
+    if steps:
+        assert frames[-1] == steps
+        assert trace.to_dict()['values'][-1] == steps * 10
+    assert frames == sorted(set(frames))
+
+
+def test_every_samples_and_finish_adds_the_final_state():
+    trace = TraceRecorder(every=3)
+    for step in range(8):
+        trace.record(step, step + 1)
+    trace.finish(8)
+    result = trace.to_dict()
+    assert result['frames'].tolist() == [1, 4, 7, 8]
+    assert result['values'].tolist() == [1, 4, 7, 8]
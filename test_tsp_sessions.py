@@ -0,0 +1,82 @@
+"""Incremental TSP sessions: matrix upkeep and request validation.
+
+    python -m pytest -q test_tsp_sessions.py
+"""
+import numpy as np
+import pytest
+
+from tsp_sessions import SLACK, SessionError, SessionStore, TSPSession
+
+
+def full_matrix(session):
+    coords = session.coords[:session.size]
+    return np.hypot(*(coords[:, None, :] - coords[None, :, :]).transpose(2, 0, 1))
+
+
+def test_matrix_grows_and_stays_exact():
+    rng = np.random.default_rng(1)
+    session = TSPSession(rng.random((20, 2)) * 100)
+    assert len(session.distances) < 40
+    for x, y in rng.random((60, 2)) * 100:
+        session.apply([{'op': 'insert', 'x': float(x), 'y': float(y)}])
+    session.apply([{'op': 'move', 'id': 3, 'x': 1.0, 'y': 2.0}, {'op': 'delete', 'id': 5}])
+    assert np.allclose(session.distances[:session.size, :session.size], full_matrix(session))
+    assert sorted(session.tour) == sorted(session.id_of)
+
+
+@pytest.mark.parametrize('ids', [[[1], [2]], [{'a': 1}, 2], 7, [True, False]])
+def test_bad_ids_are_rejected(ids):
+    with pytest.raises(SessionError) as raised:
+        TSPSession([[0, 0], [1, 1]], ids=ids)
+    assert raised.value.status == 400
+
+
+@pytest.mark.parametrize('delta', [{'op': 'delete', 'id': [1]},
+                                   {'op': 'move', 'id': {'a': 1}, 'x': 1, 'y': 1},
+                                   {'op': 'insert', 'id': [2], 'x': 1, 'y': 1}])
+def test_unhashable_delta_ids_are_rejected(delta):
+    session = TSPSession([[0, 0], [1, 1], [2, 0]])
+    with pytest.raises(SessionError) as raised:
+        session.apply([delta])
+    assert raised.value.status == 400
+    assert session.version == 0
+
+
+def test_ragged_coordinates_are_rejected():
+    with pytest.raises(SessionError):
+        TSPSession([[0, 0], [1]])
+
+
+def test_inserts_without_an_id_reserve_the_next_one():
+    session = TSPSession([[0, 0], [1, 0], [0, 1]])
+    with pytest.raises(SessionError, match='already exists'):
+        session.apply([{'op': 'insert', 'x': 5, 'y': 5}, {'op': 'insert', 'id': 3, 'x': 6, 'y': 6}])
+    assert session.version == 0 and len(session.tour) == 3
+    session.apply([{'op': 'insert', 'id': 3, 'x': 6, 'y': 6}, {'op': 'insert', 'x': 5, 'y': 5}])
+    assert sorted(session.slot_of) == [0, 1, 2, 3, 4]
+
+
+def test_sessions_share_a_cell_budget():
+    cells = (4 + SLACK) ** 2
+    store = SessionStore(max_cells=2 * cells)
+    square = [[0, 0], [1, 0], [1, 1], [0, 1]]
+    first, _ = store.create(square)
+    store.create(square)
+    with pytest.raises(SessionError) as raised:
+        store.create(square)
+    assert raised.value.status == 429
+    store.delete(first)
+    store.create(square)
+    assert store.budget.cells == 2 * cells
+
+
+def test_growth_past_the_budget_is_refused_before_anything_changes():
+    store = SessionStore(max_cells=(4 + SLACK) ** 2)
+    _, session = store.create([[0, 0], [1, 0], [1, 1], [0, 1]])
+    deltas = [{'op': 'insert', 'x': i, 'y': 2} for i in range(SLACK + 1)]
+    with pytest.raises(SessionError) as raised:
+        session.apply(deltas)
+    assert raised.value.status == 413
+    assert session.version == 0 and len(session.tour) == 4 and session.size == 4
+    session.apply(deltas[:SLACK])
+    assert len(session.tour) == 4 + SLACK
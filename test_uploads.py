@@ -0,0 +1,115 @@
+"""Streaming uploads: parsing, spooling and the size/count limits.
+
+    python -m pytest -q test_uploads.py
+"""
+import io
+import json
+import os
+
+import pytest
+
+from uploads import DEFAULT_LIMITS, MAX_LINE_BYTES, InstanceStore, UploadError
+
+TSP = """NAME: tiny
+TYPE: TSP
+DIMENSION: 3
+NODE_COORD_SECTION
+1 0 0
+2 3 0
+3 0 4
+EOF
+"""
+KNAPSACK = "weight,value,capacity\n2,3,5\n3,4,5\n4,5,5\n"
+MATCHING = json.dumps({'left_nodes': ['a', 'b'], 'right_nodes': [1, 2],
+                       'edges': [['a', 1], ['b', 2]]})
+
+
+def store(tmp_path, **limits):
+    return InstanceStore(str(tmp_path), dict(DEFAULT_LIMITS, **limits))
+
+
+def ingest(instances, problem_type, text, **kwargs):
+    return instances.ingest(io.BytesIO(text.encode('utf-8')), problem_type, **kwargs)
+
+
+@pytest.mark.parametrize('problem_type, text', [('tsp', TSP), ('knapsack', KNAPSACK),
+                                                ('matching', MATCHING)])
+def test_accepted_upload_is_stored(tmp_path, problem_type, text):
+    instances = store(tmp_path)
+    meta = ingest(instances, problem_type, text, filename='upload')
+    assert instances.get(meta['instance_id'])['summary'] == meta['summary']
+    with open(instances.path(meta['instance_id'])) as f:
+        assert f.read() == text
+    assert not meta['spooled_to_disk']
+
+
+def test_large_upload_spools_to_disk(tmp_path):
+    instances = store(tmp_path, UPLOAD_SPOOL_BYTES=16)
+    meta = ingest(instances, 'knapsack', KNAPSACK)
+    assert meta['spooled_to_disk'] and meta['bytes'] == len(KNAPSACK)
+
+
+@pytest.mark.parametrize('problem_type, text, limits', [
+    ('knapsack', KNAPSACK, {'MAX_UPLOAD_BYTES': 10}),
+    ('tsp', TSP, {'MAX_TSP_DIMENSION': 2}),
+    ('knapsack', KNAPSACK, {'MAX_KNAPSACK_ITEMS': 2}),
+    ('knapsack', KNAPSACK, {'MAX_KNAPSACK_CAPACITY': 4}),
+    ('matching', MATCHING, {'MAX_MATCHING_EDGES': 1}),
+    ('matching', MATCHING, {'MAX_JSON_UPLOAD_BYTES': 10}),
+])
+def test_limits_answer_413_and_leave_nothing_behind(tmp_path, problem_type, text, limits):
+    instances = store(tmp_path, UPLOAD_SPOOL_BYTES=16, **limits)
+    with pytest.raises(UploadError) as raised:
+        ingest(instances, problem_type, text)
+    assert raised.value.status == 413
+    assert os.listdir(tmp_path) == []
+
+
+def test_declared_length_over_the_limit_is_refused_before_reading(tmp_path):
+    class Unreadable:
+        def read(self, size):
+            raise AssertionError('body was read')
+
+    with pytest.raises(UploadError) as raised:
+        store(tmp_path, MAX_UPLOAD_BYTES=100).ingest(Unreadable(), 'tsp', content_length=101)
+    assert raised.value.status == 413
+
+
+@pytest.mark.parametrize('problem_type, text', [
+    ('tsp', TSP.replace('DIMENSION: 3', 'DIMENSION: 4')),
+    ('knapsack', 'weight,value\n1,2\n'),
+    ('knapsack', 'weight,value,capacity\n-1,2,5\n'),
+    ('knapsack', 'weight,value,capacity\n1e400,2,5\n'),
+    ('matching', '{"left": ['),
+    ('nonsense', TSP),
+])
+def test_malformed_uploads_answer_400(tmp_path, problem_type, text):
+    with pytest.raises(UploadError) as raised:
+        ingest(store(tmp_path), problem_type, text)
+    assert raised.value.status == 400
+
+
+def test_unknown_instances_answer_404(tmp_path):
+    instances = store(tmp_path)
+    for instance_id in ('0123abcd', '../etc/passwd', ''):
+        with pytest.raises(UploadError) as raised:
+            instances.get(instance_id)
+        assert raised.value.status == 404
+
+
+def test_large_single_line_json_is_accepted(tmp_path):
+    # generators._write_matching output: one line, far longer than MAX_LINE_BYTES
+    n = 8000
+    document = json.dumps({'left_nodes': list(range(n)), 'right_nodes': list(range(n, 2 * n)),
+                           'edges': [[i, n + (i * 7) % n] for i in range(n)]})
+    assert '\n' not in document and len(document) > 2 * MAX_LINE_BYTES
+    meta = ingest(store(tmp_path, UPLOAD_SPOOL_BYTES=1024), 'matching', document)
+    assert meta['summary'] == {'left': n, 'right': n, 'edges': n}
+    assert meta['bytes'] == len(document)
+
+
+def test_long_lines_are_still_refused_for_line_formats(tmp_path):
+    # The long line straddles two read chunks and ends in the second
+    text = 'weight,value,capacity,name\n1,1,5,' + 'x' * (MAX_LINE_BYTES + 10) + '\n'
+    with pytest.raises(UploadError, match='Line longer'):
+        ingest(store(tmp_path), 'knapsack', text)
@@ -0,0 +1,406 @@
+"""Incremental TSP sessions.
+
+A session keeps the coordinates, the distance matrix and the current tour of
+one routing instance between requests.  Deltas (insert, delete or move a
+city) update only the matrix rows/columns of the cities they touch, repair
+the tour with cheapest insertion and then run 2-opt restricted to edges at
+the changed cities, so a re-solve costs O(k * n) for k changed cities instead
+of rebuilding the O(n^2) matrix and tour.
+
+The matrix lives in a square buffer with a little slack that grows by half
+when full; deleted cities free their slot for reuse.  All sessions of a store
+share one budget of matrix cells, reserved before a matrix is allocated or
+grown.  Sessions are held in process memory: with several server workers a
+client must stick to one worker, or recreate its session when it gets a 404.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+import numpy as np
+
+from optimizer import euclidean_distances
+
+# Maximum 2-opt moves per changed city during local improvement
+MOVES_PER_CHANGE = 25
+# Cities examined for 2-opt when a session is created; later requests refine further
+INITIAL_CHECKS = 1000
+# Free matrix slots beyond the initial cities, for inserts before the first grow
+SLACK = 16
+EPSILON = 1e-9
+
+
+class SessionError(Exception):
+    """Bad session request; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def _capacity_for(capacity: int, size: int) -> int:
+    """Matrix side after growing ``capacity`` by half (at least SLACK) until ``size`` fits."""
+    while size > capacity:
+        capacity += max(SLACK, capacity // 2)
+    return capacity
+
+
+class CellBudget:
+    """Distance-matrix cells shared by the sessions of one store.
+
+    A session reserves its matrix size before allocating or growing it; more
+    than ``max_cells`` for one session answers 413, more than what the other
+    sessions leave free answers 429.
+    """
+
+    def __init__(self, max_cells: int = None):
+        self.max_cells = max_cells
+        self._cells = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, owner, cells: int, new: bool = False):
+        with self._lock:
+            if not new and owner not in self._cells:
+                raise SessionError("Session was closed", 404)
+            if self.max_cells:
+                if cells > self.max_cells:
+                    raise SessionError(f"A {cells}-cell distance matrix exceeds the limit of "
+                                       f"{self.max_cells} cells", 413)
+                in_use = sum(c for other, c in self._cells.items() if other is not owner)
+                if in_use + cells > self.max_cells:
+                    raise SessionError("Too much session memory in use; close a session "
+                                       "or try again later", 429)
+            self._cells[owner] = cells
+
+    def release(self, owner):
+        with self._lock:
+            self._cells.pop(owner, None)
+
+    @property
+    def cells(self) -> int:
+        with self._lock:
+            return sum(self._cells.values())
+
+
+def _valid_id(city) -> bool:
+    """City ids are JSON scalars: integers or strings."""
+    return isinstance(city, (int, str)) and not isinstance(city, bool)
+
+
+class TSPSession:
+    def __init__(self, coordinates, ids=None, max_cities: int = None, budget: CellBudget = None):
+        try:
+            coordinates = np.asarray(coordinates, dtype=np.float64)
+        except (TypeError, ValueError):
+            coordinates = np.zeros(0)
+        if coordinates.ndim != 2 or coordinates.shape[1] != 2 or len(coordinates) < 2:
+            raise SessionError("'coordinates' must be a list of at least two [x, y] pairs")
+        n = len(coordinates)
+        self.max_cities = max_cities
+        if max_cities and n > max_cities:
+            raise SessionError(f"{n} cities exceed the limit of {max_cities}", 413)
+        if ids is not None and not isinstance(ids, (list, tuple)):
+            raise SessionError("'ids' must be a list")
+        ids = list(range(n)) if ids is None else list(ids)
+        if not all(_valid_id(city) for city in ids):
+            raise SessionError("'ids' must be integers or strings")
+        if len(ids) != n or len(set(ids)) != n:
+            raise SessionError("'ids' must be unique and match the coordinates")
+
+        capacity = n + SLACK
+        self.budget = budget
+        if budget is not None:
+            budget.reserve(self, capacity * capacity, new=True)
+        self.coords = np.zeros((capacity, 2))
+        self.coords[:n] = coordinates
+        self.distances = np.zeros((capacity, capacity))
+        euclidean_distances(coordinates, out=self.distances[:n, :n])
+        self.size = n                      # slots in use, including freed ones
+        self.free = []                     # freed slots available for inserts
+        self.slot_of = {city: slot for slot, city in enumerate(ids)}
+        self.id_of = {slot: city for slot, city in enumerate(ids)}
+        self.next_id = max([i for i in ids if isinstance(i, int)], default=-1) + 1
+        self.tour = self._nearest_neighbor()
+        self.updated_at = time.time()
+        self.version = 0
+        self._lock = threading.Lock()
+        self._improve(list(range(n)), moves=MOVES_PER_CHANGE * n, checks=INITIAL_CHECKS)
+
+    # -- matrix maintenance -------------------------------------------------
+
+    def _grow(self, capacity: int = None):
+        if capacity is None:
+            capacity = _capacity_for(len(self.coords), len(self.coords) + 1)
+        if self.budget is not None:
+            self.budget.reserve(self, capacity * capacity)
+        coords = np.zeros((capacity, 2))
+        coords[:self.size] = self.coords[:self.size]
+        distances = np.zeros((capacity, capacity))
+        distances[:self.size, :self.size] = self.distances[:self.size, :self.size]
+        self.coords, self.distances = coords, distances
+
+    def _set_point(self, slot: int, x: float, y: float):
+        """Store a city's coordinates and refresh its matrix row and column: O(n)."""
+        self.coords[slot] = (x, y)
+        delta = self.coords[:self.size] - self.coords[slot]
+        row = np.sqrt((delta * delta).sum(axis=1))
+        self.distances[slot, :self.size] = row
+        self.distances[:self.size, slot] = row
+
+    def _allocate(self) -> int:
+        if self.free:
+            return self.free.pop()
+        if self.size == len(self.coords):
+            self._grow()
+        self.size += 1
+        return self.size - 1
+
+    # -- tour construction and repair ---------------------------------------
+
+    def _nearest_neighbor(self):
+        n = self.size
+        visited = np.zeros(n, dtype=bool)
+        tour = [0]
+        visited[0] = True
+        for _ in range(n - 1):
+            row = np.where(visited, np.inf, self.distances[tour[-1], :n])
+            city = int(np.argmin(row))
+            tour.append(city)
+            visited[city] = True
+        return tour
+
+    def _insert_cheapest(self, slot: int) -> int:
+        """Insert ``slot`` where it lengthens the tour least; returns its position."""
+        tour = np.asarray(self.tour)
+        following = np.roll(tour, -1)
+        d = self.distances
+        cost = d[tour, slot] + d[slot, following] - d[tour, following]
+        position = int(np.argmin(cost)) + 1
+        self.tour.insert(position, slot)
+        return position
+
+    def _two_opt_at(self, city: int) -> list:
+        """Best improving 2-opt move using one of ``city``'s two tour edges.
+
+        Returns the cities at the ends of the new edges, or ``[]``.
+        """
+        tour = np.asarray(self.tour)
+        n = len(tour)
+        if n < 4:
+            return []
+        d = self.distances
+        position = self.tour.index(city)
+        following = np.roll(tour, -1)
+        best_gain, best = EPSILON, None
+        for i in ((position - 1) % n, position):
+            a, b = tour[i], tour[(i + 1) % n]
+            # Replace edges (a, b) and (c, e) by (a, c) and (b, e) for every other edge (c, e)
+            gain = d[a, b] + d[tour, following] - d[a, tour] - d[b, following]
+            gain[[(i - 1) % n, i, (i + 1) % n]] = -np.inf
+            j = int(np.argmax(gain))
+            if gain[j] > best_gain:
+                best_gain, best = gain[j], (i, j)
+        if best is None:
+            return []
+        i, j = sorted(best)
+        # Reversing tour[i+1..j] swaps the two edges
+        self.tour[i + 1:j + 1] = self.tour[i + 1:j + 1][::-1]
+        return [self.tour[i], self.tour[i + 1], self.tour[j], self.tour[(j + 1) % n]]
+
+    def _improve(self, cities, moves: int, checks: int = None) -> int:
+        """2-opt around ``cities`` and whatever the moves touch.
+
+        Stops after ``moves`` moves or, if given, ``checks`` cities examined.
+        """
+        queue = list(dict.fromkeys(cities))
+        pending = set(queue)
+        applied = 0
+        while queue and applied < moves and checks != 0:
+            if checks is not None:
+                checks -= 1
+            city = queue.pop()
+            pending.discard(city)
+            touched = self._two_opt_at(city)
+            if touched:
+                applied += 1
+                for other in touched:
+                    if other not in pending:
+                        pending.add(other)
+                        queue.append(other)
+        return applied
+
+    # -- public API -----------------------------------------------------------
+
+    def apply(self, deltas) -> dict:
+        """Apply ``insert`` / ``delete`` / ``move`` deltas and re-optimise locally.
+
+        ``{"op": "insert", "x": .., "y": .., "id": optional}``,
+        ``{"op": "delete", "id": ..}``, ``{"op": "move", "id": .., "x": .., "y": ..}``.
+        Deltas are validated before anything changes.
+        """
+        with self._lock:
+            start = time.perf_counter()
+            size = self._validate(deltas)
+            capacity = _capacity_for(len(self.coords), size)
+            if capacity > len(self.coords):
+                self._grow(capacity)  # reserves the cells before anything changes
+            changed = []
+            for delta in deltas:
+                op = delta['op']
+                if op == 'delete':
+                    slot = self.slot_of.pop(delta['id'])
+                    del self.id_of[slot]
+                    position = self.tour.index(slot)
+                    self.tour.pop(position)
+                    self.free.append(slot)
+                    n = len(self.tour)
+                    changed.extend([self.tour[(position - 1) % n], self.tour[position % n]])
+                    continue
+                if op == 'insert':
+                    city = delta.get('id')
+                    if city is None:
+                        city = self.next_id
+                    if isinstance(city, int):
+                        self.next_id = max(self.next_id, city + 1)
+                    slot = self._allocate()
+                    self.slot_of[city] = slot
+                    self.id_of[slot] = city
+                else:  # move
+                    slot = self.slot_of[delta['id']]
+                    self.tour.remove(slot)
+                self._set_point(slot, float(delta['x']), float(delta['y']))
+                self._insert_cheapest(slot)
+                changed.append(slot)
+            repaired = time.perf_counter()
+
+            changed = [slot for slot in dict.fromkeys(changed) if slot in self.id_of]
+            moves = self._improve(changed, MOVES_PER_CHANGE * max(1, len(deltas)))
+            self.version += 1
+            self.updated_at = time.time()
+            return {
+                'applied': len(deltas),
+                'improvement_moves': moves,
+                'repair_time': repaired - start,
+                'improve_time': time.perf_counter() - repaired,
+            }
+
+    def _validate(self, deltas) -> int:
+        """Check ``deltas`` against the ids and slots ``apply`` will use.
+
+        Returns the number of matrix slots in use afterwards.
+        """
+        if not isinstance(deltas, list):
+            raise SessionError("'deltas' must be a list")
+        live = set(self.slot_of)
+        next_id, free, size = self.next_id, len(self.free), self.size
+        for index, delta in enumerate(deltas):
+            op = delta.get('op') if isinstance(delta, dict) else None
+            if op not in ('insert', 'delete', 'move'):
+                raise SessionError(f"delta {index}: op must be insert, delete or move")
+            if op in ('insert', 'move'):
+                try:
+                    if not np.isfinite([float(delta['x']), float(delta['y'])]).all():
+                        raise ValueError
+                except (KeyError, TypeError, ValueError):
+                    raise SessionError(f"delta {index}: {op} needs finite x and y")
+            city = delta.get('id')
+            if city is not None and not _valid_id(city):
+                raise SessionError(f"delta {index}: id must be an integer or a string")
+            if op == 'insert':
+                if city is None:
+                    city = next_id
+                elif city in live:
+                    raise SessionError(f"delta {index}: city {city!r} already exists")
+                if isinstance(city, int):
+                    next_id = max(next_id, city + 1)
+                live.add(city)
+                if free:
+                    free -= 1
+                else:
+                    size += 1
+            else:
+                if city not in live:
+                    raise SessionError(f"delta {index}: unknown city {city!r}", 404)
+                if op == 'delete':
+                    live.discard(city)
+                    free += 1
+                    if len(live) < 2:
+                        raise SessionError(f"delta {index}: a tour needs at least two cities")
+        if self.max_cities and len(live) > self.max_cities:
+            raise SessionError(f"{len(live)} cities exceed the limit of {self.max_cities}", 413)
+        return size
+
+    def distance(self) -> float:
+        tour = np.asarray(self.tour)
+        return float(self.distances[tour, np.roll(tour, -1)].sum())
+
+    def ordered_coordinates(self):
+        """``(coordinates in tour order, version)``, e.g. for building a drawing of the tour."""
+        with self._lock:
+            return self.coords[self.tour].copy(), self.version
+
+    def snapshot(self, coordinates: bool = True) -> dict:
+        """Closed tour as city ids, its length and (optionally) the coordinates by id."""
+        with self._lock:
+            tour = [self.id_of[slot] for slot in self.tour]
+            result = {
+                'n': len(tour),
+                'tour': tour + tour[:1],
+                'distance': self.distance(),
+                'version': self.version,
+            }
+            if coordinates:
+                result['coordinates'] = {str(self.id_of[slot]): self.coords[slot].tolist()
+                                         for slot in self.tour}
+            return result
+
+
+class SessionStore:
+    """In-process sessions, least recently used evicted past ``max_sessions`` or ``ttl``.
+
+    ``max_cells`` bounds the distance-matrix cells of all sessions together.
+    """
+
+    def __init__(self, max_sessions: int = 100, ttl: float = 3600, max_cities: int = None,
+                 max_cells: int = None):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_cities = max_cities
+        self.budget = CellBudget(max_cells)
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        cutoff = time.time() - self.ttl
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session.updated_at >= cutoff and len(self._sessions) <= self.max_sessions:
+                break
+            self.budget.release(self._sessions.pop(session_id))
+
+    def create(self, coordinates, ids=None):
+        with self._lock:
+            self._expire()  # expired sessions give their cells back first
+        session = TSPSession(coordinates, ids, self.max_cities, self.budget)
+        session_id = uuid.uuid4().hex
+        with self._lock:
+            self._sessions[session_id] = session
+            self._expire()
+        return session_id, session
+
+    def get(self, session_id: str) -> TSPSession:
+        with self._lock:
+            self._expire()
+            session = self._sessions.get(session_id)
+            if session is None:
+                raise SessionError(f"Unknown session: {session_id}", 404)
+            self._sessions.move_to_end(session_id)
+            return session
+
+    def delete(self, session_id: str):
+        with self._lock:
+            session = self._sessions.pop(session_id, None)
+            if session is None:
+                raise SessionError(f"Unknown session: {session_id}", 404)
+            self.budget.release(session)
@@ -0,0 +1,362 @@
+"""Streaming dataset uploads.
+
+The request body is read in fixed-size chunks, split into lines (JSON is
+taken in raw chunks) and fed to a parser for the problem's format while the
+bytes are spooled: kept in memory up to a threshold, then written to a file
+in the upload folder.  Parsers keep only counters and the header, so limits (size,
+dimension, item and edge counts) are enforced as soon as they are exceeded
+and no parsed copy of the instance is held.  Accepted uploads are stored
+under an instance ID that ``/api/solve`` can reference.
+"""
+import codecs
+import csv
+import io
+import json
+import os
+import tempfile
+import time
+import uuid
+
+CHUNK_SIZE = 64 * 1024
+MAX_LINE_BYTES = 64 * 1024
+
+DEFAULT_LIMITS = {
+    'MAX_UPLOAD_BYTES': 256 * 1024 * 1024,
+    'UPLOAD_SPOOL_BYTES': 4 * 1024 * 1024,
+    'MAX_JSON_UPLOAD_BYTES': 64 * 1024 * 1024,
+    'MAX_TSP_DIMENSION': 10000,
+    'MAX_KNAPSACK_ITEMS': 1000000,
+    'MAX_KNAPSACK_CAPACITY': 50000000,
+    'MAX_MATCHING_EDGES': 2000000,
+}
+
+EXTENSIONS = {'tsp': '.tsp', 'knapsack': '.csv', 'matching': '.json'}
+PROBLEM_BY_EXTENSION = {ext: problem for problem, ext in EXTENSIONS.items()}
+
+
+class UploadError(Exception):
+    """Rejected upload; ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+class Spool:
+    """Write-only buffer that moves from memory to a file once it passes ``threshold`` bytes."""
+
+    def __init__(self, directory: str, threshold: int):
+        self.directory = directory
+        self.threshold = threshold
+        self.size = 0
+        self._buffer = io.BytesIO()
+        self._file = None
+
+    @property
+    def on_disk(self) -> bool:
+        return self._file is not None
+
+    def write(self, data: bytes):
+        self.size += len(data)
+        if self._file is None and self.size > self.threshold:
+            self._file = tempfile.NamedTemporaryFile(dir=self.directory, prefix='.upload-',
+                                                     delete=False)
+            self._file.write(self._buffer.getbuffer())
+            self._buffer = None
+        (self._file or self._buffer).write(data)
+
+    def open_read(self):
+        if self._file is not None:
+            self._file.flush()
+            return open(self._file.name, 'rb')
+        return io.BytesIO(self._buffer.getvalue())
+
+    def commit(self, path: str):
+        """Move the spooled bytes to ``path`` without another in-memory copy."""
+        if self._file is not None:
+            self._file.close()
+            os.replace(self._file.name, path)
+            self._file = None
+        else:
+            with open(path, 'wb') as f:
+                f.write(self._buffer.getbuffer())
+            self._buffer = None
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+            os.unlink(self._file.name)
+            self._file = None
+        self._buffer = None
+
+
+class TSPLIBParser:
+    """Validates TSPLIB ``NODE_COORD_SECTION`` files line by line."""
+
+    def __init__(self, limits: dict):
+        self.max_dimension = limits['MAX_TSP_DIMENSION']
+        self.header = {}
+        self.dimension = None
+        self.count = 0
+        self.in_coords = False
+        self.done = False
+
+    def feed_line(self, line: str):
+        stripped = line.strip()
+        if self.done or not stripped:
+            return line
+        if stripped.startswith('EOF'):
+            self.done = True
+        elif stripped.startswith('NODE_COORD_SECTION'):
+            self.in_coords = True
+        elif not self.in_coords:
+            key, _, value = stripped.partition(':')
+            key, value = key.strip().upper(), value.strip()
+            self.header[key] = value
+            if key == 'DIMENSION':
+                try:
+                    self.dimension = int(value)
+                except ValueError:
+                    raise UploadError(f"Invalid DIMENSION: {value!r}")
+                if self.dimension > self.max_dimension:
+                    raise UploadError(f"DIMENSION {self.dimension} exceeds the limit of "
+                                      f"{self.max_dimension} cities", 413)
+        else:
+            parts = stripped.split()
+            if len(parts) < 3:
+                raise UploadError(f"Malformed coordinate line {self.count + 1}: {stripped[:80]!r}")
+            try:
+                float(parts[1]), float(parts[2])
+            except ValueError:
+                raise UploadError(f"Non-numeric coordinates on line {self.count + 1}: {stripped[:80]!r}")
+            self.count += 1
+            if self.count > (self.dimension or self.max_dimension):
+                raise UploadError(f"More than {self.dimension or self.max_dimension} coordinates",
+                                  413 if self.dimension is None else 400)
+        return line
+
+    def finish(self) -> dict:
+        if self.dimension is None:
+            raise UploadError("Missing DIMENSION header")
+        if self.count != self.dimension:
+            raise UploadError(f"DIMENSION is {self.dimension} but {self.count} coordinates were given")
+        return {'n': self.count, 'name': self.header.get('NAME'),
+                'edge_weight_type': self.header.get('EDGE_WEIGHT_TYPE')}
+
+
+class KnapsackCSVParser:
+    """Validates knapsack CSV rows; adds a ``capacity`` column from the request if missing."""
+
+    def __init__(self, limits: dict, capacity=None):
+        self.max_items = limits['MAX_KNAPSACK_ITEMS']
+        self.max_capacity = limits['MAX_KNAPSACK_CAPACITY']
+        self.capacity = capacity
+        self.columns = None
+        self.append_capacity = False
+        self.count = 0
+
+    def feed_line(self, line: str):
+        if not line.strip():
+            return line
+        row = next(csv.reader([line]))
+        if self.columns is None:
+            self.columns = [c.strip().lower() for c in row]
+            for required in ('weight', 'value'):
+                if required not in self.columns:
+                    raise UploadError(f"CSV is missing the '{required}' column")
+            if 'capacity' not in self.columns:
+                if self.capacity is None:
+                    raise UploadError("CSV has no 'capacity' column; pass ?capacity=<int>")
+                self.append_capacity = True
+                return line.rstrip('\r\n') + ',capacity\n'
+            return line
+
+        if len(row) != len(self.columns):
+            raise UploadError(f"Row {self.count + 1} has {len(row)} fields, expected {len(self.columns)}")
+        values = dict(zip(self.columns, row))
+        try:
+            weight = float(values['weight'])
+            float(values['value'])
+        except ValueError:
+            raise UploadError(f"Non-numeric weight/value in row {self.count + 1}")
+        if not 0 <= weight < float('inf') or weight != int(weight):
+            raise UploadError(f"Weight in row {self.count + 1} must be a non-negative integer")
+        if not self.append_capacity and self.count == 0:
+            try:
+                self.capacity = int(float(values['capacity']))
+            except ValueError:
+                raise UploadError("Non-numeric capacity")
+        self.count += 1
+        if self.count > self.max_items:
+            raise UploadError(f"More than {self.max_items} items", 413)
+        if self.append_capacity:
+            return line.rstrip('\r\n') + f',{self.capacity}\n'
+        return line
+
+    def finish(self) -> dict:
+        if self.count == 0:
+            raise UploadError("CSV has no items")
+        if self.capacity is None or not 0 <= int(self.capacity) <= self.max_capacity:
+            raise UploadError(f"Capacity must be between 0 and {self.max_capacity}", 413)
+        return {'n': self.count, 'capacity': int(self.capacity), 'columns': self.columns}
+
+
+class MatchingJSONParser:
+    """Bipartite graph JSON.
+
+    The stdlib has no incremental JSON parser, so raw chunks (not lines: a
+    document is often a single line) are only spooled and the document is
+    decoded once at the end, under ``MAX_JSON_UPLOAD_BYTES``.
+    """
+
+    def __init__(self, limits: dict, spool: Spool):
+        self.max_edges = limits['MAX_MATCHING_EDGES']
+        self.max_bytes = limits['MAX_JSON_UPLOAD_BYTES']
+        self.spool = spool
+
+    def feed_chunk(self, chunk: bytes) -> bytes:
+        if self.spool.size + len(chunk) > self.max_bytes:
+            raise UploadError(f"JSON uploads are limited to {self.max_bytes} bytes", 413)
+        return chunk
+
+    def finish(self) -> dict:
+        with self.spool.open_read() as f:
+            try:
+                data = json.load(f)
+            except ValueError as e:
+                raise UploadError(f"Invalid JSON: {e}")
+        for key in ('left_nodes', 'right_nodes', 'edges'):
+            if not isinstance(data.get(key), list):
+                raise UploadError(f"JSON needs a '{key}' list")
+        if len(data['edges']) > self.max_edges:
+            raise UploadError(f"More than {self.max_edges} edges", 413)
+        return {'left': len(data['left_nodes']), 'right': len(data['right_nodes']),
+                'edges': len(data['edges'])}
+
+
+def limits_from_config(config) -> dict:
+    return {key: config.get(key, default) for key, default in DEFAULT_LIMITS.items()}
+
+
+def iter_chunks(stream, max_bytes: int):
+    """Yield ``CHUNK_SIZE`` byte chunks of a binary stream, at most ``max_bytes`` in total."""
+    total = 0
+    while True:
+        chunk = stream.read(CHUNK_SIZE)
+        if not chunk:
+            return
+        total += len(chunk)
+        if total > max_bytes:
+            raise UploadError(f"Upload exceeds {max_bytes} bytes", 413)
+        yield chunk
+
+
+def iter_lines(stream, max_bytes: int):
+    """Yield decoded lines (each under ``MAX_LINE_BYTES``) from a binary stream."""
+    decoder = codecs.getincrementaldecoder('utf-8')(errors='strict')
+    pending = ''
+    for chunk in iter_chunks(stream, max_bytes):
+        try:
+            pending += decoder.decode(chunk)
+        except UnicodeDecodeError:
+            raise UploadError("Upload is not valid UTF-8 text")
+        lines = pending.split('\n')
+        pending = lines.pop()
+        # A line that ends in this chunk may have started in an earlier one
+        if any(len(line) > MAX_LINE_BYTES for line in lines) or len(pending) > MAX_LINE_BYTES:
+            raise UploadError(f"Line longer than {MAX_LINE_BYTES} bytes")
+        for line in lines:
+            yield line + '\n'
+    pending += decoder.decode(b'', final=True)
+    if pending:
+        yield pending
+
+
+class InstanceStore:
+    """Uploaded instances on disk: ``<id><ext>`` plus ``<id>.meta.json``.
+
+    Metadata lives next to the data so every worker process sees the same
+    instances.
+    """
+
+    def __init__(self, directory: str, limits: dict):
+        self.directory = directory
+        self.limits = limits
+        os.makedirs(directory, exist_ok=True)
+
+    def _meta_path(self, instance_id: str) -> str:
+        return os.path.join(self.directory, f'{instance_id}.meta.json')
+
+    def get(self, instance_id: str) -> dict:
+        # IDs are hex UUIDs; anything else could escape the upload folder
+        if not instance_id or not all(c in '0123456789abcdef' for c in instance_id):
+            raise UploadError(f"Unknown instance: {instance_id}", 404)
+        try:
+            with open(self._meta_path(instance_id)) as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise UploadError(f"Unknown instance: {instance_id}", 404)
+
+    def path(self, instance_id: str) -> str:
+        return self.get(instance_id)['path']
+
+    def list(self):
+        """Metadata of every stored instance (unreadable entries are skipped)."""
+        if not os.path.isdir(self.directory):
+            return []
+        instances = []
+        for name in sorted(os.listdir(self.directory)):
+            if name.endswith('.meta.json'):
+                try:
+                    instances.append(self.get(name[:-len('.meta.json')]))
+                except (UploadError, ValueError):
+                    continue
+        return instances
+
+    def ingest(self, stream, problem_type: str, filename: str = None, capacity=None,
+               content_length: int = None) -> dict:
+        """Stream, validate and store one upload; returns its metadata."""
+        if problem_type not in EXTENSIONS:
+            raise UploadError(f"Unknown problem type: {problem_type}")
+        max_bytes = self.limits['MAX_UPLOAD_BYTES']
+        if content_length is not None and content_length > max_bytes:
+            raise UploadError(f"Upload exceeds {max_bytes} bytes", 413)
+
+        spool = Spool(self.directory, self.limits['UPLOAD_SPOOL_BYTES'])
+        if problem_type == 'tsp':
+            parser = TSPLIBParser(self.limits)
+        elif problem_type == 'knapsack':
+            parser = KnapsackCSVParser(self.limits, capacity=capacity)
+        else:
+            parser = MatchingJSONParser(self.limits, spool)
+
+        try:
+            if problem_type == 'matching':
+                for chunk in iter_chunks(stream, max_bytes):
+                    spool.write(parser.feed_chunk(chunk))
+            else:
+                for line in iter_lines(stream, max_bytes):
+                    spool.write(parser.feed_line(line).encode('utf-8'))
+            summary = parser.finish()
+            instance_id = uuid.uuid4().hex
+            path = os.path.join(self.directory, instance_id + EXTENSIONS[problem_type])
+            spooled_to_disk = spool.on_disk
+            size = spool.size
+            spool.commit(path)
+        except BaseException:
+            spool.discard()
+            raise
+
+        meta = {
+            'instance_id': instance_id,
+            'problem_type': problem_type,
+            'filename': filename,
+            'path': path,
+            'bytes': size,
+            'spooled_to_disk': spooled_to_disk,
+            'summary': summary,
+            'created_at': time.time(),
+        }
+        with open(self._meta_path(instance_id), 'w') as f:
+            json.dump(meta, f)
+        return meta